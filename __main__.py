@@ -0,0 +1,5 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from start_cli import main
+
+sys.exit(main())
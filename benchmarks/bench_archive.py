@@ -0,0 +1,68 @@
+"""
+Benchmark: packaging a model for compute nodes by exporting the user_models/<name>/ tree and archiving it afterwards
+(previous workflow) vs. writing the model directly into an archive (Hy2OptModel.export_archive)
+Run:  python benchmarks/bench_archive.py
+"""
+try:
+    import os, sys, shutil, tempfile, time
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pypool')))
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tuflow')))
+    import cTFmodel
+    import config_core
+except:
+    print("ImportERROR: Cannot find Hy2Opt.tuflow.cTFmodel")
+    raise
+
+SCALES = [100, 1000, 10000]
+INFLOWS = ["Inflow {0}".format(i) for i in range(4)]
+OUTLETS = ["Outlet {0}".format(i) for i in range(2)]
+
+
+def write_events(file_name, n_events):
+    with open(file_name, "w") as f:
+        for e in range(1, n_events + 1):
+            for i, bc in enumerate(INFLOWS + OUTLETS):
+                f.write("{0}::{1}::{2}\n".format(e, bc, 10.0 * i + e % 97))
+
+
+def main():
+    bench_dir = tempfile.mkdtemp(prefix="hy2opt_bench_")
+    config_core.dir2tf = bench_dir + "/"
+    os.makedirs(os.path.join(bench_dir, "models"))
+    config_core.tf_tree_manifest = os.path.join(bench_dir, "tree_manifest.json")
+
+    def set_boundaries(model):
+        model.bc_dict = {"sa": INFLOWS, "bc": OUTLETS}
+        model.event_file = [model.name + ".events"]
+
+    # the boundary names are read from shapefiles (osgeo) in production
+    cTFmodel.Hy2OptModel.get_boundary_sa_names = set_boundaries
+    cTFmodel.Hy2OptModel.get_boundary_bc_names = lambda model: None
+    try:
+        print("{0:>10}{1:>26}{2:>22}".format("events", "export + archive [s]", "export_archive [s]"))
+        for n_events in SCALES:
+            model = cTFmodel.Hy2OptModel("bench_{0}".format(n_events))
+            set_boundaries(model)
+            write_events(model.get_event_file_name(), n_events)
+            sys.stdout = open(os.devnull, "w")  # export messages
+            try:
+                start = time.perf_counter()
+                model.export_as_tf(force=True, validate=False)
+                shutil.make_archive(os.path.join(bench_dir, "manual", model.name), "gztar",
+                                    os.path.join(bench_dir, "user_models"), model.name)
+                t_manual = time.perf_counter() - start
+                start = time.perf_counter()
+                archive = model.export_archive(os.path.join(bench_dir, "direct", model.name + ".tar.gz"),
+                                               validate=False)
+                t_direct = time.perf_counter() - start
+            finally:
+                sys.stdout.close()
+                sys.stdout = sys.__stdout__
+            assert archive, "export_archive failed"
+            print("{0:>10}{1:>26.2f}{2:>22.2f}".format(n_events, t_manual, t_direct))
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
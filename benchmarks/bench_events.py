@@ -0,0 +1,62 @@
+"""
+Benchmark: time and peak memory of writing the event files (_bc_data CSVs, bc database, tef) of large event ensembles
+with the streaming event pipeline (Hy2OptModel.export_events) vs. the memory needed to only load the events into a
+nested dict (legacy export_as_tf)
+Run:  python benchmarks/bench_events.py
+"""
+try:
+    import os, sys, shutil, tempfile, time, tracemalloc
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pypool')))
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tuflow')))
+    import cTFmodel
+    import fGlobal as fGl
+    import config_core
+except:
+    print("ImportERROR: Cannot find Hy2Opt.tuflow.cTFmodel")
+    raise
+
+SCALES = [1000, 10000, 100000]
+INFLOWS = ["Inflow {0}".format(i) for i in range(4)]
+OUTLETS = ["Outlet {0}".format(i) for i in range(2)]
+
+
+def write_events(file_name, n_events):
+    with open(file_name, "w") as f:
+        for e in range(1, n_events + 1):
+            for i, bc in enumerate(INFLOWS + OUTLETS):
+                f.write("{0}::{1}::{2}\n".format(e, bc, 10.0 * i + e % 97))
+
+
+def main():
+    bench_dir = tempfile.mkdtemp(prefix="hy2opt_bench_")
+    config_core.dir2tf = bench_dir + "/"
+    os.makedirs(os.path.join(bench_dir, "models"))
+    try:
+        print("{0:>10}{1:>16}{2:>20}{3:>22}".format("events", "streamed [s]", "streamed peak [MB]", "dict load peak [MB]"))
+        for n_events in SCALES:
+            model = cTFmodel.Hy2OptModel("bench_{0}".format(n_events))
+            model.bc_dict = {"sa": INFLOWS, "bc": OUTLETS}
+            model.event_file = [model.name + ".events"]
+            fGl.copy_tree(config_core.tf_source_tree, config_core.dir2tf + "user_models/" + model.name + "/")
+            write_events(model.get_event_file_name(), n_events)
+
+            tracemalloc.start()
+            fGl.dict_nested_read_from_file(model.get_event_file_name())
+            dict_peak = tracemalloc.get_traced_memory()[1] / 2. ** 20
+            tracemalloc.stop()
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            hashes, results, skipped = model.export_events({})
+            t_stream = time.perf_counter() - start
+            stream_peak = tracemalloc.get_traced_memory()[1] / 2. ** 20
+            tracemalloc.stop()
+            errors = [msg for msgs in results.values() for msg in msgs if msg.startswith("ERROR")]
+            assert not errors, errors[:3]
+            print("{0:>10}{1:>16.2f}{2:>20.1f}{3:>22.1f}".format(n_events, t_stream, stream_peak, dict_peak))
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: save time of .hy2model files with per-parameter in-place rewrites (legacy) vs. one batched write
+Run:  python benchmarks/bench_model_save.py
+"""
+try:
+    import os, sys, fileinput, logging, shutil, tempfile, time
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pypool')))
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tuflow')))
+    import cTFmodel
+    import config_core
+except:
+    print("ImportERROR: Cannot find Hy2Opt.tuflow.cTFmodel")
+    raise
+
+SCALES = [10, 100, 1000]
+BENCH_GROUP = "bench"
+
+
+def legacy_write_parameter(model, par_group, par):
+    """Previous Hy2OptModel.write_parameter: membership test on the whole file + fileinput in-place rewrite"""
+    write_str = "{0}::{1}::".format(par_group, par)
+    if os.path.isfile(model.model_file):
+        if write_str in open(model.model_file).read():
+            for line in fileinput.input([model.model_file], inplace=True):
+                if line.strip().startswith(write_str):
+                    line = write_str + model.par_dict[par_group][par] + "\n"
+                sys.stdout.write(line)
+            return 0
+        f_model = open(model.model_file, "a+")
+    else:
+        f_model = open(model.model_file, "w")
+    f_model.write(write_str + model.par_dict[par_group][par] + "\n")
+    f_model.close()
+
+
+def make_model(name, n_pars):
+    """:return: loaded Hy2OptModel with n_pars additional parameters (in the par_group BENCH_GROUP)"""
+    model = cTFmodel.Hy2OptModel(name)
+    open(model.model_file, "w").close()  # empty model file: load_model selects the first default choices
+    model.load_model()  # parameters of unloaded models are TUPLEs of choices, which cannot be saved
+    model.par_dict[BENCH_GROUP] = {"Parameter {0}".format(i): str(i * 0.5) for i in range(n_pars)}
+    return model
+
+
+def time_legacy(name, n_pars):
+    model = make_model(name, n_pars)
+    start = time.perf_counter()
+    for _ in range(2):  # first pass appends, second pass replaces existing lines
+        for par in model.par_dict[BENCH_GROUP].keys():
+            legacy_write_parameter(model, BENCH_GROUP, par)
+    return time.perf_counter() - start
+
+
+def time_batched(name, n_pars):
+    model = make_model(name, n_pars)
+    start = time.perf_counter()
+    for _ in range(2):
+        model.save_model()
+    return time.perf_counter() - start
+
+
+def main():
+    bench_dir = tempfile.mkdtemp(prefix="hy2opt_bench_")
+    logging.getLogger("logfile").addHandler(logging.NullHandler())  # no logfile.log and no console messages
+    config_core.dir2tf = bench_dir + "/"  # keep benchmark models out of tuflow/models/
+    os.makedirs(os.path.join(bench_dir, "models"))
+    try:
+        print("{0:>12}{1:>14}{2:>14}{3:>10}".format("parameters", "legacy [s]", "batched [s]", "speedup"))
+        for n_pars in SCALES:
+            t_legacy = time_legacy("legacy_{0}".format(n_pars), n_pars)
+            t_batched = time_batched("batched_{0}".format(n_pars), n_pars)
+            print("{0:>12}{1:>14.4f}{2:>14.4f}{3:>9.1f}x".format(n_pars, t_legacy, t_batched, t_legacy / t_batched))
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Startup-time benchmark: headless CLI import graph vs. the GUI configuration that all code paths used to import
+Asserts that the CLI does not import tkinter/osgeo and that it starts faster than the GUI configuration
+Run:  python benchmarks/bench_startup.py
+"""
+import os, subprocess, sys, time
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUNS = 5
+
+SNIPPETS = {
+    # legacy: every code path went through pypool/config.py (tkinter, pyhi, tuflow and other packages)
+    "gui config": "import sys; sys.path[:0] = ['pypool', 'tuflow']; import config; import cTFmodel",
+    # headless CLI: start_cli + model class (the command modules are imported by the commands)
+    "headless cli": "import start_cli, cTFmodel, cCatalog; import sys; "
+                    "assert 'tkinter' not in sys.modules, 'tkinter imported'; "
+                    "assert 'osgeo' not in sys.modules, 'osgeo imported'",
+}
+
+
+def time_snippet(code):
+    """:return: FLOAT of minimum wall time [s] of RUNS fresh interpreter starts"""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    results = {name: time_snippet(code) for name, code in SNIPPETS.items()}
+    for name, seconds in results.items():
+        print("{0:>14}: {1:.3f} s".format(name, seconds))
+    assert results["headless cli"] < results["gui config"], "headless CLI startup is not faster than GUI config"
+    print("OK: headless startup {0:.1f}x faster".format(results["gui config"] / results["headless cli"]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark suite of the model load, save and export hot paths at several scales of parameters, events and models
+Runs headless (no GUI) and without osgeo: the boundary names of the models are read from synthetic shapefiles (see
+synthetic_shp.py). Results are written as JSON that can be compared between commits to catch regressions.
+Run:      python benchmarks/bench_suite.py [--output results.json] [--repeats 5] [--case save_model ...] [--quick]
+Compare:  python benchmarks/bench_suite.py --output new.json --compare old.json [--threshold 1.25]
+          (the exit status is 1 if a case became slower than threshold x the time in old.json)
+"""
+try:
+    import argparse, io, json, logging, os, platform, shutil, statistics, subprocess, sys, tempfile, time
+    from collections import OrderedDict
+    from contextlib import redirect_stdout
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pypool')))
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tuflow')))
+    import synthetic_shp
+    import config_core
+    import fGlobal as fGl
+    import cTFmodel
+except:
+    print("ImportERROR: Cannot find Hy2Opt.tuflow.cTFmodel")
+    raise
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCHEMA = 1  # increase when the JSON layout changes
+BENCH_GROUP = "bench"
+INFLOWS = ["Inflow {0}".format(i) for i in range(4)]
+OUTLETS = ["Outlet {0}".format(i) for i in range(2)]
+
+# {case: (LIST of scales, LIST of quick scales, STR of scale unit)}
+CASES = OrderedDict([
+    ("load_model", ([100, 1000, 10000], [100, 1000], "parameters")),
+    ("save_model", ([100, 1000, 10000], [100, 1000], "parameters")),
+    ("write_parameter", ([10, 100, 1000], [10, 100], "parameters")),
+    ("export_as_tf", ([100, 1000, 10000], [100, 1000], "events")),
+    ("export_as_tf_current", ([100, 1000, 10000], [100, 1000], "events")),
+    ("dict_nested_read_from_file", ([1000, 10000, 100000], [1000, 10000], "events")),
+    ("dict_nested_write2file", ([1000, 10000, 100000], [1000, 10000], "events")),
+    ("get_tf_models", ([100, 1000, 10000], [100, 1000], "models")),
+])
+
+
+class BenchEnvironment:
+    def __init__(self, bench_dir):
+        """
+        Temporary Hy2Opt Tuflow directory (models, user_models, shapefiles) - the models, trees, catalog and caches of
+        the repository are not touched
+        :param bench_dir: STR of full path of an empty directory
+        """
+        self.bench_dir = bench_dir
+        self.case_no = 0
+        logging.getLogger("logfile").addHandler(logging.NullHandler())  # no logfile.log and no console messages
+        config_core.tf_tree_manifest = os.path.join(bench_dir, "tree_manifest.json")
+        config_core.tf_catalog = os.path.join(bench_dir, "catalog.sqlite")  # disabled (the file does not exist)
+        self.sa_shp = os.path.join(bench_dir, "gis", "2d_sa_bench_QT_R.shp")
+        self.bc_shp = os.path.join(bench_dir, "gis", "2d_bc_bench_HT_L.shp")
+        fGl.chk_dir(os.path.join(bench_dir, "gis"))
+        synthetic_shp.write_point_shp(self.sa_shp, "Name", INFLOWS)
+        synthetic_shp.write_point_shp(self.bc_shp, "Name", OUTLETS)
+
+    def new_tf_dir(self):
+        """Points the Hy2Opt Tuflow directory to a new empty folder (every case starts from scratch)"""
+        self.case_no += 1
+        tf_dir = os.path.join(self.bench_dir, "tf{0:03d}".format(self.case_no)) + "/"
+        os.makedirs(tf_dir + "models")
+        config_core.dir2tf = tf_dir
+        return tf_dir
+
+    def new_model(self, name, n_pars=0):
+        """
+        :param n_pars: INT of number of additional parameters (in the par_group BENCH_GROUP)
+        :return: Hy2OptModel with a saved model file and the synthetic boundary shapefiles
+        """
+        model = cTFmodel.Hy2OptModel(name)
+        open(model.model_file, "w").close()  # empty model file: load_model selects the first default choices
+        model.load_model()  # parameters of unloaded models are TUPLEs of choices, which cannot be saved
+        model.par_dict[BENCH_GROUP] = OrderedDict(
+            ("Parameter {0}".format(i), str(i * 0.5)) for i in range(n_pars))
+        with model.batch():
+            model.save_model()
+            model.set_usr_parameters("gbc", "Read GIS SA", [self.sa_shp])
+            model.set_usr_parameters("gbc", "Read GIS BC", [self.bc_shp])
+        return model
+
+
+def get_commit():
+    """:return: STR of the current git commit of the repository (None if not available)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_event_defs(n_events):
+    """:return: DICT of {INT of event: {STR of boundary: STR of value}} (the .events file layout)"""
+    return {e: {bc: str(10.0 * i + e % 97) for i, bc in enumerate(INFLOWS + OUTLETS)} for e in range(1, n_events + 1)}
+
+
+def prepare(case, scale, env):
+    """
+    Creates the files of a case at a scale
+    :return: function that runs the timed code once
+    """
+    env.new_tf_dir()
+    if case == "load_model":
+        model = env.new_model("bench", scale)
+
+        def run():
+            model.invalidate_model_index()  # parse the model file like a newly opened model
+            model.load_model()
+        return run
+    if case == "save_model":
+        model = env.new_model("bench", scale)
+        return model.save_model
+    if case == "write_parameter":
+        model = env.new_model("bench", scale)
+
+        def run():
+            for par in model.par_dict[BENCH_GROUP].keys():
+                model.write_parameter(BENCH_GROUP, par)  # every call outside a batch updates the model file
+        return run
+    if case in ("export_as_tf", "export_as_tf_current"):
+        env.new_model("bench")
+        model = cTFmodel.Hy2OptModel("bench")  # not loaded (export_as_tf reads the boundaries before the model file)
+        model.get_boundary_sa_names()  # sets the events file name
+        fGl.dict_nested_write2file(get_event_defs(scale), model.get_event_file_name())
+        force = case == "export_as_tf"
+        model.export_as_tf(force=True, validate=False)  # model tree and export manifest exist
+        # a new model object per export (like start_cli.py export): export_as_tf loads the model file
+        return lambda: cTFmodel.Hy2OptModel("bench").export_as_tf(force=force, validate=False)
+    events_file = os.path.join(config_core.dir2tf, "models", "bench.events")
+    if case == "dict_nested_read_from_file":
+        fGl.dict_nested_write2file(get_event_defs(scale), events_file)
+        return lambda: fGl.dict_nested_read_from_file(events_file)
+    if case == "dict_nested_write2file":
+        e_defs = get_event_defs(scale)
+        return lambda: fGl.dict_nested_write2file(e_defs, events_file)
+    if case == "get_tf_models":
+        for i in range(scale):
+            open(os.path.join(config_core.dir2tf, "models", "bench_{0:05d}.hy2model".format(i)), "w").close()
+
+        def run():
+            assert fGl.get_tf_models().__len__() == scale
+        return run
+    raise ValueError("Unknown benchmark case: " + str(case))
+
+
+def time_case(run, repeats):
+    """:return: LIST of FLOAT of wall times [s] of repeats runs (after one warm-up run)"""
+    run()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Prints the time ratios of results and baseline (minimum times of the same case and scale)
+    :param results: DICT of JSON results of this run
+    :param baseline: DICT of JSON results of a previous run
+    :param threshold: FLOAT of ratio above which a case is a regression
+    :return: LIST of STR of regressions
+    """
+    old = {(r["case"], r["scale"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print("\nComparison with {0} (commit {1}):".format(baseline.get("created"), baseline.get("commit")))
+    print("{0:<28}{1:>10}{2:>14}{3:>14}{4:>10}".format("case", "scale", "old min [s]", "new min [s]", "ratio"))
+    for r in results["results"]:
+        if (r["case"], r["scale"]) not in old:
+            continue
+        t_old = old[(r["case"], r["scale"])]["min"]
+        ratio = r["min"] / t_old if t_old > 0 else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append("{0} ({1} {2}): {3:.2f}x".format(r["case"], r["scale"], r["unit"], ratio))
+        print("{0:<28}{1:>10}{2:>14.4f}{3:>14.4f}{4:>9.2f}x{5}".format(
+            r["case"], r["scale"], t_old, r["min"], ratio, flag))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Hy2Opt benchmark suite (model load, save and export)")
+    parser.add_argument("--case", action="append", choices=list(CASES.keys()),
+                        help="case to run (repeatable, default: all cases)")
+    parser.add_argument("--compare", metavar="JSON", help="results of a previous run (e.g., of another commit)")
+    parser.add_argument("--output", metavar="JSON", help="file for the results (default: print only)")
+    parser.add_argument("--quick", action="store_true", help="smaller scales only (for quick checks)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per case and scale (default: 5)")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="time ratio above which a case is a regression (default: 1.25)")
+    args = parser.parse_args(args)
+
+    results = OrderedDict([
+        ("schema", SCHEMA),
+        ("commit", get_commit()),
+        ("created", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ("python", platform.python_version()),
+        ("platform", platform.platform()),
+        ("osgeo", "stand-in" if synthetic_shp.install_ogr_standin() else "installed"),
+        ("repeats", args.repeats),
+        ("results", []),
+    ])
+    bench_dir = tempfile.mkdtemp(prefix="hy2opt_bench_")
+    tf_dir = config_core.dir2tf
+    try:
+        env = BenchEnvironment(bench_dir)
+        print("{0:<28}{1:>10}{2:>12}{3:>14}{4:>14}".format("case", "scale", "unit", "min [s]", "median [s]"))
+        for case in (args.case if args.case else CASES.keys()):
+            scales, quick_scales, unit = CASES[case]
+            for scale in (quick_scales if args.quick else scales):
+                with redirect_stdout(io.StringIO()):  # messages of the model methods
+                    times = time_case(prepare(case, scale, env), args.repeats)
+                results["results"].append(OrderedDict([
+                    ("case", case), ("scale", scale), ("unit", unit), ("min", min(times)),
+                    ("median", statistics.median(times)), ("times", times)]))
+                print("{0:<28}{1:>10}{2:>12}{3:>14.4f}{4:>14.4f}".format(
+                    case, scale, unit, min(times), statistics.median(times)))
+    finally:
+        config_core.dir2tf = tf_dir
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+        print("Results written to " + args.output)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print("\n{0} regression(s):\n".format(regressions.__len__()) + "\n".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Run supervision benchmark: wall time of a diverging run that is stopped early vs. the same run without divergence
+Runs the fake solver (tuflow/fake_tuflow.py) on the same event: a diverging run without supervision (leaves the log
+files of a diverged run), a healthy run, and a supervised diverging run. Asserts that the healthy run finishes (the log
+files of the earlier run must not stop it) and that the supervised diverging run is stopped and recorded as failed
+Run:  python benchmarks/bench_supervision.py
+"""
+import os, shutil, sys, tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pypool')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tuflow')))
+import config_core
+import cMonitor
+import cRuns
+
+EVENT = "5"
+STEPS = 60
+STEP_TIME = 0.05
+
+
+def run_event(runs_dir, diverge, supervise=True):
+    """:return: cRuns.RunJob of one fake solver run of EVENT (supervised with the default cMonitor.RunLimits)"""
+    env = dict(os.environ, FAKE_TUFLOW_STEPS=str(STEPS), FAKE_TUFLOW_STEP_TIME=str(STEP_TIME),
+               FAKE_TUFLOW_DIVERGE_EVENTS=EVENT if diverge else "")
+    job = cRuns.RunJob("m_" + EVENT, cRuns.get_solver_command(config_core.tf_fake_solver) +
+                       ["-b", "-e1", EVENT, os.path.join(runs_dir, "m.tcf")], runs_dir,
+                       os.path.join(runs_dir, "Log", "m_{0}.stdout.log".format(EVENT)), env=env,
+                       progress_files=[os.path.join(runs_dir, "Log", "m_{0}*.tlf".format(EVENT))])
+    monitor = cMonitor.LogMonitor(interval=0.1, limits=cMonitor.RunLimits() if supervise else None)
+    monitor.start()
+    try:
+        cRuns.RunOrchestrator(max_workers=1).run([job], callback=monitor.notify)
+    finally:
+        monitor.stop()
+    return job
+
+
+def main():
+    runs_dir = tempfile.mkdtemp(prefix="hy2opt_bench_") + "/runs/"
+    try:
+        os.makedirs(runs_dir)
+        with open(runs_dir + "m.tcf", "w") as f:
+            f.write("Log Folder == Log\\\n")
+        with open(runs_dir + "m.tef", "w") as f:
+            f.write("Define Event == {0}\n    End Time == 10\nEnd Define\n".format(EVENT))
+        unsupervised = run_event(runs_dir, diverge=True, supervise=False)
+        healthy = run_event(runs_dir, diverge=False)
+        diverged = run_event(runs_dir, diverge=True)
+    finally:
+        shutil.rmtree(os.path.dirname(runs_dir.rstrip("/")), ignore_errors=True)
+    for name, job in (("unsupervised", unsupervised), ("healthy run", healthy), ("diverging run", diverged)):
+        print("{0:>14}: {1:.2f} s ({2})".format(name, job.duration, str(job)))
+    assert unsupervised.status == cRuns.STATUS_FINISHED, "unsupervised run did not finish"
+    assert healthy.status == cRuns.STATUS_FINISHED, "healthy run after a diverged run did not finish"
+    assert diverged.status == cRuns.STATUS_FAILED and diverged.stop_reason, "diverging run was not stopped"
+    print("OK: diverging run stopped after {0:.0f} % of the wall time of a full run".format(
+        100. * diverged.duration / healthy.duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: provisioning many variant model trees (user_models/<name>/) from the cached tf_tree manifest with linked
+static assets (cTrees.TreeProvisioner) vs. walking the source tree for every model and copying the static assets
+(legacy times and sizes above 500 trees are extrapolated from 500 trees)
+Run:  python benchmarks/bench_trees.py
+"""
+try:
+    import os, sys, shutil, tempfile, time
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pypool')))
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tuflow')))
+    import cTrees
+    import fGlobal as fGl
+    from config_core import tf_source_tree
+except:
+    print("ImportERROR: Cannot find Hy2Opt.tuflow.cTrees")
+    raise
+
+SCALES = [500, 5000]
+ASSET_SIZE = 8 * 2 ** 20  # bytes of a synthetic GIS raster that is shared by all variants
+
+
+def disk_usage(directory, exclude=None):
+    """
+    :param exclude: DICT (optional) of inodes that are not counted (e.g., the files of the source tree)
+    :return: TUPLE of (FLOAT of allocated MB of all files - hardlinked files are counted once, DICT of inodes)
+    Reflinked files report their full size (shared blocks are not visible in st_blocks)
+    """
+    inodes = {}
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for name in filenames:
+            f_stat = os.stat(os.path.join(dirpath, name))
+            inodes[(f_stat.st_dev, f_stat.st_ino)] = getattr(f_stat, "st_blocks", f_stat.st_size // 512) * 512
+    exclude = exclude if exclude else {}
+    return sum(size for inode, size in inodes.items() if inode not in exclude) / 2. ** 20, inodes
+
+
+def legacy_provision(source_tree, target_directory):
+    """Previous workflow: fGlobal.copy_tree (folders only) and a copy of every static asset"""
+    fGl.copy_tree(source_tree, target_directory)
+    for dirpath, dirnames, filenames in os.walk(source_tree):
+        for name in filenames:
+            shutil.copy2(os.path.join(dirpath, name), os.path.join(target_directory, dirpath[len(source_tree):], name))
+
+
+def main():
+    bench_dir = tempfile.mkdtemp(prefix="hy2opt_bench_")
+    source_tree = os.path.join(bench_dir, "tf_tree") + "/"
+    try:
+        shutil.copytree(tf_source_tree, source_tree)
+        with open(os.path.join(source_tree, "model", "gis", "dem.flt"), "wb") as f:
+            f.write(os.urandom(ASSET_SIZE))
+        print("{0:>8}{1:>14}{2:>12}{3:>16}{4:>12}  {5}".format(
+            "trees", "legacy [s]", "[MB]", "provision [s]", "[MB]", "methods"))
+        for n_trees in SCALES:
+            legacy_dir = os.path.join(bench_dir, "legacy")
+            start = time.perf_counter()
+            for i in range(n_trees if n_trees <= 500 else 500):
+                legacy_provision(source_tree, os.path.join(legacy_dir, "m{0:05d}".format(i)) + "/")
+            t_legacy = (time.perf_counter() - start) * n_trees / min(n_trees, 500)  # extrapolated above 500 trees
+            mb_legacy = disk_usage(legacy_dir)[0] * n_trees / min(n_trees, 500)
+            shutil.rmtree(legacy_dir)
+
+            tree_dir = os.path.join(bench_dir, "provisioned")
+            start = time.perf_counter()
+            provisioner = cTrees.TreeProvisioner(source_tree, os.path.join(bench_dir, "manifest.json"))
+            stats = provisioner.provision_many(os.path.join(tree_dir, "m{0:05d}".format(i)) + "/" for i in range(n_trees))
+            t_provision = time.perf_counter() - start
+            mb_provision = disk_usage(tree_dir, exclude=disk_usage(source_tree)[1])[0]
+            shutil.rmtree(tree_dir)
+            print("{0:>8}{1:>14.2f}{2:>12.1f}{3:>16.2f}{4:>12.1f}  {5}".format(
+                n_trees, t_legacy, mb_legacy, t_provision, mb_provision, stats))
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Synthetic shapefile stand-ins for benchmarks that run without GIS data and without osgeo
+write_point_shp writes real (minimal) point shapefiles (.shp, .shx, .dbf) with a text attribute field, so that the
+boundary names of benchmark models are read through the same code paths as in production
+If osgeo is not installed, install_ogr_standin registers a minimal osgeo.ogr replacement that reads these files
+(driver -> data source -> layer -> field definitions / features) - the real osgeo.ogr is used if it is installed
+"""
+try:
+    import os, struct, sys, time, types
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, struct, sys, time, types).")
+
+SHP_POINT = 1  # shape type of point shapefiles
+
+
+def read_dbf(dir2dbf):
+    """
+    Reads the attribute table of a dBASE III file
+    :param dir2dbf: STR of full path to a .dbf file
+    :return: TUPLE of (LIST of STR of field names, LIST of DICTs of {field name: STR of value})
+    """
+    with open(dir2dbf, "rb") as f:
+        n_records, header_size, record_size = struct.unpack("<xxxxIHH20x", f.read(32))
+        fields = []
+        for _ in range((header_size - 33) // 32):
+            name, length = struct.unpack("<11sx4xB15x", f.read(32))
+            fields.append((name.split(b"\x00")[0].decode("ascii"), length))
+        f.seek(header_size)
+        records = []
+        for _ in range(n_records):
+            data = f.read(record_size)
+            if data[0:1] == b"*":
+                continue  # deleted record
+            record, pos = {}, 1
+            for name, length in fields:
+                record[name] = data[pos:pos + length].decode("latin-1").strip()
+                pos += length
+            records.append(record)
+    return [name for name, length in fields], records
+
+
+def write_point_shp(dir2shp, field_name, values, spacing=10.0):
+    """
+    Writes a point shapefile (.shp, .shx, .dbf) with one text field
+    :param dir2shp: STR of full path to the .shp file
+    :param field_name: STR of the attribute field name (max. 10 characters, e.g., "Name")
+    :param values: LIST of STR of field values (one point per value)
+    :param spacing: FLOAT of distance between the points (along the x-axis)
+    """
+    stem = os.path.splitext(dir2shp)[0]
+    points = [(i * spacing, 0.0) for i in range(values.__len__())]
+    bbox = (0.0, 0.0, max(values.__len__() - 1, 0) * spacing, 0.0)
+
+    def header(file_words):
+        # file code, unused, file length (16-bit words) in big endian - version, shape type and extents in little endian
+        return struct.pack(">7i", 9994, 0, 0, 0, 0, 0, file_words) + \
+            struct.pack("<2i8d", 1000, SHP_POINT, bbox[0], bbox[1], bbox[2], bbox[3], 0., 0., 0., 0.)
+
+    record_words = 10  # content of a point record: shape type (INT) + x, y (DOUBLEs)
+    with open(stem + ".shp", "wb") as f:
+        f.write(header(50 + (4 + record_words) * points.__len__()))
+        for i, (x, y) in enumerate(points):
+            f.write(struct.pack(">2i", i + 1, record_words) + struct.pack("<i2d", SHP_POINT, x, y))
+    with open(stem + ".shx", "wb") as f:
+        f.write(header(50 + 4 * points.__len__()))
+        for i in range(points.__len__()):
+            f.write(struct.pack(">2i", 50 + i * (4 + record_words), record_words))
+
+    length = max([str(v).__len__() for v in values] + [1])
+    today = time.localtime()
+    with open(stem + ".dbf", "wb") as f:
+        f.write(struct.pack("<B3BIHH20x", 3, today.tm_year - 1900, today.tm_mon, today.tm_mday,
+                            values.__len__(), 32 + 32 + 1, 1 + length))
+        f.write(struct.pack("<11sc4xBB14x", field_name.encode("ascii")[0:10], b"C", length, 0))
+        f.write(b"\r")
+        for val in values:
+            f.write(b" " + str(val).encode("latin-1").ljust(length))
+        f.write(b"\x1a")
+
+
+class StandinFieldDefn:
+    def __init__(self, name):
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+
+class StandinFeature:
+    def __init__(self, record):
+        self.record = record
+
+    def GetField(self, field_name):
+        return self.record.get(field_name)
+
+
+class StandinLayer:
+    def __init__(self, dir2shp):
+        self.dir2shp = dir2shp
+        self.field_names, self.records = read_dbf(os.path.splitext(dir2shp)[0] + ".dbf")
+
+    def GetExtent(self):
+        with open(self.dir2shp, "rb") as f:
+            x_min, y_min, x_max, y_max = struct.unpack("<36x4d", f.read(68))
+        return x_min, x_max, y_min, y_max
+
+    def GetFeatureCount(self):
+        return self.records.__len__()
+
+    def GetLayerDefn(self):
+        return self
+
+    def GetFieldCount(self):
+        return self.field_names.__len__()
+
+    def GetFieldDefn(self, n):
+        return StandinFieldDefn(self.field_names[n])
+
+    def __iter__(self):
+        return iter([StandinFeature(record) for record in self.records])
+
+
+class StandinDataSource:
+    def __init__(self, dir2shp):
+        self.layer = StandinLayer(dir2shp)
+
+    def GetLayer(self, n=0):
+        return self.layer
+
+
+class StandinDriver:
+    @staticmethod
+    def Open(dir2shp, update=0):
+        if not os.path.isfile(str(dir2shp)):
+            return None
+        return StandinDataSource(dir2shp)
+
+
+def install_ogr_standin():
+    """
+    Registers the stand-in osgeo.ogr module if osgeo is not installed
+    :return: BOOL (True if the stand-in is used, False if the real osgeo.ogr is available)
+    """
+    try:
+        from osgeo import ogr
+        return False
+    except ImportError:
+        pass
+    ogr = types.ModuleType("osgeo.ogr")
+    ogr.GetDriverByName = lambda name: StandinDriver()
+    osgeo = types.ModuleType("osgeo")
+    osgeo.ogr = ogr
+    sys.modules["osgeo"] = osgeo
+    sys.modules["osgeo.ogr"] = ogr
+    return True
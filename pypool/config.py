@@ -4,6 +4,7 @@ except:
     print("ImportERROR: Missing fundamental packages (required: os, sys, datetime, shutil, logging, webbrowser).")
 try:
     import fGlobal as fGl
+    from config_core import *
 except:
     print("ImportERROR: Could not import pypool.fGlobal")
 try:
@@ -21,38 +22,23 @@ try:
     import pyhi
 except:
     print("ImportERROR: Could not import .pyhi")
-try:
-    import tuflow
-except:
-    print("ImportERROR: Could not import .tuflow")
-try:
-    import other
-except:
-    print("ImportERROR: Could not import .other")
+# the tuflow and other GUI packages are imported on first selection of their tabs (start_gui.ParentGUI.build_sub_tabs)
 
 
 def set_directories():
-    """ Append relevant directories to system path"""
+    """ Append relevant directories (Python packages that are not yet on the path) to system path"""
     mdir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/"
     for sdir in os.listdir(mdir):
-        if os.path.isdir(os.path.join(mdir, sdir)) and not(('idea' in sdir) or ('__' in sdir)):
+        # every additional sys.path entry is searched by all later imports - skip data folders and duplicates
+        spath = os.path.join(mdir, sdir)
+        if not os.path.isfile(os.path.join(spath, "__init__.py")) or (spath in sys.path):
+            continue
+        if not(('idea' in sdir) or ('__' in sdir)):
             print('Appending import folder %s ...' % sdir)
-            sys.path.append(os.path.join(mdir, sdir))
+            sys.path.append(spath)
     print("\n" * 3)
 
 
-def chk_osgeo(func):
-    def wrapper(*args, **kwargs):
-        try:
-            from osgeo import ogr
-            func(*args, **kwargs)
-        except ModuleNotFoundError:
-            showinfo("ERROR", "Install osgeo.ogr to enable this Hy2Opt feature.")
-        except ImportError:
-            showinfo("ERROR", "Install osgeo.ogr to enable this Hy2Opt feature.")
-    return wrapper
-
-
 def log_actions(func):
     def wrapper(*args, **kwargs):
         logger = Logger("logfile")
@@ -60,18 +46,6 @@ def log_actions(func):
         logger.logging_stop()
     return wrapper
 
-dir2dialogues = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/pyorigin/dialogues/"
-dir2master = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "\\"
-dir2templates = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/pyorigin/"
-dir2tf = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/tuflow/"
-# software_ids = ["tf"]
-# software_names = ["Tuflow"]
-# software_dict = dict(zip(software_ids, software_names))
-tf_source_tree = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/pyorigin/tf_tree/"
-
-
-# sqft2ac = float(1 / 43560)
-# m2ft = 0.3048
 
 # GUI settings
 code_icon = dir2master + "pyorigin\\graphics\\icon.ico"
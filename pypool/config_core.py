@@ -0,0 +1,53 @@
+try:
+    import os, sys, logging
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, sys, logging).")
+try:
+    import fGlobal as fGl
+except:
+    print("ImportERROR: Could not import pypool.fGlobal")
+
+# Settings and helpers without GUI (tkinter) dependencies - config.py adds the GUI settings
+
+
+def chk_osgeo(func):
+    def wrapper(*args, **kwargs):
+        try:
+            from osgeo import ogr
+            func(*args, **kwargs)
+        except ModuleNotFoundError:
+            show_error("Install osgeo.ogr to enable this Hy2Opt feature.")
+        except ImportError:
+            show_error("Install osgeo.ogr to enable this Hy2Opt feature.")
+    return wrapper
+
+
+def show_error(msg):
+    """Shows an error message in a message box if the GUI is running, otherwise prints the message"""
+    if "tkinter" in sys.modules:
+        from tkinter.messagebox import showinfo
+        showinfo("ERROR", msg)
+    else:
+        print("ERROR: " + msg)
+
+
+dir2dialogues = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/pyorigin/dialogues/"
+dir2master = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "\\"
+dir2templates = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/pyorigin/"
+dir2tf = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/tuflow/"
+# software_ids = ["tf"]
+# software_names = ["Tuflow"]
+# software_dict = dict(zip(software_ids, software_names))
+tf_archive_dir = dir2tf + "archives/"  # default folder of model archives (see Hy2OptModel.export_archive)
+tf_asset_store = dir2tf + "assets/"  # content-addressed store of model input files (see cAssets)
+tf_cache_dir = dir2tf + "cache/"  # databases and caches (not in models/, which must only contain model files)
+tf_catalog = tf_cache_dir + "catalog.sqlite"  # optional model catalog (enabled if the file exists)
+tf_fake_solver = dir2tf + "fake_tuflow.py"  # stand-in solver for runs without a Tuflow installation (see cRuns)
+tf_run_queue = tf_cache_dir + "run_queue.sqlite"  # persistent queue of event runs (see cQueue)
+tf_source_tree = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + "/pyorigin/tf_tree/"
+tf_validation_cache = tf_cache_dir + "validation_cache.json"  # results of cValidation.ModelValidator
+tf_tree_manifest = dir2tf + "user_models/.tree_manifest.json"  # cached listing of tf_source_tree (see cTrees)
+
+
+# sqft2ac = float(1 / 43560)
+# m2ft = 0.3048
@@ -1,25 +1,32 @@
 try:
-    import os, logging, sys, glob, webbrowser, time
-    from collections import Iterable  # used in the flatten function
+    import os, logging, sys, glob, hashlib, locale, tempfile, threading, webbrowser, time
     from bisect import bisect_left
+    try:
+        from collections.abc import Iterable  # used in the flatten function
+    except ImportError:
+        from collections import Iterable
 except:
-    print("ImportERROR: Missing fundamental packages (required: bisect, collections, os, sys, glob, logging, time, webbrowser).")
+    print("ImportERROR: Missing fundamental packages (required: bisect, collections, os, sys, glob, hashlib, locale, logging, tempfile, threading, time, webbrowser).")
 
 try:
-    import config as cfg
+    import config_core as cfg
 except:
-    print("ImportERROR: Cannot find Hy2Opt.pypool.config")
+    print("ImportERROR: Cannot find Hy2Opt.pypool.config_core")
 
-try:
-    from osgeo import ogr
-except:
-    print("ImportWARNING: Cannot find osgeo.ogr - geospatial functions are not be available.")
+
+model_signature_tag = "#signatures"  # first line of .hy2model files: #signatures::par_group1,par_group2,...
+umask = os.umask(0o022)  # read the umask of the process (os.umask sets a new umask and returns the old one)
+os.umask(umask)
+write_stats_lock = threading.Lock()  # write statistics are updated by concurrent writer threads (see count_write)
 
 
 # FUNCTION WRAPPERS - MUST BE ON TOP OF THE FILE
 def ogr_shp_env(func):
+    # osgeo is only imported when a geospatial function is called (headless use without osgeo)
     def wrapper(*args, **kwargs):
         try:
+            global ogr
+            from osgeo import ogr
             return func(*args, **kwargs)
         except:
             print("ERROR: osgeo.ogr not available.")
@@ -40,6 +47,21 @@ def chk_is_empty(variable):
     return bool(value)
 
 
+def chk_same_content(file_name, size, digest):
+    """
+    :param file_name: STR of full path of an existing (or missing) file
+    :param size: INT of number of bytes of the new content
+    :param digest: BYTES of sha1 digest of the new content
+    :return: BOOL (True if file_name exists and has the same content hash - only hashed if the size matches)
+    """
+    try:
+        if os.path.getsize(file_name) != size:
+            return False
+        return get_file_hash(file_name) == digest
+    except OSError:
+        return False
+
+
 def chk_dir(directory):
     # returns False if the directory did not exist yet
     if not os.path.exists(directory):
@@ -63,6 +85,23 @@ def clean_dir(directory):
             os.rmdir(os.path.join(root, name))
 
 
+def copy_file_mode(tmp_name, file_name):
+    """
+    Gives a temporary file (e.g., of tempfile.mkstemp with mode 0600) the permissions of the file that it replaces, or
+    of a new file (0666 minus umask) if file_name does not exist
+    :param tmp_name: STR of full path of the temporary file
+    :param file_name: STR of full path of the target file
+    """
+    try:
+        mode = os.stat(file_name).st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~umask
+    try:
+        os.chmod(tmp_name, mode)
+    except OSError:
+        pass  # e.g., file systems without permissions
+
+
 def copy_tree(source_directory, target_directory):
     """
     Copies all files and folder from source_directory to target directory
@@ -80,6 +119,19 @@ def copy_tree(source_directory, target_directory):
     return exists
 
 
+def count_write(stats, key, n_bytes):
+    """
+    :param stats: DICT of write statistics (see new_write_stats) or None (nothing is counted)
+    :param key: STR of "written" or "skipped"
+    :param n_bytes: INT of number of bytes
+    """
+    if stats is None:
+        return
+    with write_stats_lock:
+        stats[key] += n_bytes
+        stats["files " + key] += 1
+
+
 def cool_down(seconds):
     # Pauses script execution for the input argument number of seconds
     # seconds = INT
@@ -164,6 +216,51 @@ def dict_nested_read_from_file(filename, sep="::"):
     return dictionary
 
 
+def dict_model_read_from_file(filename, sep="::"):
+    """
+    Reads a Hy2Opt model file (lines of par_group::par::value) into a dictionary
+    :param filename: STR of full path to a .hy2model file
+    :param sep: STR (optional)
+    :return: DICT of {(par_group, par): STR of value} - the first definition of a parameter applies
+    """
+    dictionary = {}
+    with open(filename, "r") as f:
+        for line in f:
+            values = line.strip().split(sep)
+            if values.__len__() < 3:
+                continue
+            dictionary.setdefault((values[0], values[1]), values[-1])
+    return dictionary
+
+
+def dict_model_signatures(filename, sep="::"):
+    """
+    Reads the signed parameter groups of a Hy2Opt model file from its header line (#signatures::ctrl,stab,...)
+    Model files without header (legacy par_group::signature::True lines) are scanned completely
+    :param filename: STR of full path to a .hy2model file
+    :param sep: STR (optional)
+    :return: LIST of signed par_groups
+    """
+    with open(filename, "r") as f:
+        header = f.readline().strip()
+        if header.startswith(model_signature_tag + sep):
+            return [par_group for par_group in header.split(sep, 1)[1].split(",") if par_group]
+        signatures = []
+        for line in [header] + f.readlines():
+            values = line.strip().split(sep)
+            if (values.__len__() > 2) and (values[1] == "signature") and (values[2] == "True"):
+                signatures.append(values[0])
+    return signatures
+
+
+def dict_model_signature_header(signatures, sep="::"):
+    """
+    :param signatures: LIST of signed par_groups
+    :return: STR of model file header line
+    """
+    return model_signature_tag + sep + ",".join(signatures) + "\n"
+
+
 def dict_write2file(dictionary, filename, sep=","):
     with open(filename, "a") as f:
         for i in dictionary.keys():
@@ -183,6 +280,16 @@ def dict_nested_write2file(dictionary, filename, sep="::"):
                 f.write(str(top_key) + sep + str(sub_key) + sep + str(sub_val) + "\n")
 
 
+def encode_text(content):
+    """
+    :param content: STR of text
+    :return: BYTES as written by text mode files (platform line endings and preferred encoding)
+    """
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    return content.encode(locale.getpreferredencoding(False))
+
+
 def file_names_in_dir(directory):
     # returns file names only (without directory)
     return [name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))]
@@ -221,6 +328,18 @@ def get_credits():
     return credits_str
 
 
+def get_file_hash(file_name, chunk_size=1048576):
+    """
+    :param file_name: STR of full path of a file
+    :return: BYTES of sha1 digest of the file content (read in chunks)
+    """
+    hasher = hashlib.sha1()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
 def get_newest_file(directory, exclude=None):
     """
     Finds the newest file name, excluding those that contain an "exclude" expression
@@ -291,6 +410,30 @@ def interpolate_linear(x1, x2, y1, y2, xi):
     return y1 + ((xi - x1) / (x2 - x1) * (y2 - y1))
 
 
+def iter_nested_read_from_file(filename, sep="::"):
+    """
+    Reads a nested dictionary file (see dict_nested_write2file) one top key at a time, so that memory does not grow
+    with the file size - the lines of a top key must be consecutive (as written by dict_nested_write2file)
+    :param filename: STR
+    :param sep: STR (optional)
+    :return: generator of TUPLEs (INT of top key, DICT of {sub key: STR of value}) - the none element 0 is skipped
+    """
+    top_key = None
+    sub_dict = {}
+    with open(filename, "r") as f:
+        for line in f:
+            values = line.strip("\n").split(sep)
+            key = int(values[0])
+            if key != top_key:
+                if sub_dict and (top_key != 0):
+                    yield top_key, sub_dict
+                top_key = key
+                sub_dict = {}
+            sub_dict[values[1]] = values[2]
+    if sub_dict and (top_key != 0):
+        yield top_key, sub_dict
+
+
 def list_file_type_in_dir(directory, f_ending):
     """
     :param directory: full directory ending on "/" or "\\"
@@ -299,6 +442,11 @@ def list_file_type_in_dir(directory, f_ending):
     return glob.glob(directory + "*" + f_ending)
 
 
+def new_write_stats():
+    """:return: DICT of write statistics (bytes and files written or skipped because the content did not change)"""
+    return {"written": 0, "skipped": 0, "files written": 0, "files skipped": 0}
+
+
 def open_folder(directory):
     try:
         import subprocess
@@ -354,6 +502,26 @@ def read_file_content(file_path):
     return list_of_lines
 
 
+def replace_file_if_changed(tmp_name, file_name, stats=None):
+    """
+    Replaces file_name with the (completely written) file tmp_name unless both have the same content hash - then
+    tmp_name is removed and file_name keeps its modification time
+    :param tmp_name: STR of full path of the new file (in the directory of file_name)
+    :param file_name: STR of full path of the target file
+    :param stats: DICT (optional) of write statistics (see new_write_stats)
+    :return: BOOL (True if file_name was replaced)
+    """
+    size = os.path.getsize(tmp_name)
+    if chk_same_content(file_name, size, get_file_hash(tmp_name)):
+        rm_file(tmp_name)
+        count_write(stats, "skipped", size)
+        return False
+    copy_file_mode(tmp_name, file_name)
+    os.replace(tmp_name, file_name)
+    count_write(stats, "written", size)
+    return True
+
+
 def rm_dir(directory):
     """
     Deletes everything reachable from the directory named in 'directory', and the directory itself
@@ -410,6 +578,56 @@ def tuple2num(arg):
     return new
 
 
+def write_file_atomic(file_name, content, mode="w"):
+    """
+    Writes content to a temporary file in the target directory that then replaces file_name (never half-written)
+    :param file_name: STR of full path of the target file
+    :param content: STR (or BYTES if mode="wb")
+    :param mode: STR (optional) - "w" or "wb"
+    """
+    target_dir = os.path.dirname(os.path.abspath(file_name))
+    chk_dir(target_dir)
+    f_handle, tmp_name = tempfile.mkstemp(prefix="." + os.path.basename(file_name) + ".", suffix=".tmp", dir=target_dir)
+    try:
+        with os.fdopen(f_handle, mode) as f_tmp:
+            f_tmp.write(content)
+        copy_file_mode(tmp_name, file_name)
+        os.replace(tmp_name, file_name)
+    except:
+        rm_file(tmp_name)
+        raise
+
+
+def write_file_if_changed(file_name, content, stats=None):
+    """
+    Writes content to file_name unless the existing file has the same content hash (unchanged files keep their
+    modification time) - hardlinks are replaced by a new file
+    :param file_name: STR of full path of the target file
+    :param content: STR of text (written with the line endings and encoding of text mode files)
+    :param stats: DICT (optional) of write statistics (see new_write_stats)
+    :return: BOOL (True if the file was written)
+    """
+    data = encode_text(content)
+    if chk_same_content(file_name, data.__len__(), hashlib.sha1(data).digest()):
+        count_write(stats, "skipped", data.__len__())
+        return False
+    try:
+        if os.stat(file_name).st_nlink > 1:
+            os.remove(file_name)  # hardlinked (provisioned) files are shared with other model trees
+    except OSError:
+        pass
+    with open(file_name, "wb") as f:
+        f.write(data)
+    count_write(stats, "written", data.__len__())
+    return True
+
+
+def write_stats2str(stats):
+    """:return: STR of bytes written vs. skipped (unchanged files) of write statistics (see new_write_stats)"""
+    return "Bytes written: {0:,} ({1} files) - bytes skipped (unchanged): {2:,} ({3} files)".format(
+        stats["written"], stats["files written"], stats["skipped"], stats["files skipped"])
+
+
 def write_data2file(folder_dir, file_name, data):
     if not os.path.exists(folder_dir):
         os.mkdir(folder_dir)
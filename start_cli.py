@@ -0,0 +1,440 @@
+"""
+Headless command line interface of Hy2Opt (no tkinter or osgeo imports unless a command requires geodata)
+Usage:  python -m hy2opt <command> [options]   (or: python start_cli.py <command> [options])
+        coordinator [--host HOST] [--port PORT] [--token TOKEN] [--exit-when-done] [--rerun]
+                    [--local-workers N [--tf-dir DIR | --fake]]
+        list-models [--where "Cell Size<=2" ...] [--refresh]
+        enqueue MODEL [MODEL ...] [--events E [E ...]] [--max-attempts N]
+        export MODEL [MODEL ...] [--force] [--no-validate] [--archive [DIR]] [--archive-format tar.gz|tar|zip]
+        queue-status [--failed]
+        resume [--tf-dir DIR | --fake] [--workers N] [--timeout SECONDS] [--monitor] [--rerun] [--retry-failed]
+               [--max-mass-error PERCENT] [--min-dt SECONDS] [--min-dt-ratio R] [--patience N] [--no-supervision]
+        run MODEL [--tf-dir DIR | --fake] [--events E [E ...]] [--workers N] [--timeout SECONDS] [--monitor]
+            [--max-mass-error PERCENT] [--min-dt SECONDS] [--min-dt-ratio R] [--patience N] [--no-supervision]
+        store-assets MODEL [MODEL ...]
+        sweep BASE --set "stab:Cell Size=1;2;4" [--set ...] [--samples N] [--seed S] [--trees] [--export]
+              [--overwrite] [--archive [DIR]] [--archive-format tar.gz|tar|zip] [--queue]
+        validate MODEL [MODEL ...] [--all-errors]
+        worker HOST:PORT [--tf-dir DIR | --fake] [--workers N] [--timeout SECONDS] [--monitor] [--work-dir DIR]
+               [--token TOKEN] [--stay] [--max-mass-error PERCENT] [--min-dt SECONDS] [--min-dt-ratio R]
+               [--patience N] [--no-supervision]
+"""
+import os, sys, re, argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "pypool"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "tuflow"))
+
+
+class ProgressTable:
+    def __init__(self, enabled=True, interval=1.0, limits=None):
+        """
+        Renders the progress of running simulations (cMonitor.LogMonitor) as a live table while the with-block runs
+        (redrawn in place on terminals, printed on changes otherwise) - disabled tables do nothing
+        Runs that exceed limits are stopped whether or not the table is enabled
+        Usage: with ProgressTable() as table: model.run_model(solver, callback=table.callback)
+        """
+        self.enabled = enabled
+        self.interval = interval
+        self.limits = limits
+        self.monitor = None
+        self.done = None
+        self.thread = None
+
+    @property
+    def callback(self):
+        return self.monitor.notify if self.monitor else None
+
+    def render(self):
+        tty = sys.stdout.isatty()
+        while not self.done.wait(self.interval):
+            if self.monitor.get_events() or tty:
+                print(("\x1b[H\x1b[J" if tty else "") + self.monitor.get_table() + "\n", flush=True)
+
+    def __enter__(self):
+        if self.enabled or self.limits:
+            import cMonitor
+            self.monitor = cMonitor.LogMonitor(limits=self.limits)
+            self.monitor.start()
+        if self.enabled:
+            import threading
+            self.done = threading.Event()
+            self.thread = threading.Thread(target=self.render, daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.enabled:
+            self.done.set()
+            self.thread.join()
+        if self.monitor:
+            self.monitor.stop()
+        if self.enabled:
+            print(self.monitor.get_table())
+
+
+def get_tf_dir():
+    try:
+        import config_core as cfg
+        import fGlobal as fGl
+        return str(fGl.read_file_content(cfg.dir2tf + 'settings/tf_dir.def')[0].strip("\n"))
+    except IndexError:
+        return ""
+
+
+def parse_condition(condition_str):
+    """
+    Converts a STR like "stab:Cell Size<=2" or "Viscosity Formulation=SMAGORINSKY" into a catalog query condition
+    :return: TUPLE of (par, operator, value) or (par_group, par, operator, value)
+    """
+    match = re.match(r"^\s*(?:(\w+):)?(.+?)\s*(<=|>=|!=|==|=|<|>)\s*(.+?)\s*$", condition_str)
+    if not match:
+        raise argparse.ArgumentTypeError("Invalid condition: {0}".format(condition_str))
+    par_group, par, op, val = match.groups()
+    if par_group:
+        return par_group, par, op, val
+    return par, op, val
+
+
+def parse_grid_item(item_str):
+    """
+    Converts a STR like "stab:Cell Size=1;2;4" into a grid entry
+    :return: TUPLE of ((par_group, par), LIST of values)
+    """
+    try:
+        key, values = item_str.split("=", 1)
+        par_group, par = key.split(":", 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid --set definition (use par_group:par=val1;val2): " + item_str)
+    return (par_group.strip(), par.strip()), [v.strip() for v in values.split(";") if v.strip()]
+
+
+def cmd_list_models(args):
+    if args.where:
+        import cCatalog
+        catalog = cCatalog.ModelCatalog()
+        catalog.refresh(force=args.refresh)
+        models = catalog.query(*args.where)
+    else:
+        import fGlobal as fGl
+        models = fGl.get_tf_models()
+    print(*models, sep="\n")
+    return 0
+
+
+def cmd_coordinator(args):
+    import cCluster
+    import cQueue
+    coordinator = cCluster.ClusterCoordinator(host=args.host, port=args.port, token=args.token,
+                                              exit_when_done=args.exit_when_done, skip_existing=not args.rerun)
+    workers = []
+    counts = coordinator.queue.get_counts()  # running jobs of stopped workers are recovered by serve_forever
+    if args.local_workers and not (counts.get(cQueue.STATE_PENDING) or counts.get(cQueue.STATE_RUNNING)):
+        print("No queued runs - local workers are not started.")
+    elif args.local_workers:
+        solver_args = ["--fake"] if args.fake else (["--tf-dir", args.tf_dir] if args.tf_dir else [])
+        workers = cCluster.start_local_workers(coordinator.address, args.local_workers, solver_args, args.token)
+        coordinator.stop_with_processes(workers)
+    try:
+        counts = coordinator.serve_forever()
+    finally:
+        for process in workers:
+            process.wait()
+    print("Run queue: " + (", ".join("{0} {1}".format(n, state) for state, n in sorted(counts.items())) or "empty"))
+    return 1 if counts.get(cQueue.STATE_FAILED) or counts.get(cQueue.STATE_PENDING) else 0
+
+
+def cmd_export(args):
+    if not args.no_validate and not validate_models(args.models):
+        return 1
+    return export_models(args.models, args, validate=not args.no_validate, force=args.force)
+
+
+def cmd_enqueue(args):
+    import cQueue
+    import cTFmodel
+    queue = cQueue.RunQueue()
+    failed = 0
+    for model_name in args.models:
+        added = queue.enqueue_model(cTFmodel.Hy2OptModel(model_name), events=args.events,
+                                    max_attempts=args.max_attempts)
+        if added is None:
+            print("ERROR: {0} is not exported (run: export {0}).".format(model_name))
+            failed += 1
+        else:
+            print("{0}: {1} new run(s) queued".format(model_name, added))
+    return 1 if failed else 0
+
+
+def cmd_queue_status(args):
+    import cQueue
+    queue = cQueue.RunQueue()
+    counts = queue.get_counts()
+    for state in (cQueue.STATE_PENDING, cQueue.STATE_RUNNING, cQueue.STATE_DONE, cQueue.STATE_FAILED):
+        print("{0:>10}: {1}".format(state, counts.get(state, 0)))
+    if args.failed:
+        for job in queue.get_jobs(state=cQueue.STATE_FAILED):
+            print("  {0}_{1} [{2} attempt(s)]: {3}".format(job["model"], job["event"], job["attempts"], job["message"]))
+    return 0
+
+
+def cmd_resume(args):
+    import cQueue
+    queue = cQueue.RunQueue()
+    recovered = queue.recover()
+    if recovered:
+        print("Recovered {0} run(s) of stopped workers.".format(recovered))
+    if args.retry_failed:
+        print("Re-queued {0} failed run(s).".format(queue.retry_failed()))
+    with ProgressTable(args.monitor, limits=get_run_limits(args)) as table:
+        counts = cQueue.run_queue(queue, get_solver(args), max_workers=args.workers, timeout=args.timeout,
+                                  skip_existing=not args.rerun, callback=table.callback)
+    print("Run queue: " + (", ".join("{0} {1}".format(n, state) for state, n in sorted(counts.items())) or "empty"))
+    return 1 if counts.get(cQueue.STATE_FAILED) or counts.get(cQueue.STATE_PENDING) else 0
+
+
+def cmd_run(args):
+    import cRuns
+    import cTFmodel
+    model = cTFmodel.Hy2OptModel(args.model)
+    with ProgressTable(args.monitor, limits=get_run_limits(args)) as table:
+        jobs = model.run_model(get_solver(args), events=args.events, max_workers=args.workers, timeout=args.timeout,
+                               callback=table.callback)
+    return 0 if jobs and all(job.status == cRuns.STATUS_FINISHED for job in jobs) else 1
+
+
+def cmd_store_assets(args):
+    import cAssets
+    import cTFmodel
+    store = cAssets.get_store()
+    for model_name in args.models:
+        model = cTFmodel.Hy2OptModel(model_name)
+        model.load_model()
+        changed = store.register_model(model)
+        print("{0}: {1} input file(s) stored".format(model_name, changed.__len__()))
+        for par, stored_path in changed.items():
+            print("  {0} == {1}".format(par, stored_path))
+    return 0
+
+
+def cmd_sweep(args):
+    import config_core as cfg
+    import cTFmodel
+    if not os.path.isfile(cfg.dir2tf + "models/" + args.base + ".hy2model"):
+        print("ERROR: Base model {0} does not exist.".format(args.base))
+        return 1
+    grid = {}
+    for key, values in args.set:
+        grid[key] = [cTFmodel.Hy2OptModel.decode_model_par(v) for v in values]
+    try:
+        names = cTFmodel.Hy2OptModel.materialize_variants(args.base, grid, samples=args.samples, seed=args.seed,
+                                                          name_pattern=args.name_pattern, make_trees=args.trees,
+                                                          workers=args.workers, overwrite=args.overwrite)
+    except FileExistsError as ex:
+        print("ERROR: " + str(ex))
+        return 1
+    print("Created {0} variants of {1}{2}.".format(names.__len__(), args.base,
+                                                   " ({0} to {1})".format(names[0], names[-1]) if names else ""))
+    if args.export:
+        if not validate_models(names, workers=args.workers):
+            return 1
+        if export_models(names, args):
+            return 1
+        if args.queue:
+            import cQueue
+            queue = cQueue.RunQueue()
+            added = sum(queue.enqueue_model(cTFmodel.Hy2OptModel(name)) or 0 for name in names)
+            print("Queued {0} run(s) (start them with: resume).".format(added))
+    return 0
+
+
+def cmd_validate(args):
+    return 0 if validate_models(args.models, fail_fast=not args.all_errors, verbose=True) else 1
+
+
+def validate_models(model_names, workers=8, fail_fast=True, verbose=False):
+    """
+    Validates a batch of models before anything is written (stops at the first invalid model if fail_fast)
+    :return: BOOL (True if all models are valid)
+    """
+    import cValidation
+    results = cValidation.get_validator().validate_batch(model_names, workers=workers, fail_fast=fail_fast)
+    valid = True
+    for model_name, issues in results.items():
+        errors = cValidation.get_errors(issues)
+        if errors or verbose:
+            print("{0}: {1}".format(model_name, "{0} error(s)".format(errors.__len__()) if errors else "OK"))
+            for issue in issues:
+                print("  " + issue)
+        valid = valid and not errors
+    if not valid:
+        print("ERROR: Validation failed - no Tuflow files were written ({0} of {1} models checked).".format(
+            results.__len__(), model_names.__len__()))
+    return valid
+
+
+def export_models(model_names, args, validate=True, force=False):
+    """
+    Writes the Tuflow files of models to their user_models trees or (with --archive) to one archive per model
+    :return: INT of exit code
+    """
+    import cTFmodel
+    failed = 0
+    for model_name in model_names:
+        model = cTFmodel.Hy2OptModel(model_name)
+        if args.archive:
+            archive_file = os.path.join(args.archive, "{0}.{1}".format(model_name, args.archive_format))
+            failed += model.export_archive(archive_file, validate=validate) is None
+        else:
+            failed += model.export_as_tf(force=force, validate=validate) is False
+    return 1 if failed else 0
+
+
+def cmd_worker(args):
+    import cCluster
+    import cRuns
+    with ProgressTable(args.monitor, limits=get_run_limits(args)) as table:
+        worker = cCluster.ClusterWorker(args.address, get_solver(args), slots=args.workers, work_dir=args.work_dir,
+                                        token=args.token, timeout=args.timeout, stay=args.stay, callback=table.callback)
+        runs = worker.run()
+    print("Worker {0}: {1} run(s)".format(worker.name, runs.__len__()))
+    return 0 if not worker.error and all(job.status == cRuns.STATUS_FINISHED for job in runs) else 1
+
+
+def get_run_limits(args):
+    """:return: cMonitor.RunLimits of the thresholds of diverging runs (None if --no-supervision)"""
+    if args.no_supervision:
+        return None
+    import cMonitor
+    kwargs = {"max_mass_error": args.max_mass_error, "min_dt": args.min_dt, "min_dt_ratio": args.min_dt_ratio,
+              "patience": args.patience}
+    return cMonitor.RunLimits(**{key: val for key, val in kwargs.items() if val is not None})
+
+
+def get_solver(args):
+    """:return: STR of the solver of run commands (--fake, --tf-dir, or tuflow/settings/tf_dir.def)"""
+    import config_core as cfg
+    if args.fake:
+        return cfg.tf_fake_solver
+    return args.tf_dir if args.tf_dir else get_tf_dir()
+
+
+def add_solver_arguments(parser):
+    parser.add_argument("--tf-dir", default=None,
+                        help="Tuflow installation directory or executable (default: tuflow/settings/tf_dir.def)")
+    parser.add_argument("--fake", action="store_true", help="use the bundled fake solver (tuflow/fake_tuflow.py)")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent runs (default: number of CPU cores)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds after which a run is terminated")
+    parser.add_argument("--monitor", action="store_true", help="show a live table of the progress of all runs")
+    parser.add_argument("--max-mass-error", type=float, default=None,
+                        help="stop runs whose absolute mass error exceeds this value in %% (default: 5)")
+    parser.add_argument("--min-dt", type=float, default=None, help="stop runs whose timestep falls below this value")
+    parser.add_argument("--min-dt-ratio", type=float, default=None,
+                        help="stop runs whose timestep falls below this share of their largest timestep (default: 0.01)")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="consecutive progress lines beyond a threshold before a run is stopped (default: 3)")
+    parser.add_argument("--no-supervision", action="store_true", help="do not stop diverging runs")
+
+
+def add_archive_arguments(parser):
+    import config_core as cfg
+    parser.add_argument("--archive", nargs="?", const=cfg.tf_archive_dir, default=None, metavar="DIR",
+                        help="write one archive per model to DIR instead of user_models trees (default: tuflow/archives)")
+    parser.add_argument("--archive-format", default="tar.gz", choices=["tar.gz", "tar", "zip"])
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="hy2opt", description="Hy2Opt headless model tools")
+    commands = parser.add_subparsers(dest="command")
+
+    p_coord = commands.add_parser("coordinator", help="hand out the queued runs to workers on other machines")
+    p_coord.add_argument("--host", default="127.0.0.1", help="interface to listen on (0.0.0.0: all interfaces)")
+    p_coord.add_argument("--port", type=int, default=8765)
+    p_coord.add_argument("--token", default="", help="shared secret that workers must send")
+    p_coord.add_argument("--exit-when-done", action="store_true", help="stop when no run is pending or running")
+    p_coord.add_argument("--rerun", action="store_true", help="run events whose results already exist")
+    p_coord.add_argument("--local-workers", type=int, default=0, help="start N worker processes on this machine")
+    p_coord.add_argument("--tf-dir", default=None, help="Tuflow installation directory of local workers")
+    p_coord.add_argument("--fake", action="store_true", help="local workers use the bundled fake solver")
+    p_coord.set_defaults(func=cmd_coordinator)
+
+    p_list = commands.add_parser("list-models", help="list models (optionally filtered through the model catalog)")
+    p_list.add_argument("--where", action="append", type=parse_condition,
+                        help="condition such as \"Cell Size<=2\" or \"stab:Viscosity Formulation=SMAGORINSKY\"")
+    p_list.add_argument("--refresh", action="store_true",
+                        help="check all model files (default: only if the models folder changed)")
+    p_list.set_defaults(func=cmd_list_models)
+
+    p_enqueue = commands.add_parser("enqueue", help="add the event runs of exported models to the run queue")
+    p_enqueue.add_argument("models", nargs="+")
+    p_enqueue.add_argument("--events", nargs="+", default=None, help="events to queue (default: all exported events)")
+    p_enqueue.add_argument("--max-attempts", type=int, default=None, help="runs of a failing event (default: 3)")
+    p_enqueue.set_defaults(func=cmd_enqueue)
+
+    p_export = commands.add_parser("export", help="write Tuflow model files")
+    p_export.add_argument("models", nargs="+")
+    p_export.add_argument("--force", action="store_true", help="re-write files that are up to date")
+    p_export.add_argument("--no-validate", action="store_true", help="skip the validation of all models")
+    add_archive_arguments(p_export)
+    p_export.set_defaults(func=cmd_export)
+
+    p_run = commands.add_parser("run", help="run the events of an exported Tuflow model in parallel")
+    p_run.add_argument("model")
+    p_run.add_argument("--events", nargs="+", default=None, help="events to run (default: all exported events)")
+    add_solver_arguments(p_run)
+    p_run.set_defaults(func=cmd_run)
+
+    p_queue = commands.add_parser("queue-status", help="show the number of queued runs per state")
+    p_queue.add_argument("--failed", action="store_true", help="list failed runs and their errors")
+    p_queue.set_defaults(func=cmd_queue_status)
+
+    p_resume = commands.add_parser("resume", help="run the queued runs (continues interrupted sweeps)")
+    p_resume.add_argument("--rerun", action="store_true", help="run events whose results already exist")
+    p_resume.add_argument("--retry-failed", action="store_true", help="re-queue runs that failed all attempts")
+    add_solver_arguments(p_resume)
+    p_resume.set_defaults(func=cmd_resume)
+
+    p_assets = commands.add_parser("store-assets", help="move the input files of models to the shared asset store")
+    p_assets.add_argument("models", nargs="+")
+    p_assets.set_defaults(func=cmd_store_assets)
+
+    p_sweep = commands.add_parser("sweep", help="create model variants from a parameter grid")
+    p_sweep.add_argument("base", help="name of the base model")
+    p_sweep.add_argument("--set", action="append", type=parse_grid_item, required=True,
+                         help="par_group:par=val1;val2;... (repeat for a Cartesian grid)")
+    p_sweep.add_argument("--samples", type=int, default=None, help="number of random grid draws")
+    p_sweep.add_argument("--seed", type=int, default=None)
+    p_sweep.add_argument("--name-pattern", default="{base}_v{i:05d}")
+    p_sweep.add_argument("--workers", type=int, default=8)
+    p_sweep.add_argument("--trees", action="store_true", help="create user_models/<name> folder trees")
+    p_sweep.add_argument("--overwrite", action="store_true",
+                         help="number variants from 0 and overwrite existing models (default: continue numbering)")
+    p_sweep.add_argument("--export", action="store_true", help="write Tuflow model files of all variants")
+    p_sweep.add_argument("--queue", action="store_true", help="queue the runs of all variants (with --export)")
+    add_archive_arguments(p_sweep)
+    p_sweep.set_defaults(func=cmd_sweep)
+
+    p_validate = commands.add_parser("validate", help="check parameters, files and events before an export")
+    p_validate.add_argument("models", nargs="+")
+    p_validate.add_argument("--all-errors", action="store_true", help="check all models (do not stop at the first)")
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_worker = commands.add_parser("worker", help="run the queued runs of a coordinator on this machine")
+    p_worker.add_argument("address", help="HOST:PORT of the coordinator")
+    p_worker.add_argument("--work-dir", default=None, help="folder of unpacked models (default: temporary folder)")
+    p_worker.add_argument("--token", default="", help="shared secret of the coordinator")
+    p_worker.add_argument("--stay", action="store_true", help="keep polling when the coordinator has no runs")
+    add_solver_arguments(p_worker)
+    p_worker.set_defaults(func=cmd_worker)
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return 1
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
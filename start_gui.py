@@ -1,11 +1,17 @@
 try:
-    import sys, os
-    sys.path.append(os.path.dirname(__file__) + "\\pypool\\")
+    import sys, os, time
+    startup_times = [("start", time.perf_counter())]  # LIST of (phase, perf_counter) reported by --profile-startup
+    import argparse, importlib, subprocess
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "pypool"))
     from config import *
+    startup_times.append(("import config", time.perf_counter()))
     set_directories()
+    startup_times.append(("set_directories", time.perf_counter()))
 except:
     print("ERROR: Could not import pypool.")
 
+STARTUP_BUDGET = 2.0  # seconds of cold start (interpreter launch until the main window is drawn)
+
 try:
     import ctypes  # may be required to eget_model_parnable showing the code_icon in taskbar
     myappid = 'mycompany.myproduct.subproduct.version'  # arbitrary string
@@ -48,30 +54,38 @@ class ParentGUI(tk.Frame):
         self.tabs = dict(zip(self.tab_names, self.tab_list))
         self.title = "Hy2Opt"
 
-        # sub tabs initialized, with parents being associated top-level tabs
-        self.sub_tab_list = [[tuflow.tf_gui.TuflowTab(self.tabs['Tuflow']),
-                              tuflow.tf_gui.TuflowTab(self.tabs['Tuflow'])],
-                             [other.ot_gui.OtherTab(self.tabs['Other']),
-                              other.ot_gui.OtherTab(self.tabs['Other'])]]
-
+        # sub-tab modules are imported and their tabs built on first selection of the parent tab (see build_sub_tabs)
+        self.sub_tab_classes = dict(zip(self.sub_tab_parents, [("tuflow", "tf_gui", "TuflowTab"),
+                                                               ("other", "ot_gui", "OtherTab")]))
         self.sub_tab_names = dict(zip(self.sub_tab_parents, self.sub_tab_names))
-        self.sub_tabs = dict(zip(self.sub_tab_parents, self.sub_tab_list))
+        self.sub_tabs = {}
 
         for tab_name in self.tab_names:
             tab = self.tabs[tab_name]
             tab.bind('<Visibility>', self.tab_select)
             self.tab_container.add(tab, text=tab_name)
             self.tab_container.pack(expand=1, fill="both")
-            # set sub-tabs
-            if tab_name in self.sub_tab_parents:
-                for i, sub_tab_name in enumerate(self.sub_tab_names[tab_name]):
-                    sub_tab = self.sub_tabs[tab_name][i]
-                    sub_tab.bind('<Visibility>', self.tab_select)
-                    tab.add(sub_tab, text=sub_tab_name)
+
+    def build_sub_tabs(self, tab_name):
+        """
+        Imports the module of a parent tab and adds its sub-tabs
+        :param tab_name: STR of parent tab name (in self.sub_tab_parents)
+        """
+        package, module, class_name = self.sub_tab_classes[tab_name]
+        tab_class = getattr(getattr(importlib.import_module(package), module), class_name)
+        parent = self.tabs[tab_name]
+        self.sub_tabs[tab_name] = []
+        for sub_tab_name in self.sub_tab_names[tab_name]:
+            sub_tab = tab_class(parent)
+            sub_tab.bind('<Visibility>', self.tab_select)
+            parent.add(sub_tab, text=sub_tab_name)
+            self.sub_tabs[tab_name].append(sub_tab)
 
     def tab_select(self, event):
         selected_tab_name = self.tab_container.tab(self.tab_container.select(), 'text')
         if selected_tab_name in self.sub_tab_parents:
+            if selected_tab_name not in self.sub_tabs:
+                self.build_sub_tabs(selected_tab_name)
             parent = self.tabs[selected_tab_name]
             # names of sub-tabs for this parent
             sub_tab_names = self.sub_tab_names[selected_tab_name]
@@ -89,5 +103,64 @@ class ParentGUI(tk.Frame):
         # selected_tab.complete_menus()
 
 
+def profile_startup(budget=STARTUP_BUDGET, top=15):
+    """
+    Re-launches start_gui.py with python -X importtime, draws the main window once and prints the startup phases and
+    the slowest imports
+    :param budget: FLOAT of maximum cold start time [s]
+    :param top: INT of number of listed imports
+    :return: INT (0 if the startup time is within budget, otherwise 1)
+    """
+    env = dict(os.environ, HY2OPT_PROFILE_STARTUP="1")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__)], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    total = time.perf_counter() - start
+
+    phases = []
+    for line in proc.stdout.splitlines():
+        if line.startswith("startup phase::"):
+            phases.append(line.split("::")[1:3])
+    imports = []
+    for line in proc.stderr.splitlines():
+        # format: "import time: self [us] | cumulative | imported package"
+        try:
+            self_us, cumulative_us, module = line.split("import time:")[1].split("|")
+            imports.append((int(cumulative_us), int(self_us), module.rstrip()))
+        except (IndexError, ValueError):
+            continue
+
+    print("Hy2Opt startup profile (budget: {0:.2f} s)".format(budget))
+    for phase, seconds in phases:
+        print("  {0:<34}{1:>10.3f} s".format(phase, float(seconds)))
+    print("  {0:<34}{1:>10.3f} s".format("total (interpreter launch to window)", total))
+    print("\nSlowest imports (cumulative / self):")
+    for cumulative_us, self_us, module in sorted(imports, reverse=True)[:top]:
+        print("  {0:<34}{1:>10.1f} ms{2:>10.1f} ms".format(module.strip(), cumulative_us / 1000., self_us / 1000.))
+    if total > budget:
+        print("\nWARNING: Startup time exceeds the budget of {0:.2f} s.".format(budget))
+        return 1
+    return 0
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Hy2Opt GUI")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print an import time breakdown of the GUI startup (exit code 1 if over budget)")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="startup time budget in seconds")
+    args = parser.parse_args()
+    if args.profile_startup:
+        sys.exit(profile_startup(args.budget))
+    if os.environ.get("HY2OPT_PROFILE_STARTUP"):
+        # child process of profile_startup: draw the main window once and report phase durations
+        try:
+            gui = ParentGUI()
+            gui.update()
+            startup_times.append(("main window", time.perf_counter()))
+            gui.master.destroy()
+        except tk.TclError as e:
+            print("WARNING: Could not draw main window ({0}).".format(str(e)))
+        for (_, t_before), (phase, t_after) in zip(startup_times[:-1], startup_times[1:]):
+            print("startup phase::{0}::{1:.6f}".format(phase, t_after - t_before))
+        sys.exit(0)
     ParentGUI().mainloop()
@@ -0,0 +1,136 @@
+try:
+    import os, hashlib, io, json, tarfile, tempfile, time, zipfile
+    from collections import OrderedDict
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, hashlib, io, json, tarfile, tempfile, time, zipfile).")
+try:
+    import fGlobal as fGl
+except:
+    print("ImportERROR: Cannot find Hy2Opt.pypool.fGlobal")
+
+chunk_size = 1048576  # bytes read at once from files that are added to archives
+spool_size = 8 * 1048576  # bytes of streamed members kept in memory before they spill to a temporary file
+
+
+class HashingReader:
+    def __init__(self, f):
+        """
+        File object wrapper that hashes everything read from f (tarfile reads members through it)
+        :param f: opened binary file object
+        """
+        self.f = f
+        self.hasher = hashlib.sha1()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.hasher.update(data)
+        self.size += data.__len__()
+        return data
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = HashingReader (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+class ModelArchive:
+    def __init__(self, archive_file, manifest_name="package_manifest.json"):
+        """
+        Writes members directly into a tar (.tar, .tar.gz, .tgz) or zip (.zip) archive with bounded memory and records
+        the sha1 and size of every member in a packaging manifest (added as last member)
+        The archive is written to a temporary file that only replaces archive_file if it is complete (see close)
+        :param archive_file: STR of full path of the archive (the ending defines the format)
+        :param manifest_name: STR of archive member name of the manifest
+        """
+        self.archive_file = archive_file
+        self.manifest_name = manifest_name
+        self.members = OrderedDict()  # {STR of member name: {"sha1": STR, "size": INT}}
+        self.is_zip = archive_file.lower().endswith(".zip")
+        fGl.chk_dir(os.path.dirname(os.path.abspath(archive_file)))
+        f_handle, self.tmp_name = tempfile.mkstemp(prefix="." + os.path.basename(archive_file) + ".", suffix=".tmp",
+                                                   dir=os.path.dirname(os.path.abspath(archive_file)))
+        os.close(f_handle)
+        if self.is_zip:
+            self.archive = zipfile.ZipFile(self.tmp_name, "w", zipfile.ZIP_DEFLATED, allowZip64=True)
+        elif archive_file.lower().endswith((".tar.gz", ".tgz")):
+            self.archive = tarfile.open(self.tmp_name, "w:gz")
+        else:
+            self.archive = tarfile.open(self.tmp_name, "w")
+
+    def add_bytes(self, arcname, data):
+        """Adds a member with the content data (BYTES)"""
+        self.add_stream(arcname, io.BytesIO(data), data.__len__())
+
+    def add_dir(self, arcname):
+        """Adds a folder member (arcname without trailing slash)"""
+        arcname = arcname.rstrip("/") + "/"
+        if self.is_zip:
+            self.archive.writestr(zipfile.ZipInfo(arcname, time.localtime()[0:6]), b"")
+        else:
+            info = tarfile.TarInfo(arcname.rstrip("/"))
+            info.type, info.mode, info.mtime = tarfile.DIRTYPE, 0o755, time.time()
+            self.archive.addfile(info)
+
+    def add_file(self, arcname, file_name):
+        """Adds the file file_name (read in chunks) as member arcname"""
+        with open(file_name, "rb") as f:
+            self.add_stream(arcname, f, os.fstat(f.fileno()).st_size, os.path.getmtime(file_name))
+
+    def add_stream(self, arcname, f, size, mtime=None):
+        """
+        Adds a member that is read from an opened binary file object
+        :param arcname: STR of member name
+        :param f: opened binary file object (positioned at the member start)
+        :param size: INT of number of bytes of the member
+        :param mtime: FLOAT (optional) of modification time (default: now)
+        """
+        mtime = time.time() if mtime is None else mtime
+        reader = HashingReader(f)
+        if self.is_zip:
+            info = zipfile.ZipInfo(arcname, time.localtime(mtime)[0:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with self.archive.open(info, "w", force_zip64=size > 2 ** 31) as member:
+                for chunk in iter(lambda: reader.read(chunk_size), b""):
+                    member.write(chunk)
+        else:
+            info = tarfile.TarInfo(arcname)
+            info.size, info.mode, info.mtime = size, 0o644, mtime
+            self.archive.addfile(info, reader)
+        self.members[arcname] = {"sha1": reader.hasher.hexdigest(), "size": reader.size}
+
+    def add_text(self, arcname, content):
+        """Adds a member with the text content (STR, encoded like text mode files)"""
+        self.add_bytes(arcname, fGl.encode_text(content))
+
+    def close(self):
+        """Adds the manifest, closes the archive and moves it to archive_file"""
+        manifest = json.dumps({"members": self.members}, indent=1)
+        self.add_bytes(self.manifest_name, manifest.encode())
+        self.archive.close()
+        fGl.copy_file_mode(self.tmp_name, self.archive_file)
+        os.replace(self.tmp_name, self.archive_file)
+
+    def discard(self):
+        """Closes and removes the incomplete archive"""
+        try:
+            self.archive.close()
+        finally:
+            fGl.rm_file(self.tmp_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ModelArchive (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+def new_spool():
+    """:return: binary file object that is kept in memory up to spool_size bytes (for streamed members)"""
+    return tempfile.SpooledTemporaryFile(max_size=spool_size, mode="w+b")
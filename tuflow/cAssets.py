@@ -0,0 +1,177 @@
+try:
+    import os, hashlib, json, shutil, stat, threading
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, hashlib, json, shutil, stat, threading).")
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+    import cTemplates
+    import cTrees
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+# files with the same name and these endings belong to one asset (e.g., a shapefile or an .flt raster)
+sidecar_endings = {".shp": (".shx", ".dbf", ".prj", ".cpg", ".sbn", ".sbx", ".qix", ".shp.xml"),
+                   ".flt": (".hdr", ".prj"),
+                   ".asc": (".prj",),
+                   ".tif": (".tfw", ".prj", ".tif.aux.xml")}
+
+
+class AssetStore:
+    def __init__(self, store_dir=None):
+        """
+        Content-addressed store of model input files (DEMs, shapefiles, materials files): identical inputs are
+        stored once in store_dir/<sha1[:2]>/<sha1>/ and all model variants refer to the stored file
+        Files are reflinked into the store if the file system can clone files, otherwise copied once - stored
+        files are read-only
+        :param store_dir: STR of full path of the store directory - must END WITH "/" (default: cfg.tf_asset_store)
+        """
+        self.store_dir = store_dir if store_dir else cfg.tf_asset_store
+        self.index_file = self.store_dir + "index.json"
+        self.lock = threading.Lock()
+        fGl.chk_dir(self.store_dir)
+        self.index = self.read_index()  # {STR of source file: [size, mtime_ns, STR of sha1]} (hashes of sources)
+        self.index_changed = False
+
+    def chk_stored(self, path):
+        """:return: BOOL (True if path is a file in the store)"""
+        return os.path.normcase(os.path.abspath(path)).startswith(os.path.normcase(os.path.abspath(self.store_dir)))
+
+    @staticmethod
+    def get_asset_files(path):
+        """
+        :param path: STR of full path of the main file of an asset (e.g., a .shp file)
+        :return: LIST of STR of full paths of the existing files of the asset (main file first)
+        """
+        stem, ending = os.path.splitext(path)
+        files = [path]
+        for sidecar in sidecar_endings.get(ending.lower(), ()):
+            if sidecar.startswith(ending.lower()):
+                candidates = [path + sidecar[ending.__len__():]]
+            else:
+                candidates = [stem + sidecar, stem + sidecar.upper()]
+            files += [f for f in candidates if os.path.isfile(f)][0:1]
+        return files
+
+    def get_digest(self, files):
+        """
+        :param files: LIST of STR of full paths of the files of an asset (see get_asset_files)
+        :return: STR of sha1 of the asset (file endings and contents) - file hashes are cached by size and mtime
+        """
+        hasher = hashlib.sha1()
+        for file_name in files:
+            f_stat = os.stat(file_name)
+            key = os.path.abspath(file_name)
+            with self.lock:
+                entry = self.index.get(key)
+            if not (entry and entry[0:2] == [f_stat.st_size, f_stat.st_mtime_ns]):
+                entry = [f_stat.st_size, f_stat.st_mtime_ns, fGl.get_file_hash(file_name).hex()]
+                with self.lock:
+                    self.index[key] = entry
+                    self.index_changed = True
+            hasher.update(os.path.splitext(file_name)[1].lower().encode() + entry[2].encode())
+        return hasher.hexdigest()
+
+    def get_stored_path(self, digest, path):
+        """:return: STR of full path of the stored main file of an asset"""
+        return self.store_dir + "{0}/{1}/{2}".format(digest[0:2], digest, os.path.basename(path))
+
+    def read_index(self):
+        try:
+            with open(self.index_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def register(self, path):
+        """
+        Adds a file (and its sidecar files, e.g., .shx, .dbf, .prj of a shapefile) to the store
+        :param path: STR of full path of a file
+        :return: STR of full path of the stored file ("" if path is empty or no file - e.g., a cancelled dialogue)
+        """
+        if not path or not os.path.isfile(str(path)):
+            return ""
+        path = os.path.abspath(str(path))
+        if self.chk_stored(path):
+            return path
+        files = self.get_asset_files(path)
+        digest = self.get_digest(files)
+        stored_path = self.get_stored_path(digest, path)
+        if os.path.isdir(os.path.dirname(stored_path)):
+            stored_files = os.listdir(os.path.dirname(stored_path))
+            self.write_index()
+            # an identical asset is already stored (possibly under another name)
+            main = [f for f in stored_files if f.lower().endswith(os.path.splitext(path)[1].lower())]
+            return os.path.join(os.path.dirname(stored_path), main[0]).replace(os.sep, "/") if main else stored_path
+        tmp_dir = stored_path.rsplit("/", 2)[0] + "/.{0}.tmp{1}/".format(digest, threading.get_ident())
+        fGl.chk_dir(tmp_dir)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for file_name in files:
+            tmp_file = tmp_dir + stem + file_name[os.path.splitext(path)[0].__len__():]
+            self.store_file(file_name, tmp_file)
+            os.chmod(tmp_file, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+        try:
+            os.rename(tmp_dir, os.path.dirname(stored_path))  # other processes see complete assets only
+        except OSError:
+            fGl.rm_dir(tmp_dir)  # stored concurrently
+        self.write_index()
+        return stored_path
+
+    def register_model(self, model):
+        """
+        Registers all file parameters (Read GIS ..., Read GRID ..., ... File) of a model and replaces them with the
+        stored files
+        :param model: Hy2OptModel
+        :return: DICT of {par: STR of stored file} of changed parameters
+        """
+        changed = {}
+        for par_group in ("gctrl", "gmat", "gbc", "po"):
+            for par, val in model.par_dict.get(par_group, {}).items():
+                if not (par.startswith(cTemplates.path_prefixes) or par.endswith(cTemplates.path_suffixes)):
+                    continue
+                stored_path = self.register(val)
+                if stored_path and stored_path != val:
+                    model.set_usr_parameters(par_group, par, [stored_path])
+                    changed[par] = stored_path
+        return changed
+
+    @staticmethod
+    def store_file(source_file, target_file):
+        """
+        Reflinks (copy on write) or copies source_file to target_file - stored files are never hardlinked because
+        in-place edits of the source file would change the stored content
+        """
+        try:
+            cTrees.reflink_file(source_file, target_file)
+        except OSError:
+            fGl.rm_file(target_file)
+            shutil.copy2(source_file, target_file)
+
+    def write_index(self):
+        """Writes the cached source file hashes (if new files were hashed)"""
+        with self.lock:
+            if not self.index_changed:
+                return
+            content = json.dumps(self.index, indent=1, sort_keys=True)
+            self.index_changed = False
+        try:
+            fGl.write_file_atomic(self.index_file, content)
+        except OSError:
+            print("WARNING: Could not write the asset index (%s)." % self.index_file)
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = AssetStore (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+stores = {}  # {STR of store directory: AssetStore}
+stores_lock = threading.Lock()
+
+
+def get_store(store_dir=None):
+    """:return: AssetStore of store_dir (created on the first call in a process)"""
+    store_dir = store_dir if store_dir else cfg.tf_asset_store
+    with stores_lock:
+        if store_dir not in stores:
+            stores[store_dir] = AssetStore(store_dir)
+        return stores[store_dir]
@@ -0,0 +1,209 @@
+try:
+    import os, sqlite3, sys, time
+    from contextlib import closing
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, sqlite3, sys, time).")
+if __name__ == '__main__':
+    # run as a script (python tuflow/cCatalog.py): pypool is not on the path yet
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pypool"))
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+
+class ModelCatalog:
+    # comparison operators that can be used in ModelCatalog.query conditions
+    operators = {"=": "=", "==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+    def __init__(self, db_file=None, model_dir=None):
+        """
+        Optional SQLite catalog that mirrors the parameters, signatures and event files of all .hy2model files
+        The text model files remain the master copy - the catalog can be rebuilt from them at any time
+        :param db_file: STR of full path to the catalog database (default: cfg.tf_catalog)
+        :param model_dir: STR of directory containing .hy2model files (default: dir2tf/models/)
+        """
+        self.db_file = db_file if db_file else cfg.tf_catalog
+        self.model_dir = model_dir if model_dir else cfg.dir2tf + "models/"
+        fGl.chk_dir(os.path.dirname(os.path.abspath(self.db_file)))
+        self.create()
+
+    def connect(self):
+        connection = sqlite3.connect(self.db_file)
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def create(self):
+        """Creates catalog tables and indices (if not yet existing)"""
+        with closing(self.connect()) as db, db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS models (
+                    name TEXT PRIMARY KEY, model_file TEXT, mtime_ns INTEGER, size INTEGER, event_file TEXT);
+                CREATE TABLE IF NOT EXISTS parameters (
+                    model TEXT REFERENCES models(name) ON DELETE CASCADE,
+                    par_group TEXT, par TEXT, val_str TEXT, val_num REAL,
+                    PRIMARY KEY (model, par_group, par));
+                CREATE TABLE IF NOT EXISTS signatures (
+                    model TEXT REFERENCES models(name) ON DELETE CASCADE, par_group TEXT,
+                    PRIMARY KEY (model, par_group));
+                CREATE INDEX IF NOT EXISTS idx_par_num ON parameters (par, val_num, model);
+                CREATE INDEX IF NOT EXISTS idx_par_str ON parameters (par, val_str, model);
+                CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, val INTEGER);
+                """)
+
+    def get_dir_stamp(self):
+        """
+        :return: INT of mtime_ns of self.model_dir (changes when model files are added, removed or atomically
+                 replaced) - None if the directory changed within the last seconds (same-tick changes could be missed)
+        """
+        try:
+            mtime_ns = os.stat(self.model_dir).st_mtime_ns
+        except OSError:
+            return None
+        return mtime_ns if time.time_ns() - mtime_ns > 2 * 10 ** 9 else None
+
+    def list_models(self):
+        """:return: LIST of catalogued model names"""
+        with closing(self.connect()) as db:
+            return [row[0] for row in db.execute("SELECT name FROM models ORDER BY name")]
+
+    def get_event_file(self, model_name):
+        with closing(self.connect()) as db:
+            row = db.execute("SELECT event_file FROM models WHERE name = ?", (model_name,)).fetchone()
+        return row[0] if row else None
+
+    def get_signatures(self, model_name):
+        """:return: LIST of par_groups that are signed in the model"""
+        with closing(self.connect()) as db:
+            return [row[0] for row in db.execute("SELECT par_group FROM signatures WHERE model = ?", (model_name,))]
+
+    @staticmethod
+    def model_name(model_file):
+        return os.path.basename(model_file).split(".hy2model")[0]
+
+    def query(self, *conditions):
+        """
+        Finds models matching all conditions, e.g.,
+            catalog.query(("Cell Size", "<=", 2), ("stab", "Viscosity Formulation", "=", "SMAGORINSKY"))
+        :param conditions: TUPLEs of (par, operator, value) or (par_group, par, operator, value)
+        :return: LIST of model names
+        """
+        sql = "SELECT name FROM models"
+        args = []
+        clauses = []
+        for condition in conditions:
+            if condition.__len__() == 4:
+                par_group, par, op, val = condition
+            else:
+                par_group = None
+                par, op, val = condition
+            try:
+                op = self.operators[str(op).strip()]
+            except KeyError:
+                raise ValueError("Unsupported operator in catalog query: {0}".format(str(op)))
+            try:
+                val = float(val)
+                column = "val_num"
+            except (TypeError, ValueError):
+                val = str(val)
+                column = "val_str"
+            clause = "name IN (SELECT model FROM parameters WHERE par = ? AND {0} {1} ?".format(column, op)
+            args += [par, val]
+            if par_group:
+                clause += " AND par_group = ?"
+                args.append(par_group)
+            clauses.append(clause + ")")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with closing(self.connect()) as db:
+            return [row[0] for row in db.execute(sql + " ORDER BY name", args)]
+
+    def rebuild(self):
+        """Drops all catalog entries and re-reads every .hy2model file in self.model_dir"""
+        with closing(self.connect()) as db, db:
+            db.execute("DELETE FROM models")
+        dir_stamp = self.get_dir_stamp()
+        for model_file in fGl.list_file_type_in_dir(self.model_dir, ".hy2model"):
+            self.sync_model(model_file)
+        self.set_dir_stamp(dir_stamp)
+
+    def refresh(self, force=False):
+        """
+        Synchronizes models whose files were added, changed or removed since they were catalogued - skipped if the
+        model directory did not change since the last refresh (model files are replaced atomically when saved;
+        use force=True after editing model files in place)
+        :param force: BOOL (optional) - if True, all model files are checked
+        """
+        dir_stamp = self.get_dir_stamp()
+        with closing(self.connect()) as db:
+            row = db.execute("SELECT val FROM state WHERE key = 'dir_stamp'").fetchone()
+            if (not force) and (dir_stamp is not None) and row and (row[0] == dir_stamp):
+                return
+            known = {row[0]: (row[1], row[2]) for row in db.execute("SELECT model_file, mtime_ns, size FROM models")}
+        present = fGl.list_file_type_in_dir(self.model_dir, ".hy2model")
+        for model_file in present:
+            f_stat = os.stat(model_file)
+            if known.get(model_file) != (f_stat.st_mtime_ns, f_stat.st_size):
+                self.sync_model(model_file)
+        for model_file in set(known.keys()).difference(present):
+            self.remove_model(self.model_name(model_file))
+        self.set_dir_stamp(dir_stamp)
+
+    def remove_model(self, model_name):
+        with closing(self.connect()) as db, db:
+            db.execute("DELETE FROM models WHERE name = ?", (model_name,))
+
+    def set_dir_stamp(self, dir_stamp):
+        """Stores the model directory stamp of the last complete refresh (None forces the next refresh)"""
+        with closing(self.connect()) as db, db:
+            db.execute("INSERT OR REPLACE INTO state VALUES ('dir_stamp', ?)", (dir_stamp,))
+
+    def sync_model(self, model_file):
+        """
+        (Re-)writes the catalog entries of one model from its .hy2model file
+        :param model_file: STR of full path to a .hy2model file
+        """
+        model_name = self.model_name(model_file)
+        if not os.path.isfile(model_file):
+            self.remove_model(model_name)
+            return
+        f_stat = os.stat(model_file)
+        model_pars = fGl.dict_model_read_from_file(model_file)
+        signatures = fGl.dict_model_signatures(model_file)
+        parameters = []
+        for (par_group, par), val in model_pars.items():
+            if par == "signature":
+                continue
+            try:
+                val_num = float(val)
+            except ValueError:
+                val_num = None
+            parameters.append((model_name, par_group, par, val, val_num))
+        event_file = model_pars.get(("bce", "Events"), model_name + ".events")
+        with closing(self.connect()) as db, db:
+            db.execute("DELETE FROM models WHERE name = ?", (model_name,))
+            db.execute("INSERT INTO models VALUES (?, ?, ?, ?, ?)",
+                       (model_name, model_file, f_stat.st_mtime_ns, f_stat.st_size, event_file))
+            db.executemany("INSERT INTO parameters VALUES (?, ?, ?, ?, ?)", parameters)
+            db.executemany("INSERT OR IGNORE INTO signatures VALUES (?, ?)", [(model_name, sg) for sg in signatures])
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ModelCatalog (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+def sync_if_enabled(model_file):
+    """Updates the catalog entry of model_file if the catalog is enabled (i.e., the catalog database exists)"""
+    if os.path.isfile(cfg.tf_catalog):
+        try:
+            ModelCatalog().sync_model(model_file)
+        except sqlite3.Error as e:
+            print("WARNING: Could not update model catalog ({0}).".format(str(e)))
+
+
+if __name__ == '__main__':
+    # (re-)build the catalog from the model files - this also enables the catalog
+    catalog = ModelCatalog()
+    catalog.rebuild()
+    print("Catalogued {0} models in {1}".format(catalog.list_models().__len__(), catalog.db_file))
@@ -0,0 +1,438 @@
+try:
+    import os, hashlib, hmac, json, shutil, socket, socketserver, subprocess, sys, tarfile, tempfile, threading, time
+    from concurrent.futures import ThreadPoolExecutor
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, hashlib, hmac, json, shutil, socket, socketserver,"
+          " subprocess, sys, tarfile, tempfile, threading, time).")
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+    import cArchive
+    import cQueue
+    import cRuns
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+chunk_size = 1048576  # bytes of payloads sent or received at once
+default_port = 8765
+heartbeat_interval = 10.0  # seconds between heartbeats of workers while a run is active
+poll_interval = 5.0  # maximum seconds a worker waits before it asks again for a job (no job due)
+
+
+class ClusterCoordinator:
+    def __init__(self, queue=None, host="127.0.0.1", port=default_port, token="", package_dir=None,
+                 exit_when_done=False, skip_existing=True):
+        """
+        Hands out the jobs of a RunQueue to workers that connect over TCP (see ClusterWorker): every job comes with
+        the packaged model (Hy2OptModel.export_archive, built once per export), and the worker streams the results
+        back into user_models/<name>/ (results/<name>/<name>_<event>/ and runs/Log/)
+        Jobs of workers that disconnect return to the queue
+        :param queue: cQueue.RunQueue (default: cQueue.RunQueue())
+        :param host: STR of the interface to listen on ("0.0.0.0" for all interfaces)
+        :param port: INT of TCP port (0: any free port, see address)
+        :param token: STR of shared secret that workers must send (empty: no check)
+        :param package_dir: STR of folder of cached model packages (default: cfg.tf_archive_dir + "cluster/")
+        :param exit_when_done: BOOL - if True, serve_forever returns when no job is pending or running
+        :param skip_existing: BOOL - if True, jobs whose outputs exist are not handed out (see cQueue.chk_outputs)
+        """
+        self.queue = queue if queue else cQueue.RunQueue()
+        self.token = str(token)
+        self.package_dir = package_dir if package_dir else cfg.tf_archive_dir + "cluster/"
+        self.exit_when_done = exit_when_done
+        self.skip_existing = skip_existing
+        self.lock = threading.Lock()
+        self.package_locks = {}  # {STR of model name: threading.Lock} - one export per model at a time
+        coordinator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                coordinator.handle_connection(self.request, self.client_address)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server((host, port), Handler)
+
+    @property
+    def address(self):
+        """:return: STR of host:port that workers connect to"""
+        host, port = self.server.server_address[0:2]
+        return "{0}:{1}".format("127.0.0.1" if host in ("0.0.0.0", "") else host, port)
+
+    def chk_done(self):
+        """Stops the server if exit_when_done and no job is pending or running"""
+        counts = self.queue.get_counts()
+        if self.exit_when_done and not (counts.get(cQueue.STATE_PENDING) or counts.get(cQueue.STATE_RUNNING)):
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def claim_job(self):
+        """
+        :return: TUPLE of (DICT of claimed job, STR of package file, STR of package hash) - (None, None, None) if no
+                 job is due
+        """
+        while True:
+            jobs = self.queue.claim(1)
+            if not jobs:
+                return None, None, None
+            model = cQueue.prepare_job(self.queue, jobs[0], self.skip_existing)
+            if not model:
+                continue  # outputs exist or inputs changed
+            package_file, package_hash = self.get_package(model)
+            if package_file:
+                return jobs[0], package_file, package_hash
+            self.queue.complete(jobs[0]["id"], False, "could not package the model", retry=False)
+
+    def get_package(self, model):
+        """
+        Packs the exported model once per export (the package name contains the hash of the export manifest)
+        :param model: Hy2OptModel
+        :return: TUPLE of (STR of full path of the package, STR of package hash) - (None, None) if packing failed
+        """
+        package_hash = hashlib.sha1(json.dumps(model.read_export_manifest(), sort_keys=True).encode()).hexdigest()
+        package_file = os.path.join(self.package_dir, "{0}_{1}.tar.gz".format(model.name, package_hash[0:16]))
+        with self.lock:
+            lock = self.package_locks.setdefault(model.name, threading.Lock())
+        with lock:
+            if not os.path.isfile(package_file):
+                if not model.export_archive(package_file, validate=False):
+                    return None, None
+        return package_file, package_hash
+
+    def handle_connection(self, sock, client_address):
+        """Serves one worker connection (called in a thread per connection)"""
+        rfile = sock.makefile("rb")
+        claimed = {}  # {INT of job id: DICT of job} handed out on this connection
+        worker = "{0}:{1}".format(*client_address[0:2])
+        try:
+            header, payload = recv_message(rfile)
+            if header.get("type") != "hello" or not hmac.compare_digest(str(header.get("token", "")), self.token):
+                send_message(sock, {"type": "error", "message": "invalid token"})
+                return
+            worker = str(header.get("worker", worker))
+            send_message(sock, {"type": "welcome"})
+            print("Worker connected: {0}".format(worker))
+            while True:
+                header, payload = recv_message(rfile)
+                if header is None:
+                    break
+                if header["type"] == "claim":
+                    self.send_job(sock, claimed, header.get("packages", []))
+                elif header["type"] == "heartbeat":
+                    self.queue.heartbeat([job_id for job_id in header.get("ids", []) if job_id in claimed])
+                elif header["type"] == "result":
+                    job = claimed.pop(header["id"], None)
+                    if job:
+                        self.receive_result(job, header, payload)
+                    if payload:
+                        payload.close()
+                    self.chk_done()
+        except (OSError, ValueError) as e:
+            print("WARNING: Connection to worker {0} lost ({1}).".format(worker, str(e)))
+        finally:
+            rfile.close()
+            sock.close()
+            for job_id in claimed.keys():
+                self.queue.release(job_id, "worker {0} disconnected".format(worker))
+            if claimed:
+                print("Returned {0} run(s) of worker {1} to the queue.".format(claimed.__len__(), worker))
+
+    def receive_result(self, job, header, payload):
+        """Unpacks the results of a run into user_models/<name>/ and records the outcome in the queue"""
+        import cTFmodel
+        model = cTFmodel.Hy2OptModel(job["model"])
+        if payload:
+            model_dir = cfg.dir2tf + "user_models/{0}/".format(job["model"])
+            allowed = ("results/{0}/{0}_{1}/".format(job["model"], job["event"]), "runs/Log/")
+            try:
+                extract_archive(payload, model_dir, allowed)
+            except (OSError, tarfile.TarError, ValueError) as e:
+                header = {"status": cRuns.STATUS_ERROR, "message": "invalid results ({0})".format(str(e))}
+        cQueue.record_run(self.queue, job, model, header.get("status"), header.get("message", ""),
+                          retry=header.get("retry", True))
+        message = header.get("message", "")
+        print("  {0}_{1}: {2}{3}".format(job["model"], job["event"], header.get("status"),
+                                         " ({0})".format(message) if message else ""))
+
+    def send_job(self, sock, claimed, packages):
+        """Sends the next due job (with the model package unless the worker has it) or tells the worker to wait"""
+        job, package_file, package_hash = self.claim_job()
+        if job:
+            claimed[job["id"]] = job
+            header = {"type": "job", "job": job, "package": package_hash}
+            if package_hash in packages:
+                send_message(sock, header)
+            else:
+                with open(package_file, "rb") as f:
+                    send_message(sock, header, f, os.path.getsize(package_file))
+            return
+        counts = self.queue.get_counts()
+        if not (counts.get(cQueue.STATE_PENDING) or counts.get(cQueue.STATE_RUNNING)):
+            send_message(sock, {"type": "finished"})
+            self.chk_done()
+            return
+        next_due = self.queue.get_next_due()
+        wait = poll_interval if next_due is None else min(max(next_due - time.time(), 0.5), poll_interval)
+        send_message(sock, {"type": "wait", "seconds": wait})
+
+    def serve_forever(self):
+        """Serves workers until shutdown (or until all jobs ended if exit_when_done)"""
+        print("Coordinator listening on {0} ({1} queued runs)".format(
+            self.address, self.queue.get_counts().get(cQueue.STATE_PENDING, 0)))
+        recovered = self.queue.recover()
+        if recovered:
+            print("Recovered {0} run(s) of stopped workers.".format(recovered))
+        self.chk_done()
+        try:
+            self.server.serve_forever(poll_interval=0.5)
+        finally:
+            self.server.server_close()
+        return self.queue.get_counts()
+
+    def stop_with_processes(self, processes):
+        """Stops the server when all processes (e.g., of start_local_workers) ended - returns immediately"""
+        def watch():
+            for process in processes:
+                process.wait()
+            self.server.shutdown()
+
+        threading.Thread(target=watch, daemon=True).start()
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ClusterCoordinator (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+class ClusterWorker:
+    def __init__(self, address, solver, slots=None, work_dir=None, token="", timeout=None, env=None, stay=False,
+                 callback=None):
+        """
+        Pulls jobs from a ClusterCoordinator, runs them with the local solver, and sends the results back
+        Every slot is one connection that runs one event at a time
+        :param address: STR of host:port of the coordinator
+        :param solver: STR of the Tuflow installation directory, a solver executable, or cfg.tf_fake_solver
+        :param slots: INT (optional) of number of concurrent runs (default: number of CPU cores)
+        :param work_dir: STR (optional) of folder of unpacked models (default: temporary folder)
+        :param token: STR of shared secret of the coordinator
+        :param timeout: FLOAT (optional) of seconds after which a run is terminated
+        :param env: DICT (optional) of environment variables of the solver processes
+        :param stay: BOOL - if True, the worker keeps polling when the coordinator has no more jobs
+        :param callback: function or LIST of functions (optional) called with every cRuns.RunJob when it starts and
+                         ends (e.g., cMonitor.LogMonitor.notify)
+        """
+        self.host, port = str(address).rsplit(":", 1)
+        self.port = int(port)
+        self.command = cRuns.get_solver_command(solver)
+        self.slots = slots if slots else (os.cpu_count() or 1)
+        self.work_dir = work_dir if work_dir else tempfile.mkdtemp(prefix="hy2opt_worker_")
+        self.token = str(token)
+        self.timeout = timeout
+        self.env = env
+        self.stay = stay
+        self.callback = callback
+        self.name = "{0}:{1}".format(socket.gethostname(), os.getpid())
+        self.orchestrator = cRuns.RunOrchestrator(max_workers=self.slots, timeout=timeout)
+        self.lock = threading.Lock()
+        self.packages = {}  # {STR of package hash: STR of unpacked package folder}
+        self.runs = []
+        self.error = ""  # STR of the reason why the coordinator refused the worker
+
+    def get_package_dir(self, job, package_hash, payload):
+        """:return: STR of the folder of the unpacked model package of a job (unpacked on the first job)"""
+        with self.lock:
+            if package_hash in self.packages:
+                return self.packages[package_hash]
+            if payload is None:
+                raise ValueError("missing model package {0}".format(package_hash))
+            package_dir = os.path.join(self.work_dir, "{0}_{1}".format(job["model"], package_hash[0:16])) + "/"
+            tmp_dir = package_dir.rstrip("/") + ".tmp/"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            extract_archive(payload, tmp_dir)
+            shutil.rmtree(package_dir, ignore_errors=True)
+            os.rename(tmp_dir, package_dir)
+            self.packages[package_hash] = package_dir
+            return package_dir
+
+    def pack_results(self, job, model_dir):
+        """:return: file object of a tar.gz archive with the results and log files of a run (relative to model_dir)"""
+        spool = cArchive.new_spool()
+        run_name = "{0}_{1}".format(job["model"], job["event"])
+        with tarfile.open(fileobj=spool, mode="w:gz") as archive:
+            result_dir = "results/{0}/{1}".format(job["model"], run_name)
+            if os.path.isdir(model_dir + result_dir):
+                archive.add(model_dir + result_dir, result_dir)
+            log_dir = model_dir + "runs/Log/"
+            for name in (os.listdir(log_dir) if os.path.isdir(log_dir) else []):
+                if name.startswith(run_name + "."):
+                    archive.add(log_dir + name, "runs/Log/" + name)
+        spool.seek(0)
+        return spool
+
+    def run(self):
+        """
+        Runs the slots until the coordinator has no more jobs (or forever if stay)
+        :return: LIST of cRuns.RunJob of all runs of this worker
+        """
+        if not self.command:
+            print("ERROR: Cannot find a Tuflow executable.")
+            return []
+        with ThreadPoolExecutor(max_workers=self.slots) as executor:
+            futures = [executor.submit(self.run_slot) for _ in range(self.slots)]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                self.orchestrator.cancel()
+                raise
+        return self.runs
+
+    def run_job(self, sock, job, package_dir):
+        """Runs one job (heartbeats are sent while the solver runs) and sends the result"""
+        model_dir = package_dir + job["model"] + "/"
+        tcf_file = model_dir + "runs/{0}.tcf".format(job["model"])
+        run_job = cRuns.RunJob("{0}_{1}".format(job["model"], job["event"]),
+                               self.command + ["-b", "-e1", str(job["event"]), tcf_file], model_dir + "runs/",
+                               model_dir + "runs/Log/{0}_{1}.stdout.log".format(job["model"], job["event"]),
+                               timeout=self.timeout, env=self.env,
+                               progress_files=[model_dir + "runs/Log/{0}_{1}*.tlf".format(job["model"], job["event"])])
+        with self.orchestrator.lock:
+            self.orchestrator.jobs.append(run_job)  # cancel() stops its process
+        runner = threading.Thread(target=self.orchestrator.run_job, args=(run_job, self.callback), daemon=True)
+        runner.start()
+        runner.join(heartbeat_interval)
+        while runner.is_alive():
+            send_message(sock, {"type": "heartbeat", "ids": [job["id"]]})
+            runner.join(heartbeat_interval)
+        with self.lock:
+            self.runs.append(run_job)
+        print("  {0}".format(str(run_job)))
+        header = {"type": "result", "id": job["id"], "status": run_job.status, "message": run_job.message,
+                  "retry": not run_job.stop_reason}
+        with self.pack_results(job, model_dir) as results:
+            results.seek(0, os.SEEK_END)
+            size = results.tell()
+            results.seek(0)
+            send_message(sock, header, results, size)
+
+    def run_slot(self):
+        """
+        One connection to the coordinator: claims and runs jobs one after another - a refused or closed connection
+        (the coordinator finished) ends the slot like a "finished" message
+        """
+        try:
+            with socket.create_connection((self.host, self.port)) as sock, sock.makefile("rb") as rfile:
+                send_message(sock, {"type": "hello", "worker": self.name, "token": self.token, "slots": self.slots})
+                header, payload = recv_message(rfile)
+                if not header or header.get("type") != "welcome":
+                    self.error = "ERROR: Coordinator refused the connection ({0}).".format(
+                        header.get("message") if header else "closed")
+                    print(self.error)
+                    return
+                while not self.orchestrator.cancelled.is_set():
+                    with self.lock:
+                        packages = list(self.packages.keys())
+                    send_message(sock, {"type": "claim", "packages": packages})
+                    header, payload = recv_message(rfile)
+                    if header is None:
+                        break
+                    if header["type"] == "job":
+                        try:
+                            package_dir = self.get_package_dir(header["job"], header["package"], payload)
+                        finally:
+                            if payload:
+                                payload.close()
+                        self.run_job(sock, header["job"], package_dir)
+                    elif header["type"] == "wait":
+                        time.sleep(float(header.get("seconds", poll_interval)))
+                    elif header["type"] == "finished" and self.stay:
+                        time.sleep(poll_interval)
+                    else:
+                        break
+        except ConnectionError as e:
+            # the coordinator stops listening and closes all connections when the queue is done (exit_when_done)
+            print("Coordinator {0}:{1} refused or closed the connection ({2}) - no more runs.".format(
+                self.host, self.port, e.__class__.__name__))
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ClusterWorker (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+def extract_archive(f, target_dir, allowed=None):
+    """
+    Extracts a tar archive into target_dir (members must stay inside target_dir)
+    :param f: binary file object of a tar or tar.gz archive
+    :param target_dir: STR of full path of the target folder - must END WITH "/"
+    :param allowed: TUPLE (optional) of STR of member prefixes that may be extracted (others raise ValueError)
+    """
+    fGl.chk_dir(target_dir)
+    root = os.path.abspath(target_dir)
+    with tarfile.open(fileobj=f, mode="r:*") as archive:
+        for member in archive.getmembers():
+            path = os.path.abspath(os.path.join(root, member.name))
+            if not (path == root or path.startswith(root + os.sep)) or not (member.isfile() or member.isdir()):
+                raise ValueError("invalid archive member {0}".format(member.name))
+            if allowed and member.isfile() and not member.name.startswith(allowed):
+                raise ValueError("unexpected archive member {0}".format(member.name))
+            if member.isdir():
+                fGl.chk_dir(path + os.sep)
+                continue
+            fGl.chk_dir(os.path.dirname(path) + os.sep)
+            source = archive.extractfile(member)
+            with open(path, "wb") as target:
+                shutil.copyfileobj(source, target, chunk_size)
+
+
+def recv_message(rfile):
+    """
+    Reads one message: a JSON header line, followed by header["size"] bytes of payload (if any)
+    :param rfile: binary file object of a socket (socket.makefile("rb"))
+    :return: TUPLE of (DICT of header, file object of payload or None) - (None, None) if the connection closed
+    """
+    line = rfile.readline()
+    if not line:
+        return None, None
+    header = json.loads(line.decode("utf-8"))
+    size = int(header.get("size", 0))
+    if not size:
+        return header, None
+    payload = cArchive.new_spool()
+    while size > 0:
+        chunk = rfile.read(min(chunk_size, size))
+        if not chunk:
+            raise OSError("connection closed during transfer")
+        payload.write(chunk)
+        size -= chunk.__len__()
+    payload.seek(0)
+    return header, payload
+
+
+def send_message(sock, header, payload=None, size=0):
+    """
+    Sends one message (see recv_message)
+    :param sock: socket
+    :param header: DICT (JSON-serializable)
+    :param payload: binary file object (optional) of which size bytes are sent after the header
+    :param size: INT of payload bytes
+    """
+    header = dict(header, size=size if payload else 0)
+    sock.sendall(json.dumps(header).encode("utf-8") + b"\n")
+    if payload:
+        for chunk in iter(lambda: payload.read(chunk_size), b""):
+            sock.sendall(chunk)
+
+
+def start_local_workers(address, n_workers, solver_args, token=""):
+    """
+    Starts worker processes on this machine (python start_cli.py worker ...) - for tests and single-machine runs
+    :param address: STR of host:port of the coordinator
+    :param n_workers: INT of number of worker processes (one run slot each)
+    :param solver_args: LIST of STR of solver arguments of the worker command (e.g., ["--fake"])
+    :param token: STR of shared secret of the coordinator
+    :return: LIST of subprocess.Popen
+    """
+    cli = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "start_cli.py"))
+    command = [sys.executable, cli, "worker", address, "--workers", "1"] + list(solver_args)
+    if token:
+        command += ["--token", token]
+    return [subprocess.Popen(command) for _ in range(n_workers)]
@@ -0,0 +1,83 @@
+try:
+    import os
+    from collections.abc import MutableMapping
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, collections).")
+
+
+class DefaultTable(MutableMapping):
+    __slots__ = ("_defaults", "_overlay")
+
+    def __init__(self, defaults):
+        """
+        Copy-on-write parameter table: reads fall through to a shared (class-level) table of default choices and only
+        overridden parameters are stored per instance
+        :param defaults: DICT of {par: TUPLE of choices} - shared by all instances and never modified
+        """
+        self._defaults = defaults
+        self._overlay = None  # DICT of overridden values (created on first write)
+
+    def get_default(self, par):
+        """:return: TUPLE of the (unmodified) default choices of par"""
+        return self._defaults[par]
+
+    def is_overridden(self, par):
+        """:return: BOOL (True if par was set, i.e., it is not the TUPLE of default choices)"""
+        return bool(self._overlay) and (par in self._overlay)
+
+    def override(self, par, value):
+        """
+        Replaces the first (applied) choice of par with value, keeping all other choices
+        :param par: STR of parameter name
+        :param value: new first choice
+        """
+        try:
+            choices = tuple(self._defaults[par][1:])
+        except KeyError:
+            choices = ()
+        self[par] = (value,) + choices
+
+    def overridden(self):
+        """:return: DICT of parameters that differ from the defaults"""
+        return dict(self._overlay) if self._overlay else {}
+
+    def reset(self, par=None):
+        """Drops overrides of par (of all parameters if None)"""
+        if par is None:
+            self._overlay = None
+        elif self._overlay:
+            self._overlay.pop(par, None)
+
+    def __getitem__(self, par):
+        if self._overlay and par in self._overlay:
+            return self._overlay[par]
+        return self._defaults[par]
+
+    def __setitem__(self, par, value):
+        if self._overlay is None:
+            self._overlay = {}
+        self._overlay[par] = value
+
+    def __delitem__(self, par):
+        if par in self._defaults:
+            raise KeyError("Cannot delete default parameter {0} (use DefaultTable.reset)".format(str(par)))
+        del self._overlay[par]
+
+    def __iter__(self):
+        for par in self._defaults:
+            yield par
+        if self._overlay:
+            for par in list(self._overlay):
+                if par not in self._defaults:
+                    yield par
+
+    def __len__(self):
+        extra = [par for par in self._overlay if par not in self._defaults] if self._overlay else []
+        return self._defaults.__len__() + extra.__len__()
+
+    def __repr__(self):
+        return "DefaultTable({0})".format(dict(self.items()))
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = DefaultTable (%s)" % os.path.dirname(__file__))
+        print(dir(self))
@@ -2,10 +2,22 @@ import os
 
 
 class ModelEvents:
+    # BAT file contents
+    # bat_opts = []
+    # bat_dict = {"Batchfiles": bat_opts}
+
+    bce_name_dict = {"bce": "BC Events",
+                     "bat": "Batchfile",
+                     "rst": "Restart Options (Optimization)"}
+
+    bce_bg_colors = {"bce": "light blue",
+                     "bat": "sky blue",
+                     "rst": "SeaGreen1"}
+
     def __init__(self):
         """
-        Variables contain LISTs of possible choices for Tuflow command parameters
-        dict DICTIONARIES have keys corresponding to exact names of Tuflow command parameters and values are LISTs of choices
+        Instance variables contain the (model-specific) boundary and event definitions
+        events DICTIONARY has event numbers as keys and DICTs of {boundary name: value} as values
         """
 
         self.bce_rst_dict = {}
@@ -17,18 +29,6 @@ class ModelEvents:
         self.events = {self.event_0: {'No sa defined': 'No bc defined'}}
         # self.event_desc = {"Flow1": "Steady XXX CMS discharge"}
 
-        # BAT file contents
-        # self.bat_opts = []
-        # self.bat_dict = {"Batchfiles": self.bat_opts}
-
-        self.bce_name_dict = {"bce": "BC Events",
-                              "bat": "Batchfile",
-                              "rst": "Restart Options (Optimization)"}
-
-        self.bce_bg_colors = {"bce": "light blue",
-                              "bat": "sky blue",
-                              "rst": "SeaGreen1"}
-
     def __call__(self, *args, **kwargs):
         print("Class Info: <type> = ModelEvents (%s)" % os.path.dirname(__file__))
         print(dir(self))
@@ -1,77 +1,88 @@
 import os
+from cDefaults import DefaultTable
 
 
 class ModelGeoControl:
-    def __init__(self):
-        """
-        Variables contain LISTs of possible choices for Tuflow command parameters
-        dict DICTIONARIES have keys corresponding to exact names of Tuflow command parameters and values are LISTs of choices
-        """
+    """
+    Class variables contain TUPLEs of possible choices for Tuflow command parameters
+    *_defaults DICTIONARIES have keys corresponding to exact names of Tuflow command parameters and values are TUPLEs
+    of choices - they are shared by all instances and wrapped in (per-instance) copy-on-write DefaultTables
+    """
+
+    # Geodata used with model restart
+    iwl_grid = ("gis_raster",)  # gis_layer must have .flt or .asc format
+    geo_rst_defaults = {"Read Grid IWL": iwl_grid}
 
-        # Geodata used with model restart
-        self.iwl_grid = ["gis_raster"]  # gis_layer must have .flt or .asc format
-        self.geo_rst_dict = {"Read Grid IWL": self.iwl_grid}
+    # TGC file contents
+    projection = ("",)
+    shp2d_loc = ("",)
+    grid_sz = ((0, 0),)
+    set_z = (3000,)
+    grid_z = ("",)
+    set_code = (0,)
+    shp2d_code = ("",)
+    geo_tgc_defaults = {"SHP projection": projection,
+                        "Read GIS Location": shp2d_loc,
+                        "Grid Size (X,Y)": grid_sz,
+                        "Set Zpts": set_z,
+                        "Read GRID Zpts": grid_z,
+                        "Set Code": set_code,
+                        "Read GIS Code": shp2d_code}
 
-        # TGC file contents
-        self.projection = [""]
-        self.shp2d_loc = [""]
-        self.grid_sz = [(0, 0)]
-        self.set_z = [3000]
-        self.grid_z = [""]
-        self.set_code = [0]
-        self.shp2d_code = [""]
-        self.geo_tgc_dict = {"SHP projection": self.projection,
-                             "Read GIS Location": self.shp2d_loc,
-                             "Grid Size (X,Y)": self.grid_sz,
-                             "Set Zpts": self.set_z,
-                             "Read GRID Zpts": self.grid_z,
-                             "Set Code": self.set_code,
-                             "Read GIS Code": self.shp2d_code}
+    # MATERIALS as written to TGC
+    set_mat = (1,)
+    csv_mat = (None,)
+    shp2d_mat = ("",)
+    geo_mat_defaults = {"Set Mat": set_mat,
+                        "Read Materials File": csv_mat,
+                        "Read GIS Mat": shp2d_mat}
 
-        # MATERIALS as written to TGC
-        self.set_mat = [1]
-        self.csv_mat = [None]
-        self.shp2d_mat = [""]
-        self.geo_mat_dict = {"Set Mat": self.set_mat,
-                             "Read Materials File": self.csv_mat,
-                             "Read GIS Mat": self.shp2d_mat}
+    # TBC file contents
+    shp2d_bc = ("",)
+    shp2d_sa = ("",)
+    geo_tbc_defaults = {"Read GIS BC": shp2d_bc,
+                        "Read GIS SA": shp2d_sa}
 
-        # TBC file contents
-        self.shp2d_bc = [""]
-        self.shp2d_sa = [""]
-        self.geo_tbc_dict = {"Read GIS BC": self.shp2d_bc,
-                             "Read GIS SA": self.shp2d_sa}
+    # TCF file contents (PO)
+    po_pts = ("",)
+    po_lns = ("",)
+    geo_po_defaults = {"Read GIS PO (pts)": po_pts,
+                       "Read GIS PO (lns)": po_lns}
 
-        # TCF file contents (PO)
-        self.po_pts = [""]
-        self.po_lns = [""]
-        self.geo_po_dict = {"Read GIS PO (pts)": self.po_pts,
-                            "Read GIS PO (lns)": self.po_lns}
+    geo_format_desc = {"SHP projection": ".prj file",
+                       "Read GIS Location": "2d_loc_MODEL_L.shp",
+                       "Grid Size (X,Y)": "X, Y (m or ft)",
+                       "Set Zpts": "above max Z (m or ft)",
+                       "Read GRID Zpts": "DEM raster (.asc or .flt)",
+                       "Set Code": "Int (0=False, 1=True)",
+                       "Read GIS Code": "2d_code_MODEL_R.shp",
+                       "Set Mat": "Int (default material ID)",
+                       "Read GIS Mat": "2d_mat_MODEL_R.shp (optional)",
+                       "Read Materials File": ".csv file",
+                       "Read GIS BC": "2d_bc_MODEL_HT_L.shp",
+                       "Read GIS SA": "2d_sa_MODEL_QT_R.shp",
+                       "Read GIS PO (pts)": "2d_po_MODEL_P.shp",
+                       "Read GIS PO (lns)": "2d_po_MODEL_L.shp"}
+    geo_name_dict = {"gctrl": "Geometry Controls",
+                     "gmat": "Materials",
+                     "gbc": "Geometry Boundaries",
+                     "po": "Monitoring Locations",
+                     "rst": "Restart Options (Optimization)"}
+    geo_bg_colors = {"gctrl": "light blue",
+                     "gmat": "sky blue",
+                     "gbc": "steel blue",
+                     "po": "light steel blue",
+                     "rst": "SeaGreen1"}
 
-        self.geo_format_desc = {"SHP projection": ".prj file",
-                                "Read GIS Location": "2d_loc_MODEL_L.shp",
-                                "Grid Size (X,Y)": "X, Y (m or ft)",
-                                "Set Zpts": "above max Z (m or ft)",
-                                "Read GRID Zpts": "DEM raster (.asc or .flt)",
-                                "Set Code": "Int (0=False, 1=True)",
-                                "Read GIS Code": "2d_code_MODEL_R.shp",
-                                "Set Mat": "Int (default material ID)",
-                                "Read GIS Mat": "2d_mat_MODEL_R.shp (optional)",
-                                "Read Materials File": ".csv file",
-                                "Read GIS BC": "2d_bc_MODEL_HT_L.shp",
-                                "Read GIS SA": "2d_sa_MODEL_QT_R.shp",
-                                "Read GIS PO (pts)": "2d_po_MODEL_P.shp",
-                                "Read GIS PO (lns)": "2d_po_MODEL_L.shp"}
-        self.geo_name_dict = {"gctrl": "Geometry Controls",
-                              "gmat": "Materials",
-                              "gbc": "Geometry Boundaries",
-                              "po": "Monitoring Locations",
-                              "rst": "Restart Options (Optimization)"}
-        self.geo_bg_colors = {"gctrl": "light blue",
-                              "gmat": "sky blue",
-                              "gbc": "steel blue",
-                              "po": "light steel blue",
-                              "rst": "SeaGreen1"}
+    def __init__(self):
+        """
+        dict DICTIONARIES are DefaultTables that only store values that differ from the (shared) *_defaults
+        """
+        self.geo_rst_dict = DefaultTable(self.geo_rst_defaults)
+        self.geo_tgc_dict = DefaultTable(self.geo_tgc_defaults)
+        self.geo_mat_dict = DefaultTable(self.geo_mat_defaults)
+        self.geo_tbc_dict = DefaultTable(self.geo_tbc_defaults)
+        self.geo_po_dict = DefaultTable(self.geo_po_defaults)
 
     def __call__(self, *args, **kwargs):
         print("Class Info: <type> = ModelGeoControl (%s)" % os.path.dirname(__file__))
@@ -0,0 +1,191 @@
+try:
+    import os, functools
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, functools).")
+np = None  # numpy is imported on the first use (see import_numpy) - models without time series do not need it
+
+# event boundary values with these prefixes define time series instead of constant values, e.g.,
+#   csv:hydrographs/flood.csv|Q_inflow   (column Q_inflow of a CSV file with the time [h] in the first column)
+#   hydrograph:peak=120,t_peak=6,duration=48,base=5   (generated, gamma-shaped hydrograph or stage series)
+series_prefixes = ("csv:", "hydrograph:")
+
+
+class EventSeries:
+    def __init__(self, time, values, columns):
+        """
+        Boundary time series of one event resampled onto a common time axis
+        :param time: numpy.array of times [h] (starting at 0)
+        :param values: numpy.array of shape (time steps, columns)
+        :param columns: LIST of STR of boundary names (column order of values)
+        """
+        self.time = time
+        self.values = values
+        self.columns = list(columns)
+
+    @classmethod
+    def from_event(cls, e_defs, columns, base_dir="", time_step=None):
+        """
+        Loads or generates the time series of all boundaries of an event and resamples them (linear interpolation)
+        onto a common time axis - constant boundaries are repeated
+        :param e_defs: DICT of {boundary name: STR of value or time series definition}
+        :param columns: LIST of boundary names
+        :param base_dir: STR of directory of relative CSV paths
+        :param time_step: FLOAT (optional) - time step [h] of the common axis (default: finest step of all series)
+        :return: EventSeries
+        """
+        import_numpy()
+        series = {}
+        for col in columns:
+            if is_series(e_defs[col]):
+                series[col] = read_series(e_defs[col], base_dir)
+        if not series:
+            raise ValueError("No time series defined.")
+        if time_step is None:
+            time_step = min(float(np.min(np.diff(t))) for t, v in series.values())
+        end_time = max(float(t[-1]) for t, v in series.values())
+        time = np.linspace(0., end_time, int(round(end_time / time_step)) + 1)
+        values = np.empty((time.size, columns.__len__()))
+        for i, col in enumerate(columns):
+            if col in series:
+                values[:, i] = np.interp(time, *series[col])
+            else:
+                values[:, i] = float(e_defs[col])
+        return cls(time, values, columns)
+
+    def get_end_time(self):
+        """:return: FLOAT of the last time [h]"""
+        return float(self.time[-1])
+
+    def get_initial_values(self, columns):
+        """:return: numpy.array of the values of columns at time 0"""
+        return self.values[0, [self.columns.index(col) for col in columns]]
+
+    def get_onset_time(self, columns, threshold=0.01):
+        """
+        Time when the sum of columns (e.g., all inflows) first rises by more than threshold of its range above its
+        initial value - used as Start Map Output (nothing happens before the hydrograph onset)
+        :param columns: LIST of boundary names
+        :param threshold: FLOAT of fraction of the range of the summed series
+        :return: FLOAT of time [h]
+        """
+        if not columns:
+            return 0.
+        import_numpy()
+        total = self.values[:, [self.columns.index(col) for col in columns]].sum(axis=1)
+        rise = total - total[0]
+        if rise.max() <= 0.:
+            return 0.
+        return float(self.time[np.argmax(rise > threshold * (total.max() - total.min()))])
+
+    def write_csv(self, f, time_col="Time"):
+        """
+        Writes the series in Tuflow bc_data format (vectorized formatting of all rows)
+        :param f: opened (text) file object
+        :param time_col: STR of time column header
+        """
+        import_numpy()
+        np.savetxt(f, np.column_stack((self.time, self.values)), fmt="%.6g", delimiter=",",
+                   header=",".join([time_col] + self.columns), comments="")
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = EventSeries (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+def generate_hydrograph(peak, t_peak, duration=None, base=0., shape=3.7, dt=None):
+    """
+    Gamma-shaped hydrograph  q(t) = base + (peak - base) * (t / t_peak) ** shape * exp(shape * (1 - t / t_peak))
+    :param peak: FLOAT of peak value (discharge or stage)
+    :param t_peak: FLOAT of time to peak [h]
+    :param duration: FLOAT (optional) - series length [h] (default: 4 * t_peak)
+    :param base: FLOAT (optional) - base value (initial discharge or stage)
+    :param shape: FLOAT (optional) - shape factor (larger is peakier)
+    :param dt: FLOAT (optional) - time step [h] (default: t_peak / 20)
+    :return: TUPLE of numpy.arrays (time, values)
+    """
+    import_numpy()
+    duration = 4. * t_peak if duration is None else duration
+    dt = t_peak / 20. if dt is None else dt
+    time = np.linspace(0., duration, int(round(duration / dt)) + 1)
+    ratio = time / t_peak
+    return time, base + (peak - base) * ratio ** shape * np.exp(shape * (1. - ratio))
+
+
+def get_csv_source(definition, base_dir=""):
+    """
+    :param definition: STR of "csv:path[|column]"
+    :return: TUPLE of (STR of full path, STR of column name or None for the second column)
+    """
+    path, column = (definition[4:].split("|", 1) + [None])[0:2]
+    return os.path.join(base_dir, path.strip()), column.strip() if column else None
+
+
+def get_source_stamps(e_defs, base_dir=""):
+    """
+    :return: LIST of (STR of CSV file, INT of mtime_ns, INT of size) of the CSV files used by an event (changed
+             files change the export hash of the event)
+    """
+    stamps = []
+    for val in e_defs.values():
+        if isinstance(val, str) and val.startswith("csv:"):
+            csv_file = get_csv_source(val, base_dir)[0]
+            try:
+                f_stat = os.stat(csv_file)
+                stamps.append((csv_file, f_stat.st_mtime_ns, f_stat.st_size))
+            except OSError:
+                stamps.append((csv_file, None, None))
+    return stamps
+
+
+def import_numpy():
+    """Imports numpy on the first call (keeps numpy out of the startup of the CLI and of Hy2OptModel)"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            print("ImportERROR: Missing package: numpy (required for boundary time series).")
+            raise
+        np = numpy
+    return np
+
+
+def is_series(val):
+    """:return: BOOL (True if val is a time series definition)"""
+    return isinstance(val, str) and val.startswith(series_prefixes)
+
+
+@functools.lru_cache(maxsize=64)
+def load_csv(csv_file, stamp):
+    """
+    Reads a CSV file with a header line (cached until the file changes)
+    :param csv_file: STR of full path
+    :param stamp: TUPLE of (mtime_ns, size) - part of the cache key
+    :return: TUPLE of (LIST of STR of column names, numpy.array of data)
+    """
+    import_numpy()
+    with open(csv_file, "r") as f:
+        header = [col.strip() for col in f.readline().split(",")]
+        data = np.loadtxt(f, delimiter=",", ndmin=2)
+    data.setflags(write=False)  # shared by all events that use the file
+    return header, data
+
+
+def read_series(definition, base_dir=""):
+    """
+    Loads (csv:) or generates (hydrograph:) a boundary time series
+    :param definition: STR of time series definition (see series_prefixes)
+    :param base_dir: STR of directory of relative CSV paths
+    :return: TUPLE of numpy.arrays (time, values)
+    """
+    if definition.startswith("hydrograph:"):
+        kwargs = {}
+        for item in definition[11:].split(","):
+            key, val = item.split("=")
+            kwargs[key.strip()] = float(val)
+        return generate_hydrograph(**kwargs)
+    csv_file, column = get_csv_source(definition, base_dir)
+    f_stat = os.stat(csv_file)
+    header, data = load_csv(csv_file, (f_stat.st_mtime_ns, f_stat.st_size))
+    i_col = header.index(column) if column else 1
+    return data[:, 0], data[:, i_col]
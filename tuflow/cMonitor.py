@@ -0,0 +1,350 @@
+try:
+    import os, asyncio, glob, math, queue, re, threading, time
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, asyncio, glob, math, queue, re, threading, time).")
+try:
+    import cRuns
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+# progress lines of Tuflow log files (.tlf, .hpc.tlf) and console output (values: first group)
+end_time_pattern = re.compile(r"^\s*End Time\s*==\s*([-+]?\d+(?:\.\d*)?)", re.IGNORECASE)
+time_pattern = re.compile(r"(?:^|\s)(?:Time|t)\s*[:=]?\s*(\d+:\d{2}:\d{2}(?:\.\d+)?|[-+]?\d+\.\d*)\s*(?:h\b)?")
+dt_pattern = re.compile(r"\bdt\s*[:=]?\s*([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)", re.IGNORECASE)
+mass_error_pattern = re.compile(r"(?:Mass Error|CME|\bME)\s*[:=]?\s*([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s*%",
+                                re.IGNORECASE)
+end_pattern = re.compile(r"Simulation (FINISHED|INTERRUPTED)", re.IGNORECASE)
+error_pattern = re.compile(r"^\s*ERROR\b.*", re.IGNORECASE)
+
+max_line_length = 65536  # bytes of an unterminated line that are kept until the rest of the line is written
+
+
+class RunLimits:
+    def __init__(self, max_mass_error=5.0, min_dt=None, min_dt_ratio=0.01, patience=3):
+        """
+        Thresholds of diverging or unstable runs - LogMonitor stops runs that exceed a threshold on patience
+        consecutive progress lines (single spikes are tolerated)
+        :param max_mass_error: FLOAT (optional) of the largest absolute mass error [%]
+        :param min_dt: FLOAT (optional) of the smallest timestep [s]
+        :param min_dt_ratio: FLOAT (optional) of the smallest ratio of the timestep to the largest timestep of the run
+                             (adaptive timesteps that collapse, e.g., 0.01: dt fell to 1 % of its largest value)
+        :param patience: INT of consecutive progress lines that must exceed a threshold
+        """
+        self.max_mass_error = max_mass_error
+        self.min_dt = min_dt
+        self.min_dt_ratio = min_dt_ratio
+        self.patience = max(int(patience), 1)
+
+    def check(self, progress):
+        """
+        Checks the last progress line of a run (called by RunProgress.parse_line)
+        :param progress: RunProgress
+        :return: STR of the reason to stop the run (empty if the run is within the limits)
+        """
+        reason = ""
+        if self.max_mass_error is not None and progress.mass_error is not None \
+                and abs(progress.mass_error) > self.max_mass_error:
+            reason = "mass error {0:g} % exceeds {1:g} %".format(progress.mass_error, self.max_mass_error)
+        elif self.min_dt is not None and progress.dt is not None and progress.dt < self.min_dt:
+            reason = "timestep {0:g} s is below {1:g} s".format(progress.dt, self.min_dt)
+        elif self.min_dt_ratio is not None and progress.dt is not None and progress.max_dt \
+                and progress.dt < self.min_dt_ratio * progress.max_dt:
+            reason = "timestep {0:g} s fell below {1:g} of {2:g} s".format(progress.dt, self.min_dt_ratio,
+                                                                             progress.max_dt)
+        progress.violations = progress.violations + 1 if reason else 0
+        if progress.violations < self.patience:
+            return ""
+        return "diverged at {0:g} h: {1}".format(progress.sim_time, reason) if progress.sim_time is not None \
+            else "diverged: " + reason
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = RunLimits (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+class RunProgress:
+    def __init__(self, name, files=None, limits=None, job=None, since=None):
+        """
+        Progress of one solver run as parsed from its log files
+        :param name: STR of run name (e.g., model_event)
+        :param files: LIST of STR of files or glob patterns of the log files of the run
+        :param limits: RunLimits (optional) - runs that exceed the limits get a stop_reason
+        :param job: cRuns.RunJob (optional) of the run (LogMonitor stops the job if the run exceeds the limits)
+        :param since: FLOAT (optional) of the start time of the run (epoch seconds) - files that were last modified
+                      before are ignored (log files of an earlier run with the same name)
+        """
+        self.name = name
+        self.files = list(files) if files else []
+        self.limits = limits
+        self.job = job
+        self.stop_reason = ""
+        self.violations = 0  # INT of consecutive progress lines that exceeded the limits
+        self.status = cRuns.STATUS_RUNNING
+        self.message = ""
+        self.sim_time = None  # FLOAT of simulation time [h]
+        self.end_time = None  # FLOAT of End Time [h] (if the log echoes the .tcf commands)
+        self.dt = None  # FLOAT of the last timestep [s]
+        self.max_dt = None  # FLOAT of the largest timestep [s] of the run
+        self.min_dt = None  # FLOAT of the smallest timestep [s] of the run
+        self.mass_error = None  # FLOAT of the last mass error [%]
+        self.max_mass_error = None  # FLOAT of the largest absolute mass error [%] of the run
+        self.updated = time.time()
+        self.ended = False
+        self.since = math.floor(since) if since else None  # whole seconds (coarse file system timestamps)
+        self.offsets = {}  # {STR of file: INT of bytes read}
+        self.partial = {}  # {STR of file: BYTES of an unterminated last line}
+
+    @property
+    def percent(self):
+        """:return: FLOAT of simulated share of End Time [%] (None if unknown)"""
+        if self.sim_time is None or not self.end_time:
+            return None
+        return min(max(100. * self.sim_time / self.end_time, 0.), 100.)
+
+    def as_dict(self):
+        """:return: DICT of the progress (a copy that can be passed between threads)"""
+        return {"name": self.name, "status": self.status, "message": self.message, "time": self.sim_time,
+                "end_time": self.end_time, "percent": self.percent, "dt": self.dt, "min_dt": self.min_dt,
+                "mass_error": self.mass_error, "max_mass_error": self.max_mass_error, "updated": self.updated}
+
+    def parse_line(self, line):
+        """
+        Reads the simulation time, timestep, and mass error of a log line
+        :param line: STR
+        :return: BOOL - True if the line changed the progress
+        """
+        match = end_time_pattern.match(line)
+        if match:
+            self.end_time = float(match.group(1))
+            return True
+        match = end_pattern.search(line)
+        if match:
+            if match.group(1).upper() != "FINISHED" and not self.message:
+                self.message = "interrupted"
+            return True
+        if error_pattern.match(line):
+            self.message = line.strip()
+            return True
+        changed = False
+        match = time_pattern.search(line)
+        if match:
+            self.sim_time = read_hours(match.group(1))
+            changed = True
+        match = dt_pattern.search(line)
+        if match:
+            self.dt = float(match.group(1))
+            self.min_dt = self.dt if self.min_dt is None else min(self.min_dt, self.dt)
+            self.max_dt = self.dt if self.max_dt is None else max(self.max_dt, self.dt)
+            changed = True
+        match = mass_error_pattern.search(line)
+        if match:
+            self.mass_error = float(match.group(1))
+            self.max_mass_error = abs(self.mass_error) if self.max_mass_error is None else max(
+                self.max_mass_error, abs(self.mass_error))
+            changed = True
+        if changed and self.limits and not self.stop_reason:
+            self.stop_reason = self.limits.check(self)
+        return changed
+
+    def read_files(self):
+        """
+        Reads the lines that were appended to the log files since the last call (files that are re-written start over,
+        files that were not modified since the start of the run are skipped)
+        :return: BOOL - True if new lines changed the progress
+        """
+        changed = False
+        for file_name in get_file_names(self.files):
+            try:
+                if self.since and file_name not in self.offsets and os.path.getmtime(file_name) < self.since:
+                    continue  # not (yet) written by this run
+                size = os.path.getsize(file_name)
+                offset = self.offsets.get(file_name, 0)
+                if size < offset:
+                    offset = 0  # truncated (e.g., a new attempt of the run)
+                    self.partial[file_name] = b""
+                if size == offset:
+                    continue
+                with open(file_name, "rb") as f:
+                    f.seek(offset)
+                    data = self.partial.get(file_name, b"") + f.read(size - offset)
+            except OSError:
+                continue
+            self.offsets[file_name] = size
+            lines = data.split(b"\n")
+            self.partial[file_name] = lines.pop()[-max_line_length:]
+            for line in lines:
+                changed = self.parse_line(line.decode("utf-8", errors="replace")) or changed
+        if changed:
+            self.updated = time.time()
+        return changed
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = RunProgress (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+class LogMonitor:
+    def __init__(self, interval=0.5, limits=None):
+        """
+        Tails the log files of running simulations on an asyncio event loop in a background thread, and publishes
+        progress events (DICT, see RunProgress.as_dict) to a thread-safe queue - the Tk GUI drains the events with
+        after() polling and the CLI renders them as a table (see get_events and get_table)
+        Runs that exceed the limits are stopped and recorded as failed with the reason (see cRuns.RunJob.stop)
+        Usage: monitor = LogMonitor(); monitor.start(); model.run_model(solver, callback=monitor.notify)
+        :param interval: FLOAT of seconds between reads of the log files
+        :param limits: RunLimits (optional) of diverging runs (default: no supervision)
+        """
+        self.interval = interval
+        self.limits = limits
+        self.runs = {}  # {STR of run name: RunProgress}
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+
+    def finish(self, name, status, message=""):
+        """Marks a run as ended - its log files are read once more and a final event is published"""
+        with self.lock:
+            progress = self.runs.get(name)
+        if progress is None:
+            progress = self.watch(name)
+        progress.status = status
+        if message:
+            progress.message = message
+        progress.ended = True
+        if not self.loop:
+            progress.read_files()
+            self.publish(progress)
+
+    def get_events(self):
+        """:return: LIST of DICT of all progress events since the last call (does not block)"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def get_progress(self):
+        """:return: LIST of DICT of the current progress of all runs (in start order)"""
+        with self.lock:
+            runs = list(self.runs.values())
+        return [progress.as_dict() for progress in runs]
+
+    def get_table(self):
+        """:return: STR of a table of the progress of all runs"""
+        return format_table(self.get_progress())
+
+    def notify(self, job):
+        """Callback of cRuns.RunOrchestrator: watches the log files of started runs and ends the watch of ended runs"""
+        if job.status == cRuns.STATUS_RUNNING:
+            self.watch(job.name, [job.log_file] + list(job.progress_files), job)
+        elif job.status != cRuns.STATUS_PENDING:
+            self.finish(job.name, job.status, job.message)
+
+    def publish(self, progress):
+        self.events.put(progress.as_dict())
+
+    def start(self):
+        """Starts the event loop thread (returns immediately)"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Cancels the tail tasks, reads the log files of all runs once more and stops the event loop thread"""
+        if not self.loop:
+            return
+        loop, self.loop = self.loop, None
+        asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result()
+        with self.lock:
+            runs = list(self.runs.values())
+        for progress in runs:
+            progress.ended = True
+            progress.read_files()
+            self.publish(progress)
+        loop.call_soon_threadsafe(loop.stop)
+        self.thread.join()
+        loop.close()
+
+    async def tail(self, progress):
+        """Reads the log files of a run every interval seconds until the run ended"""
+        while True:
+            ended = progress.ended  # read once more after the end (the last lines may be new)
+            if progress.read_files() or ended:
+                self.publish(progress)
+            if progress.stop_reason and progress.job and not (ended or progress.job.stop_reason):
+                print("WARNING: Stopping {0} ({1}).".format(progress.name, progress.stop_reason))
+                # RunJob.stop waits for the process to end: run it on the default executor
+                await asyncio.get_event_loop().run_in_executor(None, progress.job.stop, progress.stop_reason)
+            if ended:
+                return
+            await asyncio.sleep(self.interval)
+
+    def watch(self, name, files=None, job=None):
+        """
+        Starts tailing the log files of a run (a run that is watched again, e.g., a retry, starts over)
+        :param name: STR of run name
+        :param files: LIST of STR of files or glob patterns of the log files
+        :param job: cRuns.RunJob (optional) that is stopped if the run exceeds the limits
+        :return: RunProgress
+        """
+        progress = RunProgress(name, files, self.limits, job, job.start_time if job else None)
+        with self.lock:
+            previous = self.runs.pop(name, None)
+            self.runs[name] = progress
+        if previous is not None:
+            previous.ended = True  # ends the tail task of the previous attempt
+        self.publish(progress)
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(self.tail(progress), self.loop)
+        return progress
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = LogMonitor (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+async def cancel_tasks():
+    """Cancels all other tasks of the running event loop and waits until they ended (errors are ignored)"""
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def format_table(rows):
+    """
+    :param rows: LIST of DICT of progress (see RunProgress.as_dict)
+    :return: STR of a fixed-width table (one line per run)
+    """
+    def fmt(val, pattern):
+        return pattern.format(val) if val is not None else "-"
+
+    lines = ["{0:<30} {1:>9} {2:>6} {3:>10} {4:>8} {5:>9}  {6}".format(
+        "Run", "Status", "%", "Time [h]", "dt [s]", "ME [%]", "Message")]
+    for row in rows:
+        lines.append("{0:<30} {1:>9} {2:>6} {3:>10} {4:>8} {5:>9}  {6}".format(
+            row["name"][0:30], row["status"], fmt(row["percent"], "{0:.1f}"), fmt(row["time"], "{0:.4f}"),
+            fmt(row["dt"], "{0:.3g}"), fmt(row["mass_error"], "{0:.3f}"), row["message"]))
+    return "\n".join(lines)
+
+
+def get_file_names(files):
+    """:return: LIST of STR of existing files of a list of file names and glob patterns"""
+    names = []
+    for pattern in files:
+        for file_name in (sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]):
+            if file_name not in names and os.path.isfile(file_name):
+                names.append(file_name)
+    return names
+
+
+def read_hours(val):
+    """:return: FLOAT of hours of STR of decimal hours or h:mm:ss"""
+    if ":" in val:
+        h, m, s = val.split(":")
+        return int(h) + int(m) / 60. + float(s) / 3600.
+    return float(val)
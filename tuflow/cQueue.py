@@ -0,0 +1,347 @@
+try:
+    import os, json, socket, sqlite3, time
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from contextlib import closing
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, json, socket, sqlite3, time, concurrent).")
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+    import cRuns
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+# job states
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"  # no attempts left
+
+run_stamp_name = ".hy2opt_run.json"  # written to the result folder of finished runs (input hash of the outputs)
+
+
+class RunQueue:
+    def __init__(self, db_file=None, max_attempts=3, backoff=30.0, max_backoff=3600.0, stale_after=120.0):
+        """
+        Persistent SQLite queue of (model, event, input hash) runs that survives crashes and restarts
+        Jobs are claimed in transactions (no job runs twice) and running jobs of crashed workers return to pending
+        Failed runs are retried after backoff * 2^(attempt - 1) seconds until max_attempts runs failed
+        :param db_file: STR of full path to the queue database (default: cfg.tf_run_queue)
+        :param max_attempts: INT of default number of runs of a job before it is failed
+        :param backoff: FLOAT of seconds before the first retry of a failed run
+        :param max_backoff: FLOAT of maximum seconds between retries
+        :param stale_after: FLOAT of seconds without heartbeat after which a running job is considered abandoned
+        """
+        self.db_file = db_file if db_file else cfg.tf_run_queue
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stale_after = stale_after
+        self.worker = "{0}:{1}".format(socket.gethostname(), os.getpid())
+        fGl.chk_dir(os.path.dirname(os.path.abspath(self.db_file)))
+        self.create()
+
+    def claim(self, limit=1):
+        """
+        Marks up to limit due pending jobs as running by this worker
+        :return: LIST of DICTs of claimed jobs (see get_jobs)
+        """
+        now = time.time()
+        with closing(self.connect()) as db:
+            db.execute("BEGIN IMMEDIATE")  # one claiming worker at a time
+            try:
+                rows = db.execute("SELECT id FROM jobs WHERE state = ? AND not_before <= ? ORDER BY id LIMIT ?",
+                                  (STATE_PENDING, now, limit)).fetchall()
+                ids = [row[0] for row in rows]
+                db.executemany("UPDATE jobs SET state = ?, worker = ?, started = ?, heartbeat = ?, "
+                               "attempts = attempts + 1 WHERE id = ?",
+                               [(STATE_RUNNING, self.worker, now, now, job_id) for job_id in ids])
+                db.commit()
+            except:
+                db.rollback()
+                raise
+        return self.get_jobs(ids=ids)
+
+    def complete(self, job_id, ok, message="", retry=True):
+        """
+        Records the end of a claimed job: done if ok, else pending (retry after backoff) or failed (no attempts left)
+        :param job_id: INT
+        :param ok: BOOL
+        :param message: STR (e.g., exit code or reason of the failure)
+        :param retry: BOOL - if False, a job that is not ok fails without further attempts
+        """
+        now = time.time()
+        with closing(self.connect()) as db, db:
+            if ok:
+                db.execute("UPDATE jobs SET state = ?, finished = ?, message = ? WHERE id = ?",
+                           (STATE_DONE, now, message, job_id))
+                return
+            attempts, max_attempts = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?",
+                                                (job_id,)).fetchone()
+            if retry and attempts < max_attempts:
+                delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+                db.execute("UPDATE jobs SET state = ?, not_before = ?, finished = ?, message = ? WHERE id = ?",
+                           (STATE_PENDING, now + delay, now, message, job_id))
+            else:
+                db.execute("UPDATE jobs SET state = ?, finished = ?, message = ? WHERE id = ?",
+                           (STATE_FAILED, now, message, job_id))
+
+    def connect(self):
+        connection = sqlite3.connect(self.db_file, timeout=30.0)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def create(self):
+        """Creates the queue table and indices (if not yet existing)"""
+        with closing(self.connect()) as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY, model TEXT, event TEXT, input_hash TEXT, state TEXT,
+                    attempts INTEGER DEFAULT 0, max_attempts INTEGER, not_before REAL DEFAULT 0,
+                    worker TEXT, started REAL, heartbeat REAL, finished REAL, message TEXT DEFAULT '',
+                    UNIQUE (model, event, input_hash));
+                CREATE INDEX IF NOT EXISTS idx_state ON jobs (state, not_before, id);
+                """)
+
+    def enqueue(self, model, event, input_hash, max_attempts=None):
+        """
+        Adds a run (ignored if the same model, event and inputs are queued) - pending or failed runs of the same model
+        and event with other inputs are replaced
+        :return: BOOL (True if a new job was added)
+        """
+        with closing(self.connect()) as db, db:
+            db.execute("DELETE FROM jobs WHERE model = ? AND event = ? AND input_hash != ? AND state IN (?, ?)",
+                       (model, str(event), input_hash, STATE_PENDING, STATE_FAILED))
+            cursor = db.execute("INSERT OR IGNORE INTO jobs (model, event, input_hash, state, max_attempts) "
+                                "VALUES (?, ?, ?, ?, ?)", (model, str(event), input_hash, STATE_PENDING,
+                                                           max_attempts if max_attempts else self.max_attempts))
+            return cursor.rowcount > 0
+
+    def enqueue_model(self, model, events=None, max_attempts=None):
+        """
+        Queues the exported events of a model
+        :param model: Hy2OptModel (exported, see export_as_tf)
+        :param events: LIST (optional) of events (default: all events of the exported .tef file)
+        :return: INT of number of new jobs (None if the model is not exported)
+        """
+        hashes = model.read_export_manifest()
+        exported = model.get_exported_events()
+        if not exported or not hashes:
+            return None
+        added = 0
+        for event in ([str(e) for e in events] if events else exported):
+            input_hash = model.get_run_hash(event, hashes)
+            if input_hash and event in exported:
+                added += self.enqueue(model.name, event, input_hash, max_attempts)
+        return added
+
+    def get_counts(self):
+        """:return: DICT of {state: INT of number of jobs}"""
+        with closing(self.connect()) as db:
+            return dict(db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def get_jobs(self, state=None, ids=None):
+        """:return: LIST of DICTs of jobs (all columns), optionally filtered by state or ids"""
+        sql, args = "SELECT * FROM jobs", []
+        if state:
+            sql, args = sql + " WHERE state = ?", [state]
+        elif ids is not None:
+            if not ids:
+                return []
+            sql, args = sql + " WHERE id IN ({0})".format(",".join("?" * ids.__len__())), list(ids)
+        with closing(self.connect()) as db:
+            db.row_factory = sqlite3.Row
+            return [dict(row) for row in db.execute(sql + " ORDER BY id", args)]
+
+    def get_next_due(self):
+        """:return: FLOAT of time of the next pending job (None if no job is pending)"""
+        with closing(self.connect()) as db:
+            return db.execute("SELECT MIN(not_before) FROM jobs WHERE state = ?", (STATE_PENDING,)).fetchone()[0]
+
+    def heartbeat(self, job_ids):
+        """Confirms that the jobs of this worker are still running"""
+        with closing(self.connect()) as db, db:
+            db.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ?",
+                           [(time.time(), job_id, self.worker) for job_id in job_ids])
+
+    def release(self, job_id, message=""):
+        """Returns a claimed job to pending without counting the attempt (e.g., the run was cancelled)"""
+        with closing(self.connect()) as db, db:
+            db.execute("UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), message = ? "
+                       "WHERE id = ? AND state = ?", (STATE_PENDING, message, job_id, STATE_RUNNING))
+
+    def recover(self):
+        """
+        Returns running jobs of crashed workers to pending (the interrupted attempt is not counted) - a worker crashed
+        if its process does not exist anymore (same host) or its heartbeat is older than stale_after
+        :return: INT of number of recovered jobs
+        """
+        host = socket.gethostname()
+        recovered = []
+        for job in self.get_jobs(state=STATE_RUNNING):
+            w_host, sep, w_pid = str(job["worker"]).rpartition(":")
+            alive = chk_process_alive(int(w_pid)) if (w_host == host and w_pid.isdigit()) else None
+            if alive is False or (alive is None and time.time() - (job["heartbeat"] or 0) > self.stale_after):
+                recovered.append(job["id"])
+        for job_id in recovered:
+            self.release(job_id, "recovered (worker stopped)")
+        return recovered.__len__()
+
+    def retry_failed(self):
+        """Returns all failed jobs to pending (with a new set of attempts) - :return: INT of number of jobs"""
+        with closing(self.connect()) as db, db:
+            return db.execute("UPDATE jobs SET state = ?, attempts = 0, not_before = 0 WHERE state = ?",
+                              (STATE_PENDING, STATE_FAILED)).rowcount
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = RunQueue (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+def chk_outputs(model, event, input_hash):
+    """
+    Checks if a run already produced its outputs (results/<model>/<model>_<event>/ contains result files) - outputs
+    do not count if they were written from other inputs (run stamp) or the Tuflow log file shows an unfinished run
+    :param model: Hy2OptModel
+    :return: BOOL
+    """
+    result_dir = model.get_result_dir(event)
+    try:
+        files = [f for f in os.listdir(result_dir) if f != run_stamp_name]
+    except OSError:
+        return False
+    if not files:
+        return False
+    try:
+        with open(result_dir + run_stamp_name, "r") as f:
+            return json.load(f).get("input_hash") == input_hash
+    except (OSError, ValueError):
+        pass  # no stamp (e.g., crashed before the stamp was written) - check the Tuflow log file
+    tlf = os.path.join(os.path.dirname(model.tcf_file_name), "Log", "{0}_{1}.tlf".format(model.name, event))
+    if not os.path.isfile(tlf):
+        return True
+    with open(tlf, "rb") as f:
+        f.seek(max(os.path.getsize(tlf) - 4096, 0))
+        return b"finished" in f.read().lower()
+
+
+def chk_process_alive(pid):
+    """:return: BOOL (True if a process with pid exists on this host), None if unknown (Windows)"""
+    if os.name == "nt":
+        return None  # os.kill would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, but belongs to another user
+    return True
+
+
+def prepare_job(queue, job, skip_existing=True):
+    """
+    Checks a claimed job before it runs: jobs whose outputs exist are done, jobs of re-exported models fail
+    :param queue: RunQueue
+    :param job: DICT of a claimed job
+    :param skip_existing: BOOL - if True, jobs whose outputs exist are marked done (see chk_outputs)
+    :return: Hy2OptModel of the job (None if the job must not run)
+    """
+    import cTFmodel
+    model = cTFmodel.Hy2OptModel(job["model"])
+    if skip_existing and chk_outputs(model, job["event"], job["input_hash"]):
+        queue.complete(job["id"], True, "outputs exist")
+        print("  {0}_{1}: outputs exist (skipped)".format(job["model"], job["event"]))
+        return None
+    if model.get_run_hash(job["event"]) != job["input_hash"]:
+        queue.complete(job["id"], False, "inputs changed since the job was queued (re-queue the model)", retry=False)
+        return None
+    return model
+
+
+def record_run(queue, job, model, status, message="", retry=True):
+    """
+    Records the outcome of a claimed job (cancelled runs return to pending without counting the attempt)
+    :param status: STR of cRuns status of the run
+    :param message: STR of the reason of a failure
+    :param retry: BOOL - if False, a failed run is not attempted again (e.g., it diverged, see cMonitor.RunLimits)
+    """
+    if status == cRuns.STATUS_CANCELLED:
+        queue.release(job["id"], "cancelled")
+        return
+    ok = status == cRuns.STATUS_FINISHED
+    if ok:
+        write_run_stamp(model, job)
+    queue.complete(job["id"], ok, message if message else status, retry=retry)
+
+
+def run_queue(queue, solver, max_workers=None, timeout=None, env=None, skip_existing=True, heartbeat_interval=10.0,
+              callback=None):
+    """
+    Runs queued jobs until no job is pending (waits for retries whose backoff did not expire)
+    :param queue: RunQueue
+    :param solver: STR of the Tuflow installation directory, a solver executable, or cfg.tf_fake_solver
+    :param max_workers: INT (optional) of number of concurrent runs (default: number of CPU cores)
+    :param timeout: FLOAT (optional) of seconds after which a run is terminated (counts as failed attempt)
+    :param env: DICT (optional) of environment variables of the solver processes
+    :param skip_existing: BOOL - if True, jobs whose outputs exist are marked done without running (see chk_outputs)
+    :param heartbeat_interval: FLOAT of seconds between heartbeats of running jobs
+    :param callback: function or LIST of functions (optional) called with every cRuns.RunJob when it starts and ends
+    :return: DICT of {state: INT of number of jobs} after the runs
+    """
+    command = cRuns.get_solver_command(solver)
+    if not command:
+        print("ERROR: Cannot find a Tuflow executable in {0}.".format(str(solver)))
+        return queue.get_counts()
+    orchestrator = cRuns.RunOrchestrator(max_workers=max_workers, timeout=timeout)
+    active = {}  # {Future: (DICT of queue job, cRuns.RunJob, Hy2OptModel)}
+
+    def start(job):
+        model = prepare_job(queue, job, skip_existing)
+        if model:
+            run_job = model.get_run_job(command, job["event"], timeout=timeout, env=env)
+            active[executor.submit(orchestrator.run_job, run_job, callback)] = (job, run_job, model)
+
+    def finish(future):
+        job, run_job, model = active.pop(future)
+        future.result()
+        record_run(queue, job, model, run_job.status, run_job.message, retry=not run_job.stop_reason)
+        print("  {0} [attempt {1}]".format(str(run_job), job["attempts"]))
+
+    with ThreadPoolExecutor(max_workers=orchestrator.max_workers) as executor:
+        try:
+            while True:
+                free = orchestrator.max_workers - active.__len__()
+                claimed = queue.claim(free) if (free > 0 and not orchestrator.cancelled.is_set()) else []
+                for job in claimed:
+                    start(job)
+                if active:
+                    done, not_done = wait(list(active.keys()), timeout=heartbeat_interval,
+                                          return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future)
+                    queue.heartbeat([job["id"] for job, run_job, model in active.values()])
+                    continue
+                if claimed:
+                    continue  # all claimed jobs were skipped
+                next_due = queue.get_next_due()
+                if next_due is None or orchestrator.cancelled.is_set():
+                    break
+                time.sleep(min(max(next_due - time.time(), 0.1), heartbeat_interval))
+        except KeyboardInterrupt:
+            print("Interrupted - stopping runs (the queue continues with resume).")
+            orchestrator.cancel()
+            for future in list(active.keys()):
+                finish(future)
+    return queue.get_counts()
+
+
+def write_run_stamp(model, job):
+    """Records the input hash of the outputs of a finished run in its result folder"""
+    result_dir = model.get_result_dir(job["event"])
+    if os.path.isdir(result_dir):
+        try:
+            fGl.write_file_atomic(result_dir + run_stamp_name, json.dumps({"input_hash": job["input_hash"],
+                                                                           "finished": time.time()}))
+        except OSError:
+            print("WARNING: Could not write the run stamp of {0}_{1}.".format(job["model"], job["event"]))
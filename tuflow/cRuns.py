@@ -0,0 +1,244 @@
+try:
+    import os, glob, subprocess, sys, threading, time
+    from concurrent.futures import ThreadPoolExecutor
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, glob, subprocess, sys, threading, time, "
+          "concurrent).")
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+# executables that are looked up in a Tuflow installation directory (first match applies)
+solver_names = ("TUFLOW_iSP_w64.exe", "TUFLOW_iDP_w64.exe", "TUFLOW_iSP_w32.exe", "tuflow_isp", "tuflow")
+kill_delay = 5.0  # seconds between terminate and kill of a process that timed out or was cancelled
+
+# status of a RunJob
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_FINISHED = "finished"  # exit code 0
+STATUS_FAILED = "failed"  # exit code other than 0, or stopped by RunJob.stop (e.g., a diverging run)
+STATUS_TIMEOUT = "timeout"
+STATUS_CANCELLED = "cancelled"
+STATUS_ERROR = "error"  # the solver could not be started
+
+
+class RunJob:
+    def __init__(self, name, command, cwd, log_file, timeout=None, env=None, progress_files=None):
+        """
+        One solver process (one event of a model) and its outcome
+        :param name: STR of run name (e.g., model_event)
+        :param command: LIST of STR of the command line
+        :param cwd: STR of the working directory of the process
+        :param log_file: STR of full path of the file that captures stdout and stderr of the process
+        :param timeout: FLOAT (optional) of seconds after which the process is terminated
+        :param env: DICT (optional) of environment variables of the process (default: environment of Hy2Opt)
+        :param progress_files: LIST (optional) of STR of files or glob patterns of the Tuflow log files of the run
+                               (deleted before the process starts, read by cMonitor.LogMonitor in addition to log_file)
+        """
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.log_file = log_file
+        self.timeout = timeout
+        self.env = env
+        self.progress_files = list(progress_files) if progress_files else []
+        self.status = STATUS_PENDING
+        self.returncode = None
+        self.message = ""
+        self.stop_reason = ""  # STR of the reason why the process was stopped with stop (the run failed)
+        self.start_time = None
+        self.end_time = None
+        self.process = None
+
+    @property
+    def duration(self):
+        """:return: FLOAT of seconds the process ran (until now if it is running, None if it did not start)"""
+        if self.start_time is None:
+            return None
+        return (self.end_time if self.end_time is not None else time.time()) - self.start_time
+
+    def stop(self, reason):
+        """
+        Terminates the process of a running job, which is recorded as failed (the worker slot is freed)
+        :param reason: STR of the failure message (e.g., a run that diverged)
+        """
+        self.stop_reason = reason
+        stop_process(self.process)
+
+    def __repr__(self):
+        return "{0}: {1}{2}".format(self.name, self.status, " ({0})".format(self.message) if self.message else "")
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = RunJob (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+class RunOrchestrator:
+    def __init__(self, max_workers=None, timeout=None):
+        """
+        Runs solver processes concurrently (one process per event) - at most max_workers processes run at a time
+        stdout and stderr of every process are written to its log file, processes that exceed the timeout are
+        terminated, and exit codes are recorded in the RunJobs
+        :param max_workers: INT (optional) of number of concurrent processes (default: number of CPU cores)
+        :param timeout: FLOAT (optional) of default timeout in seconds of jobs without timeout (default: none)
+        """
+        self.max_workers = max_workers if max_workers else (os.cpu_count() or 1)
+        self.timeout = timeout
+        self.jobs = []
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """
+        Terminates running processes and skips pending jobs - returns immediately (safe to call from the GUI thread):
+        processes that are still alive kill_delay seconds after the terminate signal are killed by a background thread
+        """
+        self.cancelled.set()
+        with self.lock:
+            processes = [job.process for job in self.jobs if job.status == STATUS_RUNNING]
+        for process in processes:
+            terminate_process(process)
+        threading.Thread(target=kill_processes, args=(processes,), daemon=True).start()
+
+    def get_summary(self):
+        """:return: STR of number of jobs per status"""
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return ", ".join("{0} {1}".format(n, status) for status, n in sorted(counts.items()))
+
+    def run(self, jobs, callback=None):
+        """
+        Runs jobs and waits until all processes ended
+        :param jobs: LIST of RunJob
+        :param callback: function or LIST of functions (optional) that are called with every RunJob when it starts and
+                         ends (from worker threads)
+        :return: LIST of RunJob (same order as jobs)
+        """
+        self.cancelled.clear()
+        with self.lock:
+            self.jobs = list(jobs)
+        with ThreadPoolExecutor(max_workers=max(min(self.max_workers, self.jobs.__len__()), 1)) as executor:
+            futures = [executor.submit(self.run_job, job, callback) for job in self.jobs]
+            for future in futures:
+                future.result()
+        return self.jobs
+
+    def run_job(self, job, callback=None):
+        """Runs the process of one job (called by the worker threads of run)"""
+        if self.cancelled.is_set():
+            job.status = STATUS_CANCELLED
+            return job
+        fGl.chk_dir(os.path.dirname(job.log_file))
+        for pattern in job.progress_files:
+            for file_name in glob.glob(pattern):
+                fGl.rm_file(file_name)  # log files of an earlier run must not count for this run
+        timeout = job.timeout if job.timeout else self.timeout
+        with open(job.log_file, "wb") as log:
+            try:
+                with self.lock:
+                    job.start_time = time.time()
+                    job.process = subprocess.Popen(job.command, cwd=job.cwd, env=job.env, stdout=log,
+                                                   stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+                    job.status = STATUS_RUNNING
+            except OSError as e:
+                job.end_time = time.time()
+                job.status, job.message = STATUS_ERROR, "cannot start {0} ({1})".format(job.command[0], str(e))
+                log.write(("ERROR: " + job.message + "\n").encode())
+                notify(callback, job)
+                return job
+            notify(callback, job)
+            if self.cancelled.is_set():
+                stop_process(job.process)  # cancelled while the process started
+            try:
+                job.returncode = job.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                stop_process(job.process)
+                job.returncode = job.process.wait()
+                job.status, job.message = STATUS_TIMEOUT, "terminated after {0:g} s".format(timeout)
+        job.end_time = time.time()
+        if job.status == STATUS_RUNNING:
+            if job.stop_reason:
+                job.status, job.message = STATUS_FAILED, job.stop_reason
+            elif self.cancelled.is_set() and job.returncode != 0:
+                job.status = STATUS_CANCELLED
+            elif job.returncode == 0:
+                job.status = STATUS_FINISHED
+            else:
+                job.status, job.message = STATUS_FAILED, "exit code {0}".format(job.returncode)
+        notify(callback, job)
+        return job
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = RunOrchestrator (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+def get_solver_command(solver):
+    """
+    :param solver: STR of a Tuflow installation directory, a solver executable, or a Python script (e.g., the bundled
+                   fake solver cfg.tf_fake_solver)
+    :return: LIST of STR of the command that starts the solver (None if no solver is found)
+    """
+    solver = str(solver).strip()
+    if os.path.isdir(solver):
+        for name in solver_names:
+            if os.path.isfile(os.path.join(solver, name)):
+                return [os.path.join(solver, name)]
+        return None
+    if solver.lower().endswith(".py") and os.path.isfile(solver):
+        return [sys.executable, solver]
+    if os.path.isfile(solver):
+        return [solver]
+    return None
+
+
+def kill_processes(processes, delay=None):
+    """
+    Waits until terminated processes ended and kills those that are still alive after delay seconds (one deadline
+    for all processes)
+    :param processes: LIST of subprocess.Popen (None entries are skipped)
+    :param delay: FLOAT (optional) of seconds (default: kill_delay)
+    """
+    deadline = time.time() + (kill_delay if delay is None else delay)
+    for process in processes:
+        if process is None:
+            continue
+        try:
+            process.wait(timeout=max(deadline - time.time(), 0.))
+        except subprocess.TimeoutExpired:
+            process.kill()
+        except OSError:
+            pass
+
+
+def notify(callback, job):
+    for function in (callback if isinstance(callback, (list, tuple)) else [callback]):
+        if not function:
+            continue
+        try:
+            function(job)
+        except Exception as e:
+            print("WARNING: Run callback failed ({0}).".format(str(e)))
+
+
+def stop_process(process):
+    """Terminates a process (and kills it if it is still alive after kill_delay seconds)"""
+    if terminate_process(process):
+        kill_processes([process])
+
+
+def terminate_process(process):
+    """
+    Sends the terminate signal to a process (returns immediately)
+    :return: BOOL (True if the process was running)
+    """
+    if process is None or process.poll() is not None:
+        return False
+    try:
+        process.terminate()
+    except OSError:
+        pass
+    return True
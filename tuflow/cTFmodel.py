@@ -1,19 +1,59 @@
 from cCtrl import ModelControl
 from cGeo import ModelGeoControl
 from cEvents import ModelEvents
-from config import *
+from cDefaults import DefaultTable
+import cArchive
+import cAssets
+import cCatalog
+import cHydrographs
+import cRuns
+import cTemplates
+import cTrees
+import cValidation
+import config_core as cfg
+import fGlobal as fGl
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import fileinput
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
 
 
 class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
+    export_workers = 8  # number of threads writing Tuflow files concurrently (export_as_tf, export_bce)
     # name = ReadOnlyParameter("model_name")
-    # model_file = ReadOnlyParameter(dir2tf + "models/model_name.hy2model")
+    # model_file = ReadOnlyParameter(cfg.dir2tf + "models/model_name.hy2model")
 
     def __init__(self, model_name):
         self._name = model_name
-        self._model_file = dir2tf + "models/" + model_name + ".hy2model"
+        self._model_file = cfg.dir2tf + "models/" + model_name + ".hy2model"
         self.logger = logging.getLogger("logfile")
 
+        # parsed model file contents {(par_group, par): STR} and the file stamp they were read at
+        self._model_index = {}
+        self._model_index_stamp = None
+        self._signatures = []
+        self._signatures_stamp = None
+        # pending model file changes of an open batch (see Hy2OptModel.batch)
+        self._batch_depth = 0
+        self._pending_pars = {}
+        self._pending_signatures = []
+        # bytes written vs. skipped (unchanged content) by the Tuflow file writers (reset by export_as_tf)
+        self.write_stats = fGl.new_write_stats()
+        # {source file: (archive member, path written to control files)} of assets packed by export_archive
+        self._archive_paths = {}
+        # cRuns.RunOrchestrator of the latest run_model call (cancel() stops the runs)
+        self.run_orchestrator = None
+
         ModelControl.__init__(self)
         ModelGeoControl.__init__(self)
         ModelEvents.__init__(self)
@@ -66,6 +106,27 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
     def name(self, val):
         raise Exception("Read-only: Use Hy2OpModel.set_parameter_... instead.")
 
+    @contextmanager
+    def batch(self):
+        """
+        Buffers all parameter and signature writes (write_parameter, set_usr_parameters, sign_model) and flushes
+        them to the model file in a single atomic write when the outermost batch closes. Nothing is written if the
+        batch is left with an exception.
+        Usage:  with model.batch():
+                    model.set_usr_parameters(...)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except:
+            if self._batch_depth == 1:
+                self.discard_pending()
+            raise
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush_pending()
+
     def complete(self):
         """
         for par_group, par_dict in self.default_dicts.items():
@@ -74,34 +135,190 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
         """
         self.par_dict = self.default_dicts
 
-    def export_as_tf(self):
-        """Export internal model to Tuflow model files"""
+    @staticmethod
+    def decode_model_par(par_val_str):
+        """
+        Converts a parameter value string from a model file into its type (TUPLE, FLOAT, INT, or STR)
+        :param par_val_str: STR of parameter value
+        :return: decoded parameter value
+        """
+        par_val_str = str(par_val_str)
+        if "," in par_val_str:
+            return fGl.str2tuple(par_val_str)
+        if "." in par_val_str:
+            try:
+                return float(par_val_str)
+            except ValueError:
+                pass
+        try:
+            return int(par_val_str)
+        except ValueError:
+            return par_val_str
+
+    @staticmethod
+    def chk_export_current(old_hashes, key, f_hash, files):
+        """
+        :return: BOOL (True if all files exist and were exported from the same parameters (f_hash))
+        """
+        return (old_hashes.get(key) == f_hash) and all(os.path.isfile(f) for f in files)
+
+    def discard_pending(self):
+        """Drops buffered (not yet flushed) model file changes"""
+        self._pending_pars = {}
+        self._pending_signatures = []
+
+    @staticmethod
+    def encode_model_par(val):
+        """
+        Converts a parameter value into the model file string format (inverse of decode_model_par)
+        :param val: TUPLE, FLOAT, INT, or STR
+        :return: STR
+        """
+        if isinstance(val, (tuple, list)):
+            return ",".join([str(v) for v in val])
+        return str(val)
+
+    def export_archive(self, archive_file=None, validate=True):
+        """
+        Writes the Tuflow model (static tree files, control files, bc files and referenced GIS assets) directly into
+        a tar or zip archive instead of the user_models/<name>/ tree - events are streamed once and the bc database
+        and event file are spooled (bounded memory). The archive contains a packaging manifest with the sha1 of
+        every member (<name>/package_manifest.json)
+        :param archive_file: STR (optional) of full path of the archive (.tar, .tar.gz, .tgz, or .zip - default:
+                             cfg.tf_archive_dir/<name>.tar.gz)
+        :param validate: BOOL (optional) - if True, nothing is written if the model has errors (see cValidation)
+        :return: STR of full path of the archive (None if the model is not valid or the archive failed)
+        """
         msg = []
+        self.get_boundary_sa_names()
+        self.get_boundary_bc_names()
+        self.load_model()
+        if validate and not self.validate_export(msg):
+            print(*msg, sep='\n')
+            return None
+        archive_file = archive_file if archive_file else cfg.tf_archive_dir + str(self._name) + ".tar.gz"
+        model_dir = cfg.dir2tf + "user_models/" + str(self._name) + "/"
+        root = str(self._name) + "/"
+
+        def arcname(file_name):
+            return root + os.path.relpath(file_name, model_dir).replace(os.sep, "/")
+
+        provisioner = cTrees.get_provisioner()
+        self._archive_paths = self.get_archive_assets()
+        try:
+            with cArchive.ModelArchive(archive_file, root + "package_manifest.json") as archive:
+                for rel_dir in sorted(provisioner.manifest["dirs"].keys()):
+                    if rel_dir != ".":
+                        archive.add_dir(root + rel_dir)
+                for rel_file in provisioner.manifest["files"].keys():
+                    archive.add_file(root + rel_file, provisioner.source_directory + rel_file)
+                for source_file, (member, tf_path) in self._archive_paths.items():
+                    archive.add_file(member, source_file)
+                archive.add_text(arcname(self.tgc_file_name), cTemplates.get_template("tgc").render(self))
+                archive.add_text(arcname(self.tbc_file_name), cTemplates.get_template("tbc").render(self))
+
+                spools = OrderedDict([(self.bcm_file_name, cArchive.new_spool()),
+                                      (self.tef_file_name, cArchive.new_spool())])
+                with spools[self.bcm_file_name], spools[self.tef_file_name]:
+                    def render_event(record):
+                        e, e_defs = record
+                        series = self.get_event_series(e_defs)
+                        return e, self.get_bce_content(e_defs, series), self.get_bcm_lines(e, e_defs), \
+                            self.get_tef_lines(e, e_defs, series)
+
+                    # events are rendered on the thread pool and added in event order
+                    for e, content, bcm_lines, tef_lines in self.map_threaded(render_event, self.iter_events(),
+                                                                              self.export_workers):
+                        archive.add_text(arcname(self.get_bce_file_name(e)), content)
+                        spools[self.bcm_file_name].write(fGl.encode_text(bcm_lines))
+                        spools[self.tef_file_name].write(fGl.encode_text(tef_lines))
+                    for file_name, spool in spools.items():
+                        size = spool.tell()
+                        spool.seek(0)
+                        archive.add_stream(arcname(file_name), spool, size)
+                archive.add_text(arcname(self.tcf_file_name), cTemplates.get_template("tcf").render(self))
+        except Exception as ex:
+            msg.append("ERROR: Could not write {0} ({1}).".format(archive_file, str(ex)))
+            print(*msg, sep='\n')
+            return None
+        finally:
+            self._archive_paths = {}
+        msg.append("\nFinished writing Tuflow model archive {0} ({1} members)\n".format(
+            archive_file, archive.members.__len__()))
+        print(*msg, sep='\n')
+        return archive_file
+
+    def export_as_tf(self, force=False, validate=True):
+        """
+        Export internal model to Tuflow model files
+        Only files whose parameter groups or events changed since the last export are re-written
+        :param force: BOOL (optional) - if True, all files are re-written
+        :param validate: BOOL (optional) - if True, nothing is written if the model has errors (see cValidation)
+        :return: BOOL (False if the model is not valid or any Tuflow file could not be written)
+        """
+        msg = []
+        self.write_stats = fGl.new_write_stats()
         # retrieve model values
         self.get_boundary_sa_names()
         self.get_boundary_bc_names()
         self.load_model()
-        if os.path.isfile(dir2tf + "models/" + self.event_file[0]):
-            self.events = fGl.dict_nested_read_from_file(dir2tf + "models/" + self.event_file[0])
-        else:
+        if not os.path.isfile(self.get_event_file_name()):
             msg.append("WARNING: No events defined.")
+        if validate and not self.validate_export(msg):
+            print(*msg, sep='\n')
+            return False
 
         # Write Tuflow model files
-        new = fGl.copy_tree(tf_source_tree, dir2tf + "user_models/" + str(self._name) + "/")
-        msg.append(self.export_tgc())
-        msg.append(self.export_tbc())
-        msg.append(self.export_bce())
-        msg.append(self.export_bcm())
-        msg.append(self.export_tef())
-        msg.append(self.export_tcf())
+        new = cTrees.provision_tree(cfg.dir2tf + "user_models/" + str(self._name) + "/")
+        old_hashes = {} if force else self.read_export_manifest()
+        new_hashes = {}
+        job_hashes = {}
+        results = OrderedDict((f_type, []) for f_type in self.get_export_plan().keys())
+        skipped = OrderedDict((f_type, []) for f_type in self.get_export_plan().keys())
+        jobs = []  # LIST of (file type, export function, TUPLE of arguments) - independent files written concurrently
+        for f_type, (export_fun, par_groups, files) in self.get_export_plan().items():
+            if "events" in par_groups:
+                continue  # event files are written by export_events
+            job_hashes[f_type] = self.get_export_hash(*par_groups)
+            if self.chk_export_current(old_hashes, f_type, job_hashes[f_type], files):
+                skipped[f_type].append(os.path.basename(files[0]))
+                new_hashes[f_type] = job_hashes[f_type]
+                continue
+            jobs.append((f_type, export_fun, ()))
+
+        # control files are written in the background while the events are streamed to the event files
+        with ThreadPoolExecutor(max_workers=max(jobs.__len__(), 1)) as executor:
+            futures = [executor.submit(self.run_export_job, job) for job in jobs]
+            e_hashes, e_results, e_skipped = self.export_events(old_hashes)
+            for (f_type, export_fun, args), future in zip(jobs, futures):
+                results[f_type].append(future.result())
+                if not str(results[f_type][-1]).startswith("ERROR"):
+                    new_hashes[f_type] = job_hashes[f_type]
+        new_hashes.update(e_hashes)
+        results.update(e_results)
+        skipped.update(e_skipped)
+
+        # messages and errors are reported in the order of the export plan (independent of thread scheduling)
+        errors = []
+        for f_type, f_results in results.items():
+            errors += [f_msg for f_msg in f_results if str(f_msg).startswith("ERROR")]
+            msg += [f_msg for f_msg in f_results if not str(f_msg).startswith("ERROR")]
+        skipped = list(itertools.chain.from_iterable(skipped.values()))
         # msg.append(self.export_bat())
         # msg.append(self.export_mat())
+        self.write_export_manifest(new_hashes)
+        if skipped:
+            msg.append("Skipped (up to date): " + ", ".join(skipped))
+        msg.append(fGl.write_stats2str(self.write_stats))
+        if errors:
+            msg.append("ERROR: {0} Tuflow file(s) could not be written:\n".format(errors.__len__()) + "\n".join(errors))
         msg.append("\nFinished writing Tuflow model files for {0}\n".format(str(self._name)))
         print(*msg, sep='\n')
+        return not errors
 
     """
     def export_bat(self):
-        bat_file_name = os.path.join(dir2tf + "user_models/", "{0}/runs/{0}.bat".format(self._name))
+        bat_file_name = os.path.join(cfg.dir2tf + "user_models/", "{0}/runs/{0}.bat".format(self._name))
         tf_exe = os.path.join()
         try:
             with open(bat_file_name, "w") as bat_file:
@@ -112,120 +329,168 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
 
     def export_tcf(self):
         try:
-            with open(self.tcf_file_name, "w") as tcf_file:
-
-                tcf_file.write("GIS Format == SHP\n")
-                self.export_par(tcf_file, "SHP projection", self.par_dict['gctrl']['SHP projection'])
-
-                for par, val in self.par_dict["ctrl"].items():
-                    if par == "License" and val == "demo":
-                        tcf_file.write("Demo Model == ON\n")
-                    if par not in ["License", "Model Precision"]:
-                        self.export_par(tcf_file, par, val)
-
-                for par, val in self.file_par_dict.items():
-                    self.export_par(tcf_file, par, val)
-
-                for par, val in self.par_dict["po"].items():
-                    par = "Read GIS PO"
-                    self.export_par(tcf_file, par, val)
-
-                stab_excludes = ["Cell Size", "Set IWL"]
-                if self.par_dict['stab']['Viscosity Formulation'] == "SMAGORINSKY":
-                    stab_excludes.append("Constant Viscosity Coefficient")
-                else:
-                    stab_excludes.append("Viscosity Coefficients")
-
-                for par, val in self.par_dict["stab"].items():
-                    if par not in stab_excludes:
-                        self.export_par(tcf_file, par, val)
-
-                # hard-coded output locations
-                tcf_file.write("Log Folder == Log\\\n"
-                               "Output Folder == ..\\results\\{0}\\{0}_<<~e1~>>\\\n"
-                               "Write Check Files == ..\check\\{0}\\{0}_<<~e1~>>\\\n"
-                               .format(self._name))
-
-                for par, val in self.par_dict['out'].items():
-                    self.export_par(tcf_file, par, val)
-
-            return str(self._name) + ".tcf file created"
+            if cTemplates.get_template("tcf").write(self, self.tcf_file_name, self.write_stats):
+                return str(self._name) + ".tcf file created"
+            return str(self._name) + ".tcf file unchanged"
         except:
             return "ERROR: Close file %s and re-run." % self.tcf_file_name
 
     def export_tgc(self):
         """Write Tuflow .tgc file"""
-        if os.path.isfile(self.tgc_file_name):
-            fGl.rm_file(self.tgc_file_name)
-        with open(self.tgc_file_name, "w") as tgc_file:
-            for par, val in self.par_dict["gctrl"].items():
-                if par != "SHP projection":
-                    self.export_par(tgc_file, par, val)
-
-            self.export_par(tgc_file, "stab", "Cell Size")
-
-            for par, val in self.par_dict["gmat"].items():
-                self.export_par(tgc_file, par, val)
-
-        return str(self._name + ".tgc file created")
+        if cTemplates.get_template("tgc").write(self, self.tgc_file_name, self.write_stats):
+            return str(self._name + ".tgc file created")
+        return str(self._name + ".tgc file unchanged")
 
     def export_tbc(self):
-        if os.path.isfile(self.tbc_file_name):
-            fGl.rm_file(self.tbc_file_name)
-        with open(self.tbc_file_name, "w") as tbc_file:
-            for par, val in self.par_dict["gbc"].items():
-                self.export_par(tbc_file, par, val)
-            tbc_file.truncate()
-        return str(self._name + ".tbc file created")
-
-    def export_bce(self):
-        """Export event-specific bc def"""
-        start_time = 0
-        end_time = 1000
-        for e, e_defs in self.events.items():
-            bce_file_name = dir2tf + "user_models/{0}/bc_dbase/{0}_bc_data_{1}.csv".format(self._name, e)
-            if os.path.isfile(bce_file_name):
-                fGl.rm_file(bce_file_name)
-            try:
-                bcm_file = open(bce_file_name, "w")
-            except:
-                return "ERROR: Close " + bce_file_name + " an re-run model generator."
-            col_names = ["Time"] + self.bc_dict['sa'] + self.bc_dict['bc']
-            bcm_file.write(",".join(col_names) + "\n")
-            bcm_file.write(",".join([str(start_time)] + [e_defs[col] for col in col_names[1:]]) + "\n")
-            bcm_file.write(",".join([str(end_time)] + [e_defs[col] for col in col_names[1:]]))
-            bcm_file.truncate()
+        if cTemplates.get_template("tbc").write(self, self.tbc_file_name, self.write_stats):
+            return str(self._name + ".tbc file created")
+        return str(self._name + ".tbc file unchanged")
+
+    def export_bce(self, events=None):
+        """
+        Export event-specific bc def (the _bc_data files of the events are written concurrently)
+        :param events: LIST of event keys to export (optional, default: all events)
+        """
+        records = ((e, e_defs) for e, e_defs in self.iter_events() if (events is None) or (e in events))
+        errors = [e_msg for e_msg in self.map_threaded(lambda record: self.export_bce_file(*record), records,
+                                                       self.export_workers) if str(e_msg).startswith("ERROR")]
+        if errors:
+            return "\n".join(errors)
         return str(self._name + "_bc_data files created")
 
+    def export_bce_file(self, event, e_defs=None, series=None):
+        """
+        Export the _bc_data file of one event
+        :param event: event key
+        :param e_defs: DICT of {boundary name: value} of the event (optional, default: self.events[event])
+        :param series: cHydrographs.EventSeries of the event (optional, default: built from e_defs)
+        :return: STR of message
+        """
+        if e_defs is None:
+            e_defs = self.events[event]
+        bce_file_name = self.get_bce_file_name(event)
+        content = self.get_bce_content(e_defs, series)
+        try:
+            if not fGl.write_file_if_changed(bce_file_name, content, self.write_stats):
+                return os.path.basename(bce_file_name) + " unchanged"
+        except OSError:
+            return "ERROR: Close " + bce_file_name + " an re-run model generator."
+        return os.path.basename(bce_file_name) + " created"
+
     def export_bcm(self):
         """Export model-specific bc file"""
-        if os.path.isfile(self.bcm_file_name):
-            fGl.rm_file(self.bcm_file_name)
         try:
-            bce_file = open(self.bcm_file_name, "w")
-        except:
+            content = "".join(self.get_bcm_lines(e, e_defs) for e, e_defs in self.iter_events())
+            if not fGl.write_file_if_changed(self.bcm_file_name, content, self.write_stats):
+                return "2d_bc_EVENT files unchanged"
+        except OSError:
             return "ERROR: Close " + self.bcm_file_name + " an re-run model generator."
-        for e, e_defs in self.events.items():
-            bce_file.write("Name,Source,Column 1,Column 2\n")
-            for sa in e_defs.keys():
-                bce_file.write("{0},{1}_bc_data_{2}.csv,Time,{0}\n".format(sa, self._name, e))
-            bce_file.truncate()
         return "2d_bc_EVENT files created"
 
+    def export_events(self, old_hashes):
+        """
+        Reads the events once and fans every event out to the writers of its _bc_data file (on the thread pool, only
+        if the event changed), the bc database (bcm) and the event file (tef) - memory does not grow with the number
+        of events. The bcm and tef files are streamed to temporary files, which only replace the existing files if
+        any event changed.
+        :param old_hashes: DICT of {file type: hash} of the last export (empty to re-write all files)
+        :return: TUPLE of DICTs ({file type: hash} of current files, {file type: LIST of STR of messages},
+                 {file type: LIST of STR of skipped files})
+        """
+        new_hashes = {}
+        results = OrderedDict([("bce", []), ("bcm", []), ("tef", [])])
+        skipped = {"bce": [], "bcm": [], "tef": []}
+        counts = {"events": 0, "current": 0, "written": 0}
+        events_hasher = self.get_export_hasher()
+        events_hasher.update(repr(("events", self.bc_dict)).encode())
+        line_funs = {"bcm": lambda e, e_defs, series: self.get_bcm_lines(e, e_defs), "tef": self.get_tef_lines}
+        stream_files = OrderedDict()  # {file type: (STR of target file name, temporary file object)}
+        for f_type, file_name in (("bcm", self.bcm_file_name), ("tef", self.tef_file_name)):
+            try:
+                stream_files[f_type] = (file_name, tempfile.NamedTemporaryFile(
+                    "w", dir=os.path.dirname(file_name), prefix=os.path.basename(file_name), suffix=".tmp",
+                    delete=False))
+            except OSError:
+                results[f_type].append("ERROR: Close file %s and re-run." % file_name)
+
+        def discard(f_type):
+            temp_file = stream_files.pop(f_type)[1]
+            temp_file.close()
+            fGl.rm_file(temp_file.name)
+
+        def stale_events():
+            for e, e_defs in self.iter_events():
+                counts["events"] += 1
+                events_hasher.update(self.get_event_repr(e, e_defs).encode())
+                try:
+                    # built once for the event file and the _bc_data file of the event
+                    series = self.get_event_series(e_defs)
+                except Exception:
+                    series = None  # the writers re-raise and report the error
+                for f_type in list(stream_files.keys()):
+                    try:
+                        stream_files[f_type][1].write(line_funs[f_type](e, e_defs, series))
+                    except Exception as ex:
+                        results[f_type].append("ERROR: Could not write {0} (event {1}: {2}).".format(
+                            stream_files[f_type][0], str(e), str(ex)))
+                        discard(f_type)
+                e_hash = self.get_event_hash(e, e_defs)
+                if self.chk_export_current(old_hashes, "bce:{0}".format(e), e_hash, [self.get_bce_file_name(e)]):
+                    new_hashes["bce:{0}".format(e)] = e_hash
+                    counts["current"] += 1
+                else:
+                    yield e, e_defs, e_hash, series
+
+        def export_record(record):
+            try:
+                return record[0], record[2], self.export_bce_file(record[0], record[1], record[3])
+            except Exception as ex:
+                return record[0], record[2], "ERROR: Could not write {0} ({1}).".format(
+                    os.path.basename(self.get_bce_file_name(record[0])), str(ex))
+
+        try:
+            for e, e_hash, e_msg in self.map_threaded(export_record, stale_events(), self.export_workers):
+                if str(e_msg).startswith("ERROR"):
+                    results["bce"].append(e_msg)
+                else:
+                    new_hashes["bce:{0}".format(e)] = e_hash
+                    counts["written"] += 1
+        except:
+            for f_type in list(stream_files.keys()):
+                discard(f_type)
+            raise
+
+        if counts["written"] > 0:
+            results["bce"].insert(0, str(self._name + "_bc_data files created"))
+        if counts["current"] > 0:
+            skipped["bce"].append("{0} of {1} _bc_data files".format(counts["current"], counts["events"]))
+        events_hash = events_hasher.hexdigest()
+        done_msgs = {"bcm": "2d_bc_EVENT files created", "tef": str(self._name + ".tef created")}
+        for f_type in list(stream_files.keys()):
+            file_name, temp_file = stream_files[f_type]
+            temp_file.close()
+            if self.chk_export_current(old_hashes, f_type, events_hash, [file_name]):
+                discard(f_type)
+                skipped[f_type].append(os.path.basename(file_name))
+                new_hashes[f_type] = events_hash
+                continue
+            try:
+                if fGl.replace_file_if_changed(temp_file.name, file_name, self.write_stats):
+                    results[f_type].append(done_msgs[f_type])
+                else:
+                    skipped[f_type].append(os.path.basename(file_name) + " (unchanged)")
+                new_hashes[f_type] = events_hash
+            except OSError:
+                discard(f_type)
+                results[f_type].append("ERROR: Close file %s and re-run." % file_name)
+        return new_hashes, results, skipped
+
     def export_tef(self):
         try:
-            with open(self.tef_file_name, "w") as tef_file:
-                for e, e_defs in self.events.items():
-                    # get outlet WSEs
-                    outlets = [bc for bc in self.bc_dict['bc']]
-                    outlet_wses = [e_defs[outlet] for outlet in outlets]
-                    tef_file.write("Define Event == {0}\n\t"
-                                   "BC Event Source == __event__ | {0}\n\t"
-                                   "SET IWL == {1}\n\t"
-                                   "Start Map Output == {2}\n\t"
-                                   "End Time == {3}\n"
-                                   "End Define\n".format(e, min(outlet_wses), 100 - 1, 100))
-                return str(self._name + ".tef created")
+            content = "".join(self.get_tef_lines(e, e_defs) for e, e_defs in self.iter_events())
+            if not fGl.write_file_if_changed(self.tef_file_name, content, self.write_stats):
+                return str(self._name + ".tef unchanged")
+            return str(self._name + ".tef created")
         except:
             return "ERROR: Close file %s and re-run." % self.tef_file_name
 
@@ -236,24 +501,9 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
         :param par: STR, dict key
         :param val: corresponding dict val
         """
-        if par == "Read GIS Mat" and val == "":
-            print("Missing GIS Mat file (OK if uniform Manning\'s n applied) ...")
-            return
-        if par == "Map Output Format" and val == "ALL":
-            val = "GRID XMDF"
-        if par.startswith("Read") or par.endswith(("Database", "projection", "File")):
-            if val == "":
-                print("ERROR: Missing file definition for {0}.".format(par))
-                return
-            val = self.par2tf_path(par, val)
-        if type(val) == tuple:
-            val = str(val)[1:-1]
-        if val != "":
-            f.write("{0} == {1}\n".format(par, val))
-        else:
-            print("ERROR: Missing parameter: {0}.".format(par))
+        f.write(cTemplates.compile_par(par)(self, val))
 
-    @chk_osgeo
+    @cfg.chk_osgeo
     def get_boundary_bc_names(self):
         dir2bc_shp = self.get_model_par("gbc", "Read GIS BC")
         field_names = fGl.get_shp_field_names(dir2bc_shp)
@@ -271,7 +521,7 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
         except:
             pass
 
-    @chk_osgeo
+    @cfg.chk_osgeo
     def get_boundary_sa_names(self):
         dir2sa_shp = self.get_model_par("gbc", "Read GIS SA")
         field_names = fGl.get_shp_field_names(dir2sa_shp)
@@ -289,45 +539,448 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
         except:
             pass
 
+    def flush_pending(self):
+        """
+        Writes buffered parameters and signatures to the model file: existing parameter lines are replaced, new ones
+        appended. The new file content is written to a temporary file that replaces the model file atomically.
+        """
+        if not (self._pending_pars or self._pending_signatures):
+            return
+        updates = self._pending_pars
+        signatures = self._pending_signatures
+        self.discard_pending()
+
+        lines = []
+        if os.path.isfile(self.model_file):
+            with open(self.model_file, "r") as f:
+                lines = f.readlines()
+        self.write_model_file(self.merge_model_lines(lines, updates, signatures))
+
+    def get_archive_assets(self):
+        """
+        Assigns archive members to the files referenced by parameters (with sidecar files, e.g., of shapefiles):
+        rasters are packed into model/grid/, .csv files into model/, other files into model/gis/
+        :return: OrderedDict of {STR of source file: (STR of archive member, STR of path in control files)}
+        """
+        assets = OrderedDict()
+        used = {}
+        for par_group, par, val in cValidation.get_file_pars(self):
+            if cValidation.chk_unset(val) or not os.path.isfile(str(val)):
+                continue
+            main_file = os.path.abspath(str(val))
+            stem, ending = os.path.splitext(os.path.basename(main_file))
+            sub_dirs = {".asc": "grid", ".flt": "grid", ".tif": "grid", ".csv": ""}
+            sub_dir = ["model", sub_dirs.get(ending.lower(), "gis")]
+            if used.get((sub_dir[1], stem.lower()), main_file) != main_file:
+                stem += "_" + hashlib.sha1(main_file.encode()).hexdigest()[0:8]  # same name, different files
+            used[(sub_dir[1], stem.lower())] = main_file
+            for file_name in cAssets.AssetStore.get_asset_files(main_file):
+                file_name = os.path.abspath(file_name)
+                name = stem + file_name[os.path.splitext(main_file)[0].__len__():]
+                member = "/".join([str(self._name)] + [d for d in sub_dir if d] + [name])
+                tf_path = os.sep.join([os.pardir] + [d for d in sub_dir if d] + [name])  # relative to runs/
+                assets.setdefault(file_name, (member, tf_path))
+        return assets
+
+    def get_bcm_lines(self, event, e_defs):
+        """:return: STR of the bc database lines of one event"""
+        return "Name,Source,Column 1,Column 2\n" + "".join(
+            "{0},{1}_bc_data_{2}.csv,Time,{0}\n".format(sa, self._name, event) for sa in e_defs.keys())
+
+    def get_bce_content(self, e_defs, series=None):
+        """
+        :param e_defs: DICT of {boundary name: value} of an event
+        :param series: cHydrographs.EventSeries of the event (optional, default: built from e_defs)
+        :return: STR of the _bc_data file content of the event
+        """
+        start_time = 0
+        end_time = 1000
+        series = self.get_event_series(e_defs) if series is None else series
+        if series is not None:
+            # hydrographs and stage series
+            content = io.StringIO()
+            series.write_csv(content)
+            return content.getvalue()
+        # constant boundary values
+        col_names = ["Time"] + self.bc_dict['sa'] + self.bc_dict['bc']
+        return ",".join(col_names) + "\n" + \
+            ",".join([str(start_time)] + [e_defs[col] for col in col_names[1:]]) + "\n" + \
+            ",".join([str(end_time)] + [e_defs[col] for col in col_names[1:]])
+
+    def get_bce_file_name(self, event):
+        return cfg.dir2tf + "user_models/{0}/bc_dbase/{0}_bc_data_{1}.csv".format(self._name, event)
+
+    def get_export_hash(self, *par_groups):
+        """
+        Hashes the current values of parameter groups (e.g., "ctrl") and events ("events" for all events or the TUPLE
+        ("events", event_key) for a single event) - used to identify Tuflow files that need to be re-written
+        :return: STR of hex digest
+        """
+        hasher = self.get_export_hasher()
+        for par_group in par_groups:
+            if isinstance(par_group, tuple):
+                values = [self.bc_dict, self.events.get(par_group[1])]
+                sources = cHydrographs.get_source_stamps(self.events.get(par_group[1], {}), cfg.dir2tf + "models/")
+                values += [sources] if sources else []
+            elif par_group == "events":
+                # same as the streamed hash of export_events
+                hasher.update(repr(("events", self.bc_dict)).encode())
+                for e, e_defs in self.iter_events():
+                    hasher.update(self.get_event_repr(e, e_defs).encode())
+                continue
+            else:
+                values = list(self.par_dict[par_group].items())
+            hasher.update(repr((par_group, values)).encode())
+        return hasher.hexdigest()
+
+    def get_export_hasher(self):
+        """
+        :return: hashlib.sha1 object seeded with the model name and cTemplates.layout_version (files exported with
+                 other layouts are re-written)
+        """
+        return hashlib.sha1(repr((str(self._name), cTemplates.layout_version)).encode())
+
+    def get_event_file_name(self):
+        return cfg.dir2tf + "models/" + self.event_file[0]
+
+    def get_event_hash(self, event, e_defs):
+        """:return: STR of hex digest of one event (same as get_export_hash(("events", event)))"""
+        hasher = self.get_export_hasher()
+        sources = cHydrographs.get_source_stamps(e_defs, cfg.dir2tf + "models/")
+        hasher.update(repr((("events", event), [self.bc_dict, e_defs] + ([sources] if sources else []))).encode())
+        return hasher.hexdigest()
+
+    def get_event_repr(self, event, e_defs):
+        """:return: STR of one event as hashed for the files of all events (including the stamps of its CSV files)"""
+        sources = cHydrographs.get_source_stamps(e_defs, cfg.dir2tf + "models/")
+        return repr((event, e_defs, sources) if sources else (event, e_defs))
+
+    def get_event_series(self, e_defs):
+        """
+        :param e_defs: DICT of {boundary name: value or time series definition (see cHydrographs.series_prefixes)}
+        :return: cHydrographs.EventSeries of all boundaries of an event (None if all boundaries are constant)
+        """
+        columns = self.bc_dict['sa'] + self.bc_dict['bc']
+        if not any(cHydrographs.is_series(e_defs.get(col)) for col in columns):
+            return None
+        return cHydrographs.EventSeries.from_event(e_defs, columns, base_dir=cfg.dir2tf + "models/")
+
+    def get_export_manifest_name(self):
+        return cfg.dir2tf + "user_models/{0}/export_manifest.json".format(self._name)
+
+    def get_export_plan(self):
+        """
+        :return: OrderedDict of {file type: (export function, TUPLE of par_groups the file depends on, LIST of files)}
+        """
+        return OrderedDict([
+            ("tgc", (self.export_tgc, ("gctrl", "gmat", "stab"), [self.tgc_file_name])),
+            ("tbc", (self.export_tbc, ("gbc",), [self.tbc_file_name])),
+            ("bce", (self.export_bce, ("events",), [])),
+            ("bcm", (self.export_bcm, ("events",), [self.bcm_file_name])),
+            ("tef", (self.export_tef, ("events",), [self.tef_file_name])),
+            ("tcf", (self.export_tcf, ("ctrl", "stab", "out", "po", "gctrl"), [self.tcf_file_name])),
+        ])
+
+    def get_exported_events(self):
+        """:return: LIST of STR of the events defined in the exported .tef file (empty if not exported)"""
+        events = []
+        try:
+            with open(self.tef_file_name, "r") as f:
+                for line in f:
+                    par, sep, val = line.strip().partition("==")
+                    if sep and par.strip() == "Define Event":
+                        events.append(val.strip())
+        except OSError:
+            pass
+        return events
+
+    def get_result_dir(self, event):
+        """:return: STR of the Output Folder of an event (as defined in the .tcf file)"""
+        return cfg.dir2tf + "user_models/{0}/results/{0}/{0}_{1}/".format(self._name, str(event))
+
+    def get_run_hash(self, event, hashes=None):
+        """
+        :param event: STR or INT of event
+        :param hashes: DICT (optional) of the export manifest (default: read_export_manifest)
+        :return: STR of hex digest of the exported inputs of an event run (None if the event is not exported)
+        """
+        hashes = hashes if hashes is not None else self.read_export_manifest()
+        keys = ("tgc", "tbc", "tcf", "bce:{0}".format(event))
+        if not all(key in hashes for key in keys):
+            return None
+        return hashlib.sha1(repr([(key, hashes[key]) for key in keys]).encode()).hexdigest()
+
+    def get_run_job(self, command, event, timeout=None, env=None):
+        """
+        :param command: LIST of STR of the solver command (see cRuns.get_solver_command)
+        :param event: STR of event
+        :return: cRuns.RunJob of one event (console output in runs/Log/<name>_<event>.stdout.log, Tuflow log files
+                 runs/Log/<name>_<event>*.tlf as written to the Log Folder of the .tcf file)
+        """
+        runs_dir = os.path.dirname(self.tcf_file_name)
+        command = command + ["-b", "-e1", str(event), self.tcf_file_name]
+        log_file = os.path.join(runs_dir, "Log", "{0}_{1}.stdout.log".format(self._name, event))
+        tlf_files = os.path.join(runs_dir, "Log", "{0}_{1}*.tlf".format(self._name, event))
+        return cRuns.RunJob("{0}_{1}".format(self._name, event), command, runs_dir, log_file, timeout=timeout, env=env,
+                            progress_files=[tlf_files])
+
+    def get_tef_lines(self, event, e_defs, series=None):
+        """
+        :param series: cHydrographs.EventSeries of the event (optional, default: built from e_defs)
+        :return: STR of the event definition of one event in the Tuflow event file
+        """
+        series = self.get_event_series(e_defs) if series is None else series
+        if series is not None:
+            # initial water level = lowest initial outlet stage, map output starts with the rise of the inflows
+            iwl = "{0:g}".format(min(series.get_initial_values(self.bc_dict['bc']))) if self.bc_dict['bc'] else ""
+            start_map_output = "{0:g}".format(series.get_onset_time(self.bc_dict['sa']))
+            end_time = "{0:g}".format(series.get_end_time())
+        else:
+            # get outlet WSEs
+            outlet_wses = [e_defs[outlet] for outlet in self.bc_dict['bc']]
+            iwl, start_map_output, end_time = min(outlet_wses), 100 - 1, 100
+        return ("Define Event == {0}\n\t"
+                "BC Event Source == __event__ | {0}\n\t"
+                "SET IWL == {1}\n\t"
+                "Start Map Output == {2}\n\t"
+                "End Time == {3}\n"
+                "End Define\n".format(event, iwl, start_map_output, end_time))
+
     def get_model_par(self, par_group, par):
-        """get model parameter from model file"""
+        """get model parameter from model file (served from the parsed model index)"""
+        self.read_model_file()
+        return self.get_indexed_par(par_group, par)
+
+    def get_indexed_par(self, par_group, par):
+        """get model parameter from the model index without checking the model file for changes"""
         try:
-            for line in open(self.model_file, "r").readlines():
-                if line.strip().startswith("{0}::{1}::".format(par_group, par)):
-                    par_val_str = str(line.strip().split("::")[-1])
-                    if "," in par_val_str:
-                        return fGl.str2tuple(par_val_str)
-                    if "." in par_val_str:
-                        try:
-                            return float(par_val_str)
-                        except ValueError:
-                            pass
-                    try:
-                        return int(par_val_str)
-                    except ValueError:
-                        return par_val_str
-            return self.default_dicts[par_group][par][0]  # else: return default value
+            if (par_group, par) in self._pending_pars:
+                return self.decode_model_par(self._pending_pars[(par_group, par)])
+            if self._model_index_stamp is None:
+                raise FileNotFoundError(self.model_file)
+            try:
+                return self.decode_model_par(self._model_index[(par_group, par)])
+            except KeyError:
+                return self.default_dicts[par_group][par][0]  # else: return default value
         except:
             self.logger.error("Could not retrieve model value (par_group={0}, par={1})".format(str(par_group), str(par)))
 
+    def invalidate_model_index(self):
+        """Forces the next parameter or signature query to re-parse the model file"""
+        self._model_index = {}
+        self._model_index_stamp = None
+        self._signatures = []
+        self._signatures_stamp = None
+
+    def iter_events(self):
+        """
+        Reads the events file record by record (falls back to self.events if there is no events file)
+        :return: generator of TUPLEs (event key, DICT of {boundary name: value})
+        """
+        if os.path.isfile(self.get_event_file_name()):
+            return fGl.iter_nested_read_from_file(self.get_event_file_name())
+        return iter(list(self.events.items()))
+
     def load_model(self):
         """load model parameters from model file"""
+        self.read_model_file()
         for par_group, par_dict in self.par_dict.items():
             for par in par_dict.keys():
-                par_dict[par] = self.get_model_par(par_group, par)
+                par_dict[par] = self.get_indexed_par(par_group, par)
+
+    @staticmethod
+    def map_threaded(fun, items, workers=8):
+        """
+        Applies fun to all items on a pool of worker threads - the number of queued calls is bounded, so items can be
+        a long generator
+        :param fun: callable with one argument
+        :param items: iterable of arguments
+        :param workers: INT of number of threads
+        :return: generator of results in the order of items (exceptions of fun are raised when reaching its result)
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for item in items:
+                pending.append(executor.submit(fun, item))
+                if pending.__len__() >= workers * 16:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @classmethod
+    def materialize_variants(cls, base, grid, samples=None, name_pattern="{base}_v{i:05d}", make_trees=False,
+                             workers=8, seed=None, overwrite=False):
+        """
+        Writes model variants of a base model in one streaming pass: the base model (and events) file is read once,
+        each variant is derived by line substitution and written (atomically) by a pool of worker threads
+        :param base: STR of base model name or Hy2OptModel
+        :param grid: DICT of {(par_group, par): LIST of values} for a Cartesian product of all values
+                     or LIST of DICTs of {(par_group, par): value} (one DICT per variant)
+        :param samples: INT (optional) - number of random draws from grid (DICT) instead of the full product
+        :param name_pattern: STR (optional) - format string for variant names with the fields base and i
+        :param make_trees: BOOL (optional) - if True, the user_models/<name>/ model trees are provisioned, too
+        :param workers: INT (optional) - number of threads for disk I/O
+        :param seed: INT (optional) - random seed for samples
+        :param overwrite: BOOL (optional) - if True, variants are numbered from 0 and overwrite existing models of the
+                          same names (default: names of existing models or user_models/ trees are skipped, i.e.,
+                          the numbering continues after the variants of earlier sweeps)
+        :return: LIST of variant model names
+        """
+        if isinstance(base, cls):
+            base.flush_pending()
+            base_name = base.name
+        else:
+            base_name = str(base)
+        base_file = cfg.dir2tf + "models/" + base_name + ".hy2model"
+        with open(base_file, "r") as f:
+            base_lines = f.readlines()
+        base_pars = fGl.dict_model_read_from_file(base_file)
+        base_event_file = cfg.dir2tf + "models/" + base_pars.get(("bce", "Events"), base_name + ".events")
+        base_events = None
+        if os.path.isfile(base_event_file):
+            with open(base_event_file, "r") as f:
+                base_events = f.read()
+
+        if isinstance(grid, dict):
+            keys = list(grid.keys())
+            if samples:
+                rnd = random.Random(seed)
+                points = ([rnd.choice(grid[key]) for key in keys] for _ in range(int(samples)))
+            else:
+                points = itertools.product(*[grid[key] for key in keys])
+            variants = (dict(zip(keys, point)) for point in points)
+        else:
+            variants = iter(grid)
+
+        def write_variant(name, updates):
+            updates = {key: cls.encode_model_par(val) for key, val in updates.items()}
+            if base_events is not None:
+                updates[("bce", "Events")] = name + ".events"
+                fGl.write_file_atomic(cfg.dir2tf + "models/" + name + ".events", base_events)
+            fGl.write_file_atomic(cfg.dir2tf + "models/" + name + ".hy2model", cls.merge_model_lines(base_lines, updates))
+            if make_trees:
+                cTrees.provision_tree(cfg.dir2tf + "user_models/" + name + "/")
+            return name
+
+        def chk_free(name):
+            return overwrite or not (os.path.isfile(cfg.dir2tf + "models/" + name + ".hy2model") or
+                                     os.path.isdir(cfg.dir2tf + "user_models/" + name))
+
+        names = []
+        pending = []
+        indices = itertools.count()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for updates in variants:
+                name = name_pattern.format(base=base_name, i=next(indices))
+                while not chk_free(name):
+                    next_name = name_pattern.format(base=base_name, i=next(indices))
+                    if next_name == name:
+                        raise FileExistsError("Model {0} exists (overwrite or use a name pattern with the field i)."
+                                              .format(name))
+                    name = next_name
+                pending.append(executor.submit(write_variant, name, updates))
+                if pending.__len__() >= workers * 16:
+                    # bounded number of queued variants (memory does not grow with the grid size)
+                    names += [future.result() for future in pending]
+                    pending = []
+            names += [future.result() for future in pending]
+
+        for name in names:
+            model_cache.invalidate(cfg.dir2tf + "models/" + name + ".hy2model")
+        if os.path.isfile(cfg.tf_catalog):
+            cCatalog.ModelCatalog().refresh()
+        return names
+
+    @staticmethod
+    def merge_model_lines(lines, updates, signatures=()):
+        """
+        Applies parameter updates and signatures to the lines of a model file
+        :param lines: LIST of STR (lines of the current model file)
+        :param updates: DICT of {(par_group, par): STR of value} - existing lines are replaced, new ones appended
+        :param signatures: LIST of par_groups to sign
+        :return: STR of new model file content (signature header first)
+        """
+        signed = []
+        new_lines = []
+        replaced = set()
+        for line in lines:
+            values = line.strip().split("::")
+            key = tuple(values[0:2])
+            if line.startswith(fGl.model_signature_tag + "::"):
+                signed += [par_group for par_group in values[1].split(",") if par_group]
+                continue
+            if (values.__len__() > 2) and (values[1] == "signature"):
+                signed.append(values[0])  # legacy signature lines are moved to the header
+                continue
+            if (values.__len__() > 2) and (key in updates):
+                line = "{0}::{1}::{2}\n".format(key[0], key[1], updates[key])
+                replaced.add(key)
+            elif not line.endswith("\n"):
+                line += "\n"
+            new_lines.append(line)
+        for (par_group, par), val in updates.items():
+            if (par_group, par) not in replaced:
+                new_lines.append("{0}::{1}::{2}\n".format(par_group, par, val))
+        signed += list(signatures)
+        new_lines.insert(0, fGl.dict_model_signature_header(list(OrderedDict.fromkeys(signed))))
+        return "".join(new_lines)
 
     def overwrite_defaults(self, par_group):
         if os.path.isfile(self.model_file):
+            self.read_model_file()
             for par in self.default_dicts[par_group].keys():
-                self.default_dicts[par_group][par][0] = self.get_model_par(par_group, par)
+                self.set_default(par_group, par, self.get_indexed_par(par_group, par))
 
     def par2tf_path(self, par, val):
         par = str(par)
         i_val = str(val)
-        root_path = os.path.join(dir2tf, "user_models\\{0}\\runs\\".format(self._name))
-        rel_path = os.path.relpath(i_val, root_path)
+        if i_val in self._archive_paths:
+            return self._archive_paths[i_val][1]  # packed by export_archive
+        root_path = cfg.dir2tf + "user_models\\{0}\\runs\\".format(self._name)  # cfg.dir2tf ends with a separator
+        rel_path = cTemplates.get_relative_path(i_val, root_path)
         return rel_path
 
+    def read_export_manifest(self):
+        """:return: DICT of {file type: hash} of the last export (empty if not available)"""
+        try:
+            with open(self.get_export_manifest_name(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def read_model_file(self):
+        """
+        Parses the model file once into an index of {(par_group, par): STR of value}
+        The index is only rebuilt when the modification time or size of the model file changed
+        :return: DICT of the model index (empty if the model file does not exist)
+        """
+        try:
+            f_stat = os.stat(self.model_file)
+        except OSError:
+            self.invalidate_model_index()
+            return self._model_index
+        stamp = (f_stat.st_mtime_ns, f_stat.st_size)
+        if stamp == self._model_index_stamp:
+            return self._model_index
+        self._model_index = fGl.dict_model_read_from_file(self.model_file)
+        self._model_index_stamp = stamp
+        return self._model_index
+
+
+    def read_model_signatures(self):
+        """
+        Reads the signed par_groups from the model file header (cached until the model file changes)
+        :return: LIST of signed par_groups (empty if the model file does not exist)
+        """
+        try:
+            f_stat = os.stat(self.model_file)
+        except OSError:
+            return []
+        stamp = (f_stat.st_mtime_ns, f_stat.st_size)
+        if stamp != self._signatures_stamp:
+            self._signatures = fGl.dict_model_signatures(self.model_file)
+            self._signatures_stamp = stamp
+        return self._signatures
 
     def replace_model_par(self, search_pattern, new_line_str):
         """
@@ -339,39 +992,92 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
             if line.strip().startswith(search_pattern):
                 line = new_line_str
             sys.stdout.write(line)
+        self.invalidate_model_index()
 
-    def run_model(self, tf_dir):
-        """Run Tuflow model"""
-        commands = ["Set TF_EXE={0}".format(tf_dir)]
-
-        for e, e_defs in self.events.items():
-            print(e)
-            print(e_defs)
-            command = ""
-            commands.append(command)
+    def run_export_job(self, job):
+        """
+        Runs one export_as_tf job
+        :param job: TUPLE of (file type, export function, TUPLE of arguments)
+        :return: STR of message (starts with "ERROR" if the file could not be written)
+        """
+        f_type, export_fun, args = job
+        try:
+            return export_fun(*args)
+        except Exception as e:
+            return "ERROR: Could not write {0} file {1}({2}).".format(f_type, "".join(str(a) + " " for a in args),
+                                                                     str(e))
 
-        for command in commands:
-            print(command)
-            os.system(command)
+    def run_model(self, solver, events=None, max_workers=None, timeout=None, callback=None, env=None):
+        """
+        Runs the exported Tuflow model: one solver process per event, max_workers processes at a time (see cRuns)
+        The console output of every run is written to runs/Log/<name>_<event>.stdout.log
+        :param solver: STR of the Tuflow installation directory (tf_dir.def), a solver executable, or cfg.tf_fake_solver
+        :param events: LIST (optional) of events to run (default: all events of the exported .tef file)
+        :param max_workers: INT (optional) of number of concurrent runs (default: number of CPU cores)
+        :param timeout: FLOAT (optional) of seconds after which a run is terminated
+        :param callback: function or LIST of functions (optional) called with the RunJob when a run starts and ends
+                         (from worker threads - e.g., cMonitor.LogMonitor.notify)
+        :param env: DICT (optional) of environment variables of the solver processes
+        :return: LIST of cRuns.RunJob (empty if the model cannot run)
+        """
+        command = cRuns.get_solver_command(solver)
+        if not command:
+            print("ERROR: Cannot find a Tuflow executable in {0}.".format(str(solver)))
+            return []
+        if not os.path.isfile(self.tcf_file_name):
+            print("ERROR: {0} is not exported (missing {1}).".format(self._name, self.tcf_file_name))
+            return []
+        exported_events = self.get_exported_events()
+        run_events = [str(e) for e in events] if events else exported_events
+        missing = [e for e in run_events if e not in exported_events]
+        if missing:
+            print("WARNING: Events not defined in {0}: {1}".format(os.path.basename(self.tef_file_name),
+                                                                   ", ".join(missing)))
+            run_events = [e for e in run_events if e in exported_events]
+        jobs = [self.get_run_job(command, e, timeout=timeout, env=env) for e in run_events]
+        self.run_orchestrator = cRuns.RunOrchestrator(max_workers=max_workers, timeout=timeout)
+        print("Running {0} event(s) of {1} ({2} at a time) ...".format(
+            jobs.__len__(), self._name, min(self.run_orchestrator.max_workers, max(jobs.__len__(), 1))))
+        self.run_orchestrator.run(jobs, callback=callback)
+        for job in jobs:
+            print("  {0} [{1:.1f} s]".format(str(job), job.duration if job.duration is not None else 0.))
+        print("Finished runs of {0}: {1}".format(self._name, self.run_orchestrator.get_summary()))
+        return jobs
 
     def save_model(self):
-        for par_group, par_dict in self.par_dict.items():
-            for par in par_dict.keys():
-                self.write_parameter(par_group, par)
-            self.sign_model(par_group)
+        with self.batch():
+            for par_group, par_dict in self.par_dict.items():
+                for par in par_dict.keys():
+                    self.write_parameter(par_group, par)
+                self.sign_model(par_group)
 
     def set_model_name(self, model_name):
+        if self._pending_pars or self._pending_signatures:
+            self.flush_pending()  # pending changes belong to the previous model file
         self._name = model_name
-        self._model_file = dir2tf + "models/" + model_name + ".hy2model"
+        self._model_file = cfg.dir2tf + "models/" + model_name + ".hy2model"
+        self.invalidate_model_index()
         self.set_model_file_names()
 
+    def set_default(self, par_group, par, value):
+        """
+        Sets the first (applied) choice of a parameter without modifying the class-level defaults
+        :param par_group: STR corresponding to self.default_dicts.keys()
+        :param par: STR of parameter name
+        :param value: new first choice
+        """
+        try:
+            self.default_dicts[par_group].override(par, value)
+        except AttributeError:
+            self.default_dicts[par_group][par][0] = value  # plain (event) dicts
+
     def set_model_file_names(self):
         # tuflow model file names
-        self.tgc_file_name = os.path.join(dir2tf, "user_models/{0}/model/{0}.tgc".format(self._name))
-        self.tbc_file_name = os.path.join(dir2tf, "user_models/{0}/model/{0}.tbc".format(self._name))
-        self.bcm_file_name = os.path.join(dir2tf, "user_models/{0}/bc_dbase/2d_bc_{0}.csv".format(self._name))
-        self.tef_file_name = os.path.join(dir2tf, "user_models/{0}/runs/{0}.tef".format(self._name))
-        self.tcf_file_name = os.path.join(dir2tf, "user_models/{0}/runs/{0}.tcf".format(self._name))
+        self.tgc_file_name = os.path.join(cfg.dir2tf, "user_models/{0}/model/{0}.tgc".format(self._name))
+        self.tbc_file_name = os.path.join(cfg.dir2tf, "user_models/{0}/model/{0}.tbc".format(self._name))
+        self.bcm_file_name = os.path.join(cfg.dir2tf, "user_models/{0}/bc_dbase/2d_bc_{0}.csv".format(self._name))
+        self.tef_file_name = os.path.join(cfg.dir2tf, "user_models/{0}/runs/{0}.tef".format(self._name))
+        self.tcf_file_name = os.path.join(cfg.dir2tf, "user_models/{0}/runs/{0}.tcf".format(self._name))
 
         self.file_par_dict = {"Geometry Control File": self.tgc_file_name, "BC Control File": self.tbc_file_name,
                               "BC Database": self.bcm_file_name, "Event File": self.tef_file_name}
@@ -393,33 +1099,150 @@ class Hy2OptModel(ModelControl, ModelGeoControl, ModelEvents):
 
     def sign_model(self, par_group):
         """ Model signature that tells the model that parameters for par_group were already written once. """
-        f_model = open(self.model_file, "a+")
-        if not (par_group + "::signature::True" in open(self.model_file).read()):
-            f_model.write(par_group + "::signature::True\n")
-            f_model.truncate()
+        with self.batch():
+            if par_group not in self._pending_signatures:
+                self._pending_signatures.append(par_group)
 
     def signature_verification(self, par_group):
-        if os.path.isfile(self.model_file):
-            if par_group + "::signature::True" in open(self.model_file).read():
-                return True
-            else:
-                if (par_group == "bce") and ("gbc::signature::True" in open(self.model_file).read()):
-                    return True
-        return False  # all other ...
+        return self.signatures([par_group])[par_group]
+
+    def signatures(self, par_groups=None):
+        """
+        Signature status of parameter groups from a single read of the model file header
+        :param par_groups: LIST of par_groups (default: all keys of self.default_dicts)
+        :return: DICT of {par_group: BOOL}
+        """
+        signed = self.read_model_signatures() + self._pending_signatures
+        if par_groups is None:
+            par_groups = self.default_dicts.keys()
+        # "bce" is also considered signed if the boundary geometry ("gbc") was written
+        return {par_group: (par_group in signed) or ((par_group == "bce") and ("gbc" in signed))
+                for par_group in par_groups}
+
+    def validate_export(self, msg):
+        """
+        Validates the loaded model before anything is written (see cValidation)
+        :param msg: LIST of STR of messages (warnings and errors are appended)
+        :return: BOOL (False if the model has errors)
+        """
+        validator = cValidation.get_validator()
+        issues = validator.validate(self)
+        validator.write_cache()
+        errors = cValidation.get_errors(issues)
+        msg += [issue for issue in issues if issue not in errors]
+        if errors:
+            msg.append("ERROR: {0} is not valid - no Tuflow files were written:\n".format(str(self._name)) +
+                       "\n".join(errors))
+        return not errors
+
+    def write_export_manifest(self, hashes):
+        """
+        :param hashes: DICT of {file type: hash} of exported files
+        """
+        try:
+            fGl.write_file_if_changed(self.get_export_manifest_name(), json.dumps(hashes, indent=1, sort_keys=True))
+        except OSError:
+            print("WARNING: Could not write %s (the next export will re-write all files)." % self.get_export_manifest_name())
+
+    def write_model_file(self, content):
+        """
+        Replaces the model file with content through a temporary file (the model file is never half-written)
+        :param content: STR of the complete model file content
+        """
+        try:
+            fGl.write_file_atomic(self.model_file, content)
+            model_cache.invalidate(self.model_file)
+            cCatalog.sync_if_enabled(self.model_file)
+        finally:
+            self.invalidate_model_index()
 
     def write_parameter(self, par_group, par):
-        write_str = "{0}::{1}::".format(par_group, par)
-        if os.path.isfile(self.model_file):
-            if write_str in open(self.model_file).read():
-                self.replace_model_par(write_str, write_str + self.par_dict[par_group][par] + "\n")
-                return 0
-            f_model = open(self.model_file, "a+")
-        else:
-            f_model = open(self.model_file, "w")
-        # f_model.seek(0)
-        f_model.write(write_str + self.par_dict[par_group][par] + "\n")
-        f_model.truncate()
+        """
+        Writes the current value of a parameter to the model file (same format as encode_model_par)
+        Raises TypeError if the parameter was never loaded or set (i.e., it is still the TUPLE of default choices)
+        """
+        par_table = self.par_dict[par_group]
+        if isinstance(par_table, DefaultTable) and not par_table.is_overridden(par):
+            raise TypeError("Parameter {0}::{1} has no selected value (load_model or set_usr_parameters first)."
+                            .format(par_group, par))
+        with self.batch():
+            self._pending_pars[(par_group, par)] = self.encode_model_par(par_table[par])
 
     def __call__(self, *args, **kwargs):
         print("Class Info: <type> = Hy2OptModel (Tuflow) (%s)" % os.path.dirname(__file__))
         print(dir(self))
+
+
+class ModelCache:
+    def __init__(self, max_size=16):
+        """
+        Process-wide cache of Hy2OptModel states that are shared (reference-counted) by all GUI frames of a model
+        Entries are keyed by model file + modification time, so that a changed model file results in a new parse
+        :param max_size: INT of maximum number of cached models - unreferenced entries are evicted first (LRU)
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()  # {(model_file, mtime_ns): [Hy2OptModel, INT of references]}
+        self._lock = threading.RLock()
+
+    def acquire(self, model_name):
+        """
+        Returns the shared Hy2OptModel of model_name (parses the model file only if no current state is cached)
+        Every acquire() must be matched by a release() of the returned model
+        :param model_name: STR
+        :return: Hy2OptModel
+        """
+        model_file = cfg.dir2tf + "models/" + str(model_name) + ".hy2model"
+        key = self.get_key(model_file)
+        with self._lock:
+            if key not in self._entries:
+                model = Hy2OptModel(str(model_name))
+                model.read_model_file()
+                self._entries[key] = [model, 0]
+            self._entries.move_to_end(key)
+            self._entries[key][1] += 1
+            model = self._entries[key][0]
+            self.evict()
+        return model
+
+    def evict(self):
+        """Removes least recently used, unreferenced entries until the cache has max_size entries"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if self._entries.__len__() <= self.max_size:
+                    break
+                if self._entries[key][1] < 1:
+                    del self._entries[key]
+
+    @staticmethod
+    def get_key(model_file):
+        try:
+            return model_file, os.stat(model_file).st_mtime_ns
+        except OSError:
+            return model_file, None
+
+    def invalidate(self, model_file=None):
+        """
+        Drops cached states of model_file (all models if None) - models that are still in use remain valid for
+        their holders, but the next acquire() returns a fresh parse
+        :param model_file: STR of full path to a .hy2model file
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if (model_file is None) or (os.path.abspath(key[0]) == os.path.abspath(model_file)):
+                    del self._entries[key]
+
+    def release(self, model):
+        """Decrements the reference count of a model obtained from acquire()"""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry[0] is model:
+                    entry[1] = max(entry[1] - 1, 0)
+                    break
+            self.evict()
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ModelCache (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+model_cache = ModelCache()  # shared by all frames of the process
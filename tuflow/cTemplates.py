@@ -0,0 +1,286 @@
+try:
+    import os, functools, threading
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import contextmanager
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, functools, threading, concurrent, contextlib).")
+try:
+    import fGlobal as fGl
+except:
+    print("ImportERROR: Cannot find Hy2Opt.pypool.fGlobal")
+
+
+class ControlFileTemplate:
+    def __init__(self, f_type, steps):
+        """
+        Layout of a Tuflow control file (.tcf, .tgc, .tbc) that is compiled once per process (see get_template) and
+        renders models into an in-memory buffer, which is written to disk in one call
+        :param f_type: STR of control file type (e.g., "tcf")
+        :param steps: LIST of compiled layout steps (callables (model, lines) that append lines)
+        """
+        self.f_type = f_type
+        self.steps = steps
+
+    def render(self, model):
+        """
+        :param model: Hy2OptModel
+        :return: STR of control file content
+        """
+        lines = []
+        for step in self.steps:
+            step(model, lines)
+        return "".join(lines)
+
+    def render_many(self, models):
+        """
+        Renders many models against the same compiled layout
+        :param models: iterable of Hy2OptModel
+        :return: generator of TUPLEs (model, STR of control file content)
+        """
+        for model in models:
+            yield model, self.render(model)
+
+    def write(self, model, file_name, stats=None):
+        """
+        Renders model and writes the control file with a single write call (skipped if the file content is unchanged)
+        :param model: Hy2OptModel
+        :param file_name: STR of full path to the control file
+        :param stats: DICT (optional) of write statistics (see fGlobal.new_write_stats)
+        :return: BOOL (True if the file was written)
+        """
+        return fGl.write_file_if_changed(file_name, self.render(model), stats)
+
+    def write_many(self, models, file_names, workers=8, stats=None):
+        """
+        Writes the control files of many models (rendering and disk I/O run on a pool of worker threads)
+        :param models: LIST of Hy2OptModel
+        :param file_names: LIST of full paths to the control files (same order as models)
+        :param workers: INT of number of threads
+        :param stats: DICT (optional) of write statistics (see fGlobal.new_write_stats)
+        :return: LIST of STR of error messages (empty if all files were written)
+        """
+        def write_file(args):
+            try:
+                self.write(*args, stats=stats)
+            except OSError as e:
+                return "ERROR: Could not write {0} ({1}).".format(args[1], str(e))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return [msg for msg in executor.map(write_file, zip(models, file_names)) if msg]
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ControlFileTemplate (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+# parameters with these name prefixes/suffixes are files, which are written as paths relative to the runs folder
+path_prefixes = ("Read",)
+path_suffixes = ("Database", "projection", "File")
+
+layout_version = 2  # increase when the rendered output of a layout or formatter changes (changes all export hashes)
+issue_collectors = threading.local()  # messages of formatters are collected instead of printed (see collect_issues)
+par_formatters = {}  # compiled parameter formatters {par: function} (see compile_par)
+templates = {}  # compiled ControlFileTemplates {f_type: ControlFileTemplate} (see get_template)
+templates_lock = threading.Lock()
+
+
+def compile_par(par):
+    """
+    Compiles the Tuflow formatting rules of a parameter once (formerly re-evaluated by Hy2OptModel.export_par for
+    every written line)
+    :param par: STR of parameter name
+    :return: function (model, val) returning a STR of "par == val" line ("" if nothing is written)
+    """
+    try:
+        return par_formatters[par]
+    except KeyError:
+        pass
+    head = "{0} == ".format(par)
+
+    def format_value(val):
+        if type(val) == tuple:
+            val = str(val)[1:-1]
+        if val != "":
+            return head + "{0}\n".format(val)
+        report_issue("ERROR: Missing parameter: {0}.".format(par), par)
+        return ""
+
+    if par.startswith(path_prefixes) or par.endswith(path_suffixes):
+        skip_empty_msg = "Missing GIS Mat file (OK if uniform Manning\'s n applied) ..." if par == "Read GIS Mat" else ""
+
+        def format_par(model, val):
+            if val == "":
+                report_issue(skip_empty_msg if skip_empty_msg else "ERROR: Missing file definition for {0}.".format(par),
+                             par)
+                return ""
+            return format_value(model.par2tf_path(par, val))
+    elif par == "Map Output Format":
+        def format_par(model, val):
+            return format_value("GRID XMDF" if val == "ALL" else val)
+    else:
+        def format_par(model, val):
+            return format_value(val)
+
+    return par_formatters.setdefault(par, format_par)
+
+
+@contextmanager
+def collect_issues():
+    """
+    Collects the messages of parameter formatters (e.g., missing parameters) that are rendered in the current thread
+    instead of printing them - used to validate models without writing files
+    :return: LIST of TUPLEs (STR of parameter, STR of message) (filled while the context is active)
+    """
+    previous = getattr(issue_collectors, "issues", None)
+    issue_collectors.issues = []
+    try:
+        yield issue_collectors.issues
+    finally:
+        issue_collectors.issues = previous
+
+
+@functools.lru_cache(maxsize=65536)
+def get_relative_path(path, start):
+    """
+    Cached relative_path (model variants refer to the same stored assets - see cAssets - from runs folders with
+    the same depth)
+    :return: STR of relative path
+    """
+    return relative_path(path, start)
+
+
+def relative_path(path, start):
+    """
+    Same as os.path.relpath, but the absolute path components of path and start are cached (the control files of many
+    models refer to the same files and folders)
+    :return: STR of relative path
+    """
+    if not (os.path.isabs(path) and os.path.isabs(start)):
+        return os.path.relpath(path, start)
+    path_drive, path_parts, path_keys = split_path(path)
+    start_drive, start_parts, start_keys = split_path(start)
+    if path_drive != start_drive:
+        return os.path.relpath(path, start)
+    i = 0
+    for start_key, path_key in zip(start_keys, path_keys):
+        if start_key != path_key:
+            break
+        i += 1
+    rel_parts = [os.pardir] * (start_parts.__len__() - i) + list(path_parts[i:])
+    return os.sep.join(rel_parts) if rel_parts else os.curdir  # parts contain no separators (no os.path.join needed)
+
+
+def report_issue(msg, par=None):
+    """
+    Prints msg or adds it to the active collect_issues context of the current thread
+    :param msg: STR of message
+    :param par: STR (optional) of the parameter the message refers to
+    """
+    issues = getattr(issue_collectors, "issues", None)
+    if issues is None:
+        print(msg)
+    else:
+        issues.append((par, msg))
+
+
+@functools.lru_cache(maxsize=4096)
+def split_path(path):
+    """
+    :param path: STR of absolute path
+    :return: TUPLE of (STR of drive, TUPLE of path components, TUPLE of normcased path components)
+    """
+    drive, rest = os.path.splitdrive(os.path.abspath(path))
+    parts = tuple(part for part in rest.split(os.sep) if part)
+    return os.path.normcase(drive), parts, tuple(part for part in os.path.normcase(rest).split(os.sep) if part)
+
+
+def group(source, exclude=(), tf_par=None, prefixes=None):
+    """
+    Layout step that writes all parameters of a parameter group
+    :param source: STR of par_group (in model.par_dict) or function (model) returning a DICT of {par: val}
+    :param exclude: TUPLE of excluded parameters or function (model) returning a TUPLE of excluded parameters
+    :param tf_par: STR (optional) - Tuflow parameter name used for all parameters of the group (e.g., Read GIS PO)
+    :param prefixes: DICT (optional) of {par: (val, STR of line)} - line is written before par if par has val
+    :return: compiled layout step
+    """
+    get_pars = source if callable(source) else (lambda model: model.par_dict[source])
+    get_exclude = exclude if callable(exclude) else (lambda model: exclude)
+    prefixes = prefixes if prefixes else {}
+    formatter = compile_par(tf_par) if tf_par else None
+
+    def step(model, lines):
+        excluded = get_exclude(model)
+        for par, val in get_pars(model).items():
+            if prefixes and (par in prefixes) and (val == prefixes[par][0]):
+                lines.append(prefixes[par][1])
+            if par not in excluded:
+                lines.append((formatter or par_formatters.get(par) or compile_par(par))(model, val))
+    return step
+
+
+def literal(text):
+    """
+    Layout step that writes fixed text
+    :param text: STR (can contain the field {name} for the model name)
+    :return: compiled layout step
+    """
+    if "{name}" not in text:
+        return lambda model, lines: lines.append(text)
+    return lambda model, lines: lines.append(text.format(name=model.name))
+
+
+def parameter(par_group, par):
+    """
+    Layout step that writes one parameter
+    :return: compiled layout step
+    """
+    formatter = compile_par(par)
+    return lambda model, lines: lines.append(formatter(model, model.par_dict[par_group][par]))
+
+
+def stab_excludes(model):
+    """:return: TUPLE of stability parameters that are not written to the .tcf file"""
+    if model.par_dict['stab']['Viscosity Formulation'] == "SMAGORINSKY":
+        return "Cell Size", "Set IWL", "Constant Viscosity Coefficient"
+    return "Cell Size", "Set IWL", "Viscosity Coefficients"
+
+
+def layout_tbc():
+    return [group("gbc")]
+
+
+def layout_tcf():
+    return [literal("GIS Format == SHP\n"),
+            parameter("gctrl", "SHP projection"),
+            group("ctrl", exclude=("License", "Model Precision"), prefixes={"License": ("demo", "Demo Model == ON\n")}),
+            group(lambda model: model.file_par_dict),
+            group("po", tf_par="Read GIS PO"),
+            group("stab", exclude=stab_excludes),
+            # hard-coded output locations
+            literal("Log Folder == Log\\\n"
+                    "Output Folder == ..\\results\\{name}\\{name}_<<~e1~>>\\\n"
+                    "Write Check Files == ..\\check\\{name}\\{name}_<<~e1~>>\\\n"),
+            group("out")]
+
+
+def layout_tgc():
+    return [group("gctrl", exclude=("SHP projection",)),
+            parameter("stab", "Cell Size"),
+            group("gmat")]
+
+
+layouts = {"tbc": layout_tbc, "tcf": layout_tcf, "tgc": layout_tgc}
+
+
+def get_template(f_type):
+    """
+    :param f_type: STR of control file type ("tcf", "tgc", or "tbc")
+    :return: ControlFileTemplate (compiled on the first call in a process)
+    """
+    try:
+        return templates[f_type]
+    except KeyError:
+        with templates_lock:
+            if f_type not in templates:
+                templates[f_type] = ControlFileTemplate(f_type, layouts[f_type]())
+        return templates[f_type]
@@ -0,0 +1,230 @@
+try:
+    import os, fnmatch, json, shutil, sys, threading
+    from concurrent.futures import ThreadPoolExecutor
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, fnmatch, json, shutil, sys, threading).")
+try:
+    import fcntl  # reflinks (Linux) - not available on Windows
+except ImportError:
+    fcntl = None
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+FICLONE = 0x40049409  # Linux ioctl that shares the blocks of a file (btrfs, xfs, ...) - copy on write
+
+# files of the source tree that are placeholders or templates of files written by the export (not provisioned)
+skip_patterns = ("__init__.py", "NAME*", "*/init/*")
+# read-only assets that may be hardlinked (other files, e.g., materials.csv, are edited in the model trees)
+hardlink_patterns = ("model/gis/*", "model/grid/*")
+
+
+class TreeProvisioner:
+    def __init__(self, source_directory=None, manifest_file=None, link_mode="auto"):
+        """
+        Creates user_models/<name>/ model trees from a cached manifest of the source tree (pyorigin/tf_tree): folders
+        are created and static assets are reflinked (copy on write) into the model trees - read-only GIS and grid
+        assets (hardlink_patterns) are hardlinked if the file system cannot reflink, and all other files (e.g., the
+        editable materials.csv) are copied - many variant trees take almost no extra disk space
+        Hardlinked files are shared with the source tree: fGlobal writers break the link before writing to them
+        :param source_directory: STR of full path of the source tree - must END WITH "/" (default: cfg.tf_source_tree)
+        :param manifest_file: STR of full path of the cached manifest (default: cfg.tf_tree_manifest)
+        :param link_mode: STR of "auto" (reflink, hardlink or copy), "reflink" (reflink or copy) or "copy"
+        """
+        self.source_directory = source_directory if source_directory else cfg.tf_source_tree
+        self.manifest_file = manifest_file if manifest_file else cfg.tf_tree_manifest
+        self.link_mode = link_mode
+        self.link_support = {}  # {(source device, target device): LIST of working link functions}
+        self.lock = threading.Lock()
+        self.manifest = self.load_manifest()
+
+    def build_manifest(self):
+        """
+        Walks the source tree once
+        :return: DICT of {"source": STR, "dirs": {rel. dir: mtime_ns}, "files": {rel. file: [size, mtime_ns]}}
+        """
+        manifest = {"source": self.source_directory, "dirs": {}, "files": {}}
+        for dirpath, dirnames, filenames in os.walk(self.source_directory):
+            rel_dir = os.path.relpath(dirpath, self.source_directory).replace(os.sep, "/")
+            manifest["dirs"][rel_dir] = os.stat(dirpath).st_mtime_ns
+            for name in filenames:
+                rel_file = name if rel_dir == "." else rel_dir + "/" + name
+                if any(fnmatch.fnmatch(rel_file, pattern) or fnmatch.fnmatch(name, pattern)
+                       for pattern in skip_patterns):
+                    continue
+                f_stat = os.stat(os.path.join(dirpath, name))
+                manifest["files"][rel_file] = [f_stat.st_size, f_stat.st_mtime_ns]
+        return manifest
+
+    def chk_manifest(self, manifest):
+        """
+        :param manifest: DICT (see build_manifest)
+        :return: BOOL (True if the manifest still describes the source tree - only the listed entries are checked,
+                 added or removed entries change the mtime of their folder)
+        """
+        if not manifest or manifest.get("source") != self.source_directory:
+            return False
+        try:
+            for rel_dir, mtime_ns in manifest["dirs"].items():
+                if os.stat(os.path.join(self.source_directory, rel_dir)).st_mtime_ns != mtime_ns:
+                    return False
+            for rel_file, (size, mtime_ns) in manifest["files"].items():
+                f_stat = os.stat(os.path.join(self.source_directory, rel_file))
+                if (f_stat.st_size, f_stat.st_mtime_ns) != (size, mtime_ns):
+                    return False
+        except (OSError, KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    @staticmethod
+    def get_device_key(source_file, target_file):
+        """:return: TUPLE of (source device, target device) or None"""
+        try:
+            return os.stat(source_file).st_dev, os.stat(os.path.dirname(target_file)).st_dev
+        except OSError:
+            return None
+
+    def get_link_functions(self, device_key):
+        """
+        :param device_key: TUPLE of (source device, target device) (see get_device_key)
+        :return: LIST of link functions to try (functions that failed for a pair of devices are not tried again)
+        """
+        with self.lock:
+            if device_key not in self.link_support:
+                funs = {"auto": [reflink_file, os.link], "reflink": [reflink_file], "copy": []}[self.link_mode]
+                self.link_support[device_key] = [fun for fun in funs if (fun != reflink_file) or fcntl]
+            return list(self.link_support[device_key])
+
+    def link_file(self, source_file, target_file, hardlink=True):
+        """
+        Reflinks, hardlinks or copies source_file to target_file
+        :param hardlink: BOOL - if False, the file is reflinked or copied (for files that are edited in place)
+        :return: STR of the used method ("reflink", "hardlink" or "copy")
+        """
+        device_key = self.get_device_key(source_file, target_file)
+        for fun in self.get_link_functions(device_key):
+            if fun == os.link and not hardlink:
+                continue
+            try:
+                fun(source_file, target_file)
+                return "reflink" if fun == reflink_file else "hardlink"
+            except OSError:
+                if fun == reflink_file:
+                    fGl.rm_file(target_file)  # empty file created before the clone failed
+                with self.lock:
+                    if fun in self.link_support[device_key]:
+                        self.link_support[device_key].remove(fun)
+        shutil.copy2(source_file, target_file)
+        return "copy"
+
+    def load_manifest(self):
+        """
+        :return: DICT of the cached manifest if it is still valid, otherwise of a new manifest (which is cached)
+        """
+        try:
+            with open(self.manifest_file, "r") as f:
+                manifest = json.load(f)
+            if self.chk_manifest(manifest):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        manifest = self.build_manifest()
+        try:
+            fGl.write_file_if_changed(self.manifest_file, json.dumps(manifest, indent=1, sort_keys=True))
+        except OSError:
+            print("WARNING: Could not cache the model tree manifest (%s)." % self.manifest_file)
+        return manifest
+
+    def provision(self, target_directory, stats=None):
+        """
+        Creates the folders of the source tree in target_directory and links the static assets that are missing
+        (existing files are not touched)
+        :param target_directory: STR of full path of target directory - must END WITH "/"
+        :param stats: DICT (optional) of {method: INT of number of files} (updated with the used link methods)
+        :return: BOOL: False if new model, True if model already exists
+        """
+        exists = os.path.isdir(target_directory)
+        for rel_dir in sorted(self.manifest["dirs"].keys()):
+            os.makedirs(os.path.join(target_directory, rel_dir), exist_ok=True)
+        for rel_file in self.manifest["files"].keys():
+            source_file = os.path.join(self.source_directory, rel_file)
+            target_file = os.path.join(target_directory, rel_file)
+            hardlink = chk_hardlink(rel_file)
+            if os.path.lexists(target_file):
+                if hardlink or not chk_same_file(source_file, target_file):
+                    continue
+                fGl.rm_file(target_file)  # editable file that an earlier version hardlinked to the source tree
+            method = self.link_file(source_file, target_file, hardlink)
+            if stats is not None:
+                with self.lock:
+                    stats[method] = stats.get(method, 0) + 1
+        if exists:
+            print("\nOverwriting: {}\n".format(target_directory))
+        return exists
+
+    def provision_many(self, target_directories, workers=8):
+        """
+        Provisions many model trees on a pool of worker threads
+        :param target_directories: iterable of STR of full paths of target directories (ending with "/")
+        :param workers: INT of number of threads
+        :return: DICT of {method: INT of number of files} (e.g., {"hardlink": 50000})
+        """
+        stats = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda target: self.provision(target, stats), target_directories))
+        return stats
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = TreeProvisioner (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+provisioners = {}  # {(source directory, link mode): TreeProvisioner} - the manifest is loaded once per process
+provisioners_lock = threading.Lock()
+
+
+def chk_hardlink(rel_file):
+    """:return: BOOL (True if the file of the source tree may be hardlinked, see hardlink_patterns)"""
+    return any(fnmatch.fnmatch(rel_file, pattern) for pattern in hardlink_patterns)
+
+
+def chk_same_file(file_1, file_2):
+    """:return: BOOL (True if both names point to the same file, e.g., hardlinks)"""
+    try:
+        return os.path.samefile(file_1, file_2)
+    except OSError:
+        return False
+
+
+def get_provisioner(source_directory=None, link_mode="auto"):
+    """
+    :return: TreeProvisioner of source_directory (created on the first call in a process)
+    """
+    key = (source_directory if source_directory else cfg.tf_source_tree, link_mode)
+    with provisioners_lock:
+        if key not in provisioners:
+            provisioners[key] = TreeProvisioner(key[0], link_mode=link_mode)
+        return provisioners[key]
+
+
+def provision_tree(target_directory, source_directory=None):
+    """
+    Creates a model tree from the cached source tree manifest (replaces fGlobal.copy_tree for model trees)
+    :param target_directory: STR of full path of target directory - must END WITH "/"
+    :param source_directory: STR (optional) of full path of the source tree (default: cfg.tf_source_tree)
+    :return: BOOL: False if new model, True if model already exists
+    """
+    return get_provisioner(source_directory).provision(target_directory)
+
+
+def reflink_file(source_file, target_file):
+    """
+    Creates target_file as a copy-on-write clone of source_file (raises OSError if the file system cannot clone)
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError("Reflinks are not supported on this platform.")
+    with open(source_file, "rb") as src, open(target_file, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source_file, target_file)
@@ -0,0 +1,254 @@
+try:
+    import os, hashlib, json, threading
+    from collections import OrderedDict, deque
+    from concurrent.futures import ThreadPoolExecutor
+except:
+    print("ImportERROR: Missing fundamental packages (required: os, hashlib, json, threading, collections, concurrent).")
+try:
+    import fGlobal as fGl
+    import config_core as cfg
+    import cHydrographs
+    import cTemplates
+except:
+    print("ImportERROR: Cannot find pypool.")
+
+rules_version = 1  # increase when validation rules change (invalidates cached results)
+optional_file_pars = ("Read GIS Mat", "Read GIS PO (pts)", "Read GIS PO (lns)")  # missing files are warnings
+validated_groups = ("ctrl", "stab", "out", "gctrl", "gmat", "gbc", "po")  # par_groups written to Tuflow files
+
+
+class ModelValidator:
+    def __init__(self, cache_file=None, max_event_errors=20):
+        """
+        Checks all parameter groups, referenced files and events of models before any Tuflow file is written
+        Results are cached per model key (parameters, boundaries and stamps of all referenced files), so unchanged
+        models are not validated again
+        :param cache_file: STR of full path of the cache file (default: cfg.tf_validation_cache)
+        :param max_event_errors: INT of number of event errors after which the events of a model are not checked further
+        """
+        self.cache_file = cache_file if cache_file else cfg.tf_validation_cache
+        self.max_event_errors = max_event_errors
+        self.lock = threading.Lock()
+        self.cache = self.read_cache()  # {model name: {"key": STR, "sources": LIST of stamps, "issues": LIST}}
+        self.cache_changed = False
+
+    def chk_cached(self, name, key):
+        """:return: LIST of STR of cached issues of a model (None if the model or a referenced CSV file changed)"""
+        with self.lock:
+            entry = self.cache.get(name)
+        if not entry or entry.get("key") != key:
+            return None
+        for csv_file, mtime_ns, size in entry.get("sources", []):
+            if get_stamp(csv_file) != [mtime_ns, size]:
+                return None
+        return list(entry["issues"])
+
+    def get_model_key(self, model):
+        """
+        :param model: Hy2OptModel (with loaded parameters and boundary names)
+        :return: STR of hex digest of everything that is validated (except CSV files of events, see chk_cached)
+        """
+        hasher = hashlib.sha1(repr((rules_version, model.name, model.bc_dict)).encode())
+        for par_group in validated_groups:
+            hasher.update(repr((par_group, list(model.par_dict[par_group].items()))).encode())
+        for par_group, par, val in get_file_pars(model):
+            hasher.update(repr((par, get_stamp(str(val)))).encode())
+        event_file = model.get_event_file_name()
+        hasher.update(repr((event_file, get_stamp(event_file))).encode())
+        return hasher.hexdigest()
+
+    def read_cache(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def validate(self, model):
+        """
+        Validates a model (served from the cache if nothing changed since the last validation)
+        :param model: Hy2OptModel (with loaded parameters and boundary names, see Hy2OptModel.export_as_tf)
+        :return: LIST of STR of issues ("ERROR: ..." messages prevent the export, others are warnings)
+        """
+        key = self.get_model_key(model)
+        issues = self.chk_cached(model.name, key)
+        if issues is not None:
+            return issues
+        issues = self.validate_pars(model) + self.validate_files(model)
+        event_issues, sources = self.validate_events(model)
+        issues += event_issues
+        with self.lock:
+            self.cache[model.name] = {"key": key, "sources": sources, "issues": issues}
+            self.cache_changed = True
+        return issues
+
+    def validate_batch(self, models, workers=8, fail_fast=True):
+        """
+        Validates many models on a pool of worker threads (models are loaded like in Hy2OptModel.export_as_tf)
+        :param models: iterable of STR of model names (or Hy2OptModel objects)
+        :param workers: INT of number of threads
+        :param fail_fast: BOOL - if True, no further models are validated after the first model with errors
+        :return: OrderedDict of {model name: LIST of STR of issues} of the validated models (in the order of models)
+        """
+        results = OrderedDict()
+
+        def collect(future):
+            name, issues = future.result()
+            results[name] = issues
+            return fail_fast and bool(get_errors(issues))
+
+        failed = False
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for model in models:
+                pending.append(executor.submit(self.validate_model, model))
+                while pending and (pending.__len__() >= workers * 4 or pending[0].done()):
+                    failed = collect(pending.popleft())
+                    if failed:
+                        break
+                if failed:
+                    break
+            while pending and not failed:
+                failed = collect(pending.popleft())
+            for future in pending:
+                future.cancel()
+        self.write_cache()
+        return results
+
+    def validate_events(self, model):
+        """
+        Checks that every event defines all boundaries with numbers or readable time series
+        :return: TUPLE of (LIST of STR of issues, LIST of [STR of CSV file, mtime_ns, size] of referenced CSV files)
+        """
+        if not os.path.isfile(model.get_event_file_name()):
+            return [], []
+        columns = [col for key in ("sa", "bc") if isinstance(model.bc_dict[key], list) for col in model.bc_dict[key]]
+        base_dir = cfg.dir2tf + "models/"
+        issues = []
+        sources = {}
+        for e, e_defs in model.iter_events():
+            missing = [col for col in columns if col not in e_defs]
+            if missing:
+                issues.append("ERROR: Event {0} has no value for {1}.".format(str(e), ", ".join(missing)))
+            for col in columns:
+                val = e_defs.get(col)
+                if val is None:
+                    continue
+                if cHydrographs.is_series(val):
+                    if val.startswith("csv:"):
+                        csv_file = cHydrographs.get_csv_source(val, base_dir)[0]
+                        sources[csv_file] = [csv_file] + get_stamp(csv_file)
+                    try:
+                        cHydrographs.read_series(val, base_dir)
+                    except Exception as ex:
+                        issues.append("ERROR: Event {0}: cannot read the time series of {1} ({2}).".format(
+                            str(e), col, str(ex)))
+                else:
+                    try:
+                        float(val)
+                    except ValueError:
+                        issues.append("ERROR: Event {0}: {1} is not a number ({2}).".format(str(e), col, str(val)))
+            if issues.__len__() >= self.max_event_errors:
+                issues.append("ERROR: Too many event errors - further events were not checked.")
+                break
+        return issues, list(sources.values())
+
+    @staticmethod
+    def validate_files(model):
+        """:return: LIST of STR of issues of files referenced by parameters (must be defined and exist)"""
+        issues = []
+        for par_group, par, val in get_file_pars(model):
+            if chk_unset(val):
+                if par in optional_file_pars:
+                    issues.append("WARNING: {0} is not defined (optional).".format(par))
+                else:
+                    issues.append("ERROR: Missing file definition for {0}.".format(par))
+            elif not os.path.isfile(str(val)):
+                issues.append("ERROR: File of {0} not found: {1}.".format(par, str(val)))
+        return issues
+
+    @staticmethod
+    def validate_pars(model):
+        """
+        Renders the Tuflow control files in memory and collects the messages of the parameter formatters (the same
+        rules as the export, without writing files) - file parameters are checked by validate_files
+        :return: LIST of STR of issues
+        """
+        file_pars = set(par for par_group, par, val in get_file_pars(model))
+        with cTemplates.collect_issues() as issues:
+            for f_type in ("tgc", "tbc", "tcf"):
+                cTemplates.get_template(f_type).render(model)
+        # parameters written to several files are reported once
+        return list(OrderedDict.fromkeys(msg for par, msg in issues if par not in file_pars))
+
+    def validate_model(self, model):
+        """
+        :param model: STR of model name or Hy2OptModel (loaded here)
+        :return: TUPLE of (STR of model name, LIST of STR of issues)
+        """
+        if isinstance(model, str):
+            import cTFmodel
+            model = cTFmodel.Hy2OptModel(model)
+        model.get_boundary_sa_names()
+        model.get_boundary_bc_names()
+        model.load_model()
+        return model.name, self.validate(model)
+
+    def write_cache(self):
+        """Writes the validation results (if any model was validated)"""
+        with self.lock:
+            if not self.cache_changed:
+                return
+            content = json.dumps(self.cache, indent=1, sort_keys=True)
+            self.cache_changed = False
+        try:
+            fGl.write_file_atomic(self.cache_file, content)
+        except OSError:
+            print("WARNING: Could not write the validation cache (%s)." % self.cache_file)
+
+    def __call__(self, *args, **kwargs):
+        print("Class Info: <type> = ModelValidator (%s)" % os.path.dirname(__file__))
+        print(dir(self))
+
+
+validators = {}  # {STR of cache file: ModelValidator}
+validators_lock = threading.Lock()
+
+
+def chk_unset(val):
+    """:return: BOOL (True if val is empty, None, or the stored form of an empty default such as ('',))"""
+    if val is None:
+        return True
+    text = "".join(str(v) for v in val) if isinstance(val, (list, tuple)) else str(val)
+    return text.strip("()[]'\" ,") in ("", "None")
+
+
+def get_errors(issues):
+    """:return: LIST of STR of the errors in issues (issues that prevent the export)"""
+    return [issue for issue in issues if str(issue).startswith("ERROR")]
+
+
+def get_file_pars(model):
+    """:return: generator of TUPLEs (par_group, par, val) of parameters that refer to files"""
+    for par_group in validated_groups:
+        for par, val in model.par_dict[par_group].items():
+            if par.startswith(cTemplates.path_prefixes) or par.endswith(cTemplates.path_suffixes):
+                yield par_group, par, val
+
+
+def get_stamp(file_name):
+    """:return: LIST of [mtime_ns, size] of a file ([None, None] if it does not exist)"""
+    try:
+        f_stat = os.stat(file_name)
+        return [f_stat.st_mtime_ns, f_stat.st_size]
+    except (OSError, TypeError, ValueError):
+        return [None, None]
+
+
+def get_validator(cache_file=None):
+    """:return: ModelValidator (created on the first call in a process)"""
+    cache_file = cache_file if cache_file else cfg.tf_validation_cache
+    with validators_lock:
+        if cache_file not in validators:
+            validators[cache_file] = ModelValidator(cache_file)
+        return validators[cache_file]
@@ -0,0 +1,102 @@
+"""
+Fake Tuflow solver for testing runs without a Tuflow installation (see cRuns and Hy2OptModel.run_model)
+Accepts the Tuflow command line, reads the event from the .tef file next to the .tcf file, prints Tuflow-like progress
+lines, and writes synthetic results (log file and PO time series) to the folders defined in Hy2Opt .tcf files
+Usage:  python fake_tuflow.py -b -e1 EVENT path/to/model.tcf
+Environment variables (optional):
+        FAKE_TUFLOW_STEPS        INT of number of output steps (default: 20)
+        FAKE_TUFLOW_STEP_TIME    FLOAT of seconds of wall time per step (default: 0.05)
+        FAKE_TUFLOW_FAIL_EVENTS  comma-separated events that stop with an error (exit code 1)
+        FAKE_TUFLOW_HANG_EVENTS  comma-separated events that never finish (for timeouts)
+        FAKE_TUFLOW_DIVERGE_EVENTS  comma-separated events that become unstable after a third of the steps (growing
+                                    mass error and collapsing timestep, but the run continues and finishes)
+"""
+import os, sys, math, time
+
+
+def get_events(env_name):
+    return [e.strip() for e in os.environ.get(env_name, "").split(",") if e.strip()]
+
+
+def parse_args(argv):
+    """:return: TUPLE of (STR of event, STR of .tcf file)"""
+    event, tcf_file = "", None
+    i = 0
+    while i < argv.__len__():
+        if argv[i].lower() == "-e1" and i + 1 < argv.__len__():
+            event = argv[i + 1]
+            i += 1
+        elif argv[i].lower().endswith(".tcf"):
+            tcf_file = argv[i]
+        i += 1
+    return event, tcf_file
+
+
+def read_end_time(tef_file, event):
+    """:return: FLOAT of End Time [h] of an event in the .tef file (1.0 if not defined)"""
+    try:
+        with open(tef_file, "r") as f:
+            in_event = False
+            for line in f:
+                key, sep, val = line.strip().partition("==")
+                if key.strip() == "Define Event":
+                    in_event = val.strip() == event
+                elif in_event and key.strip() == "End Time":
+                    return float(val)
+    except (OSError, ValueError):
+        pass
+    return 1.0
+
+
+def main(argv):
+    event, tcf_file = parse_args(argv)
+    if not tcf_file or not os.path.isfile(tcf_file):
+        print("ERROR 0001: Cannot open .tcf file {0}".format(tcf_file))
+        return 1
+    runs_dir = os.path.dirname(os.path.abspath(tcf_file))
+    name = os.path.splitext(os.path.basename(tcf_file))[0]
+    run_name = "{0}_{1}".format(name, event) if event else name
+    end_time = read_end_time(os.path.join(runs_dir, name + ".tef"), event)
+    steps = int(os.environ.get("FAKE_TUFLOW_STEPS", 20))
+    step_time = float(os.environ.get("FAKE_TUFLOW_STEP_TIME", 0.05))
+    log_dir = os.path.join(runs_dir, "Log")
+    result_dir = os.path.join(runs_dir, "..", "results", name, run_name)
+    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(result_dir, exist_ok=True)
+
+    with open(os.path.join(log_dir, run_name + ".tlf"), "w") as tlf:
+        tlf.write("Fake TUFLOW\nInput file: {0}\nEvent: {1}\nEnd Time == {2:g}\n".format(tcf_file, event, end_time))
+        print("Simulation STARTED: {0}".format(run_name), flush=True)
+        series = []
+        step = 0
+        diverge = event in get_events("FAKE_TUFLOW_DIVERGE_EVENTS")
+        while step <= steps:
+            t = end_time * step / steps
+            flow = 10.0 + 90.0 * math.exp(-((t - end_time / 3.) / (end_time / 6. + 1e-9)) ** 2)
+            series.append((t, flow))
+            unstable = max(step - steps // 3, 0) if diverge else 0
+            line = "Time {0:10.4f} h  dt {1:6.3g} s  Wet Cells {2:8d}  Neg Depths {3:4d}  Mass Error {4:7.3f}%".format(
+                t, 1.0 / 4 ** unstable, 1000 + int(flow * 10), 10 * unstable, 0.01 * 5 ** unstable)
+            print(line, flush=True)
+            tlf.write(line + "\n")
+            tlf.flush()
+            if event in get_events("FAKE_TUFLOW_FAIL_EVENTS") and step == steps // 2:
+                print("ERROR 2008: Simulation unstable (fake failure of event {0}).".format(event), flush=True)
+                tlf.write("Simulation INTERRUPTED\n")
+                return 1
+            time.sleep(step_time)
+            if event in get_events("FAKE_TUFLOW_HANG_EVENTS") and step == steps // 2:
+                continue  # does not advance
+            step += 1
+        tlf.write("Simulation FINISHED\n")
+
+    with open(os.path.join(result_dir, run_name + "_PO.csv"), "w") as f:
+        f.write("Time (h),Flow (m3/s)\n")
+        for t, flow in series:
+            f.write("{0:g},{1:.4f}\n".format(t, flow))
+    print("Simulation FINISHED: {0}".format(run_name), flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
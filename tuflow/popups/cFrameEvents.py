@@ -16,10 +16,11 @@ class EventMaker(tk.Frame):
         :param options: relief, ...
         """
         Frame.__init__(self, master, **options)
+        self.model_released = False
         if not model_name:
-            self.mbce = cTFmodel.Hy2OptModel("default")
+            self.mbce = cTFmodel.model_cache.acquire("default")
         else:
-            self.mbce = cTFmodel.Hy2OptModel(model_name)
+            self.mbce = cTFmodel.model_cache.acquire(model_name)
             self.mbce.overwrite_defaults(section_name)
         self.sn = section_name
         self.number_of_events = 1
@@ -79,6 +80,12 @@ class EventMaker(tk.Frame):
             msg1 = "Event definitions require the prior definition of a mode with a 2d_sa_MODEL_QT_R.shp file (Geometry Tab)."
             return msg0 + msg1, "red3"
 
+    def destroy(self):
+        if not self.model_released:
+            cTFmodel.model_cache.release(self.mbce)
+            self.model_released = True
+        tk.Frame.destroy(self)
+
     def make_up(self):
         for wid in self.winfo_children():
             try:
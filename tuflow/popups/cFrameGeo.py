@@ -2,6 +2,7 @@ try:
     from config import *
     from pop_mat import PopUpMat
     import cTFmodel
+    import cAssets
     from functools import partial
 except:
     print("ExceptionERROR: Cannot find pool.")
@@ -16,10 +17,11 @@ class GeoMaker(tk.Frame):
         :param options: relief, ...
         """
         Frame.__init__(self, master, **options)
+        self.model_released = False
         if not model_name:
-            self.mgeo = cTFmodel.Hy2OptModel("default")
+            self.mgeo = cTFmodel.model_cache.acquire("default")
         else:
-            self.mgeo = cTFmodel.Hy2OptModel(model_name)
+            self.mgeo = cTFmodel.model_cache.acquire(model_name)
             self.mgeo.overwrite_defaults(section_name)
         self.sn = section_name
         self.bg_color = self.mgeo.geo_bg_colors[self.sn]
@@ -77,7 +79,7 @@ class GeoMaker(tk.Frame):
             showinfo("ERROR", "Define shapefile for Read GIS Code first.", parent=self)
         else:
             try:
-                self.mgeo.default_dicts["gctrl"]["Grid Size (X,Y)"][0] = fGl.get_shp_extent(shp_file)
+                self.mgeo.set_default("gctrl", "Grid Size (X,Y)", fGl.get_shp_extent(shp_file))
                 self.par_objects["Grid Size (X,Y)"].delete(0, 'end')
                 self.par_objects["Grid Size (X,Y)"].insert(tk.END,
                                                      str(self.mgeo.default_dicts["gctrl"]["Grid Size (X,Y)"][0]).strip("()"))
@@ -86,6 +88,12 @@ class GeoMaker(tk.Frame):
                          "Grid Size calculation failed. Verify shapefile for Read GIS Location or enter manually.",
                          parent=self)
 
+    def destroy(self):
+        if not self.model_released:
+            cTFmodel.model_cache.release(self.mgeo)
+            self.model_released = True
+        tk.Frame.destroy(self)
+
     def make_up(self):
         for wid in self.winfo_children():
             try:
@@ -96,9 +104,21 @@ class GeoMaker(tk.Frame):
     def pop_mat(self):
         pop = PopUpMat(self.master)
         self.master.wait_window(pop.top)
-        self.mgeo.default_dicts[self.sn]["Read Materials File"][0] = str(pop.mat_file)
+        self.mgeo.set_default(self.sn, "Read Materials File", self.register_asset(pop.mat_file))
         self.select_file("Read Materials File")
 
+    def register_asset(self, path):
+        """
+        Adds a selected file to the asset store (model variants share one stored copy)
+        :param path: STR of selected file
+        :return: STR of stored file (or path if it cannot be stored)
+        """
+        try:
+            return cAssets.get_store().register(path) or str(path)
+        except OSError as e:
+            showinfo("WARNING", "Could not add %s to the asset store (%s)." % (str(path), str(e)), parent=self)
+            return str(path)
+
     def select_file(self, par):
         f_types = ('All', '*.*')
         if str(self.mgeo.geo_format_desc[par]).endswith(".shp"):
@@ -108,9 +128,8 @@ class GeoMaker(tk.Frame):
         if "materials" in str(par).lower():
             showinfo("Select", "Please select a material file (CSV format).", parent=self)
             f_types = ('Materials', '*.csv')
-        self.mgeo.default_dicts[self.sn][par][0] = askopenfilename(initialdir=dir2master,
-                                                                   title="Select " + self.mgeo.geo_format_desc[par],
-                                                                   filetypes=[f_types], parent=self)
+        self.mgeo.set_default(self.sn, par, self.register_asset(askopenfilename(
+            initialdir=dir2master, title="Select " + self.mgeo.geo_format_desc[par], filetypes=[f_types], parent=self)))
         self.par_objects[par].delete(0, 'end')
         self.par_objects[par].insert(tk.END, str(self.mgeo.default_dicts[self.sn][par][0]))
         if "2d_loc" in self.mgeo.default_dicts[self.sn][par][0]:
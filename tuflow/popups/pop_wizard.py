@@ -19,7 +19,7 @@ class Tab(tk.Frame):
         if __name__ != '__main__':
             self.master = self.winfo_toplevel()
         self.pack(expand=True, fill=tk.BOTH)
-        self.model = cTm.Hy2OptModel("default")
+        self.model = None  # private writer model (see get_writer_model) - model_cache states stay read-only
         self.changes_saved = False
 
         self.dir2model = '.'
@@ -39,7 +39,6 @@ class Tab(tk.Frame):
     def assign_model_name(self):
         if ("geo" in self.title.lower()) or ("event" in self.title.lower()):
             self.model_name.set(str(self.cbx_model.get()))
-            self.model.set_model_name(str(self.cbx_model.get()))
 
     def furnish(self):
         """
@@ -88,6 +87,20 @@ class Tab(tk.Frame):
         out_frame.grid(sticky=tk.EW, row=3, column=0, columnspan=3, pady=yd)
         self.frame_dict = {"ctrl": ctrl_frame, "stab": stab_frame, "out": out_frame}
 
+    def get_writer_model(self, model_name):
+        """
+        Private model that save_model writes the user strings into - the shared models of cTFmodel.model_cache are not
+        used because their par_dicts are the default tables of the GeoMaker and EventMaker frames
+        Created on the first save (opening a tab does not parse the model file once more than the frames)
+        :param model_name: STR
+        :return: Hy2OptModel
+        """
+        if self.model is None:
+            self.model = cTm.Hy2OptModel("default")
+        if self.model.name != model_name:
+            self.model.set_model_name(model_name)
+        return self.model
+
     def place_model_cbx(self, refresh=False):
         if not refresh:
             self.cbx_model = ttk.Combobox(self)
@@ -118,18 +131,19 @@ class Tab(tk.Frame):
     def save_model(self):
         self.assign_model_name()
         try:
-            self.model.set_model_name(str(self.model_name.get()))
-            for par_group, par_frame in self.frame_dict.items():
-                for par, val in par_frame.par_objects.items():
-                    if not (("Map" in par) and (("Format" in par) or ("Data" in par)) or ("Events" in par)):
-                        self.model.set_usr_parameters(par_group, par, [str(val.get())])
-                    else:
-                        if "Format" in par or "Data" in par:
-                            self.model.set_usr_parameters(par_group, par, par_frame.mctrl.map_out_dict[par])
-                        if "Events" in par:
-                            self.model.set_usr_parameters(par_group, par, val)
-                            par_frame.save_event_file()
-                self.model.sign_model(par_group)
+            self.get_writer_model(str(self.model_name.get()))
+            with self.model.batch():  # write the model file once, after all parameters are collected
+                for par_group, par_frame in self.frame_dict.items():
+                    for par, val in par_frame.par_objects.items():
+                        if not (("Map" in par) and (("Format" in par) or ("Data" in par)) or ("Events" in par)):
+                            self.model.set_usr_parameters(par_group, par, [str(val.get())])
+                        else:
+                            if "Format" in par or "Data" in par:
+                                self.model.set_usr_parameters(par_group, par, par_frame.mctrl.map_out_dict[par])
+                            if "Events" in par:
+                                self.model.set_usr_parameters(par_group, par, val)
+                                par_frame.save_event_file()
+                    self.model.sign_model(par_group)
             self.changes_saved = True
             self.b_save.config(fg="forest green", text="Save Model (last saved: %s)" % str(datetime.datetime.now()).split(".")[0])
         except IndexError:
@@ -164,7 +178,12 @@ class Tab(tk.Frame):
         :return: STR of model_name if signature=True OR None if signature==False
         """
 
-        if self.model.signature_verification(par_group):
+        shared_model = cTm.model_cache.acquire(str(self.model_name.get()))  # the same state is used by the frames
+        try:
+            signed = shared_model.signature_verification(par_group)
+        finally:
+            cTm.model_cache.release(shared_model)
+        if signed:
             return str(self.model_name.get())
         else:
             return None
@@ -1,5 +1,6 @@
 try:
     from tabs import *
+    import threading
 except:
     print("ExceptionERROR: Cannot find package files (pool).")
 
@@ -12,6 +13,10 @@ class TuflowTab(ModuleTab):
 
         self.tf_dir = self.tf_dir_get()
         self.model = None
+        self.run_thread = None  # runs the solver processes (see run_model) - the GUI polls the run status
+        self.run_status = {}  # {STR of run name: STR of status} updated by the run threads
+        self.monitor = None  # cMonitor.LogMonitor of the log files of the runs (progress events are polled)
+        self.poll_ms = 500
 
         # GUI OBJECT VARIABLES
         self.gui_interpreter = tk.StringVar()
@@ -38,6 +43,15 @@ class TuflowTab(ModuleTab):
         self.b_run = tk.Button(self, bg="white", text="RUN Tuflow", command=lambda: self.run_model())
         self.b_run['state'] = 'disabled'
         self.b_run.grid(sticky=tk.EW, row=2, rowspan=2, column=1, padx=cfg.xd, pady=cfg.yd)
+        self.l_run = tk.Label(self, fg="gray50", text="")
+        self.l_run.grid(sticky=tk.W, row=4, column=0, columnspan=4, padx=cfg.xd, pady=cfg.yd)
+        self.progress_columns = ("status", "percent", "time", "dt", "mass_error", "message")
+        self.tv_progress = ttk.Treeview(self, columns=self.progress_columns, height=8)
+        for col, head, width in zip(("#0",) + self.progress_columns,
+                                    ("Run", "Status", "%", "Time [h]", "dt [s]", "Mass error [%]", "Message"),
+                                    (160, 70, 50, 70, 60, 90, 200)):
+            self.tv_progress.heading(col, text=head)
+            self.tv_progress.column(col, width=width, anchor=tk.W if col in ("#0", "message") else tk.E)
 
     def launch_wizard(self):
         try:
@@ -72,8 +86,60 @@ class TuflowTab(ModuleTab):
             model_list.append(e.split("\\")[-1].split("/")[-1].split(".hy2model")[0])
         return [" -- SELECT -- ", "MODEL SETUP WIZARD"] + model_list
 
+    def poll_runs(self):
+        """Shows the number of runs per status (re-scheduled with after() until all runs ended)"""
+        counts = {}
+        for status in list(self.run_status.values()):
+            counts[status] = counts.get(status, 0) + 1
+        summary = ", ".join("{0} {1}".format(n, status) for status, n in sorted(counts.items()))
+        if self.run_thread and self.run_thread.is_alive():
+            self.l_run.config(text="Runs of {0}: {1}".format(self.model.name, summary))
+            self.update_progress()
+            self.after(self.poll_ms, self.poll_runs)
+        else:
+            self.monitor.stop()
+            self.update_progress()
+            self.l_run.config(text="Finished runs of {0}: {1}".format(self.model.name, summary))
+            self.b_run.config(text="RUN Tuflow", command=lambda: self.run_model())
+            self.b_make_files['state'] = 'normal'
+
     def run_model(self):
-        self.model.run_model(self.tf_dir)
+        """Starts the runs of all events in a background thread (the GUI remains responsive)"""
+        import cMonitor
+        self.run_status = {}
+        self.model.run_orchestrator = None
+        self.monitor = cMonitor.LogMonitor(limits=cMonitor.RunLimits())  # stops diverging runs
+        self.monitor.start()
+        self.tv_progress.delete(*self.tv_progress.get_children())
+        self.tv_progress.grid(sticky=tk.EW, row=6, column=0, columnspan=4, padx=cfg.xd, pady=cfg.yd)
+        self.run_thread = threading.Thread(target=self.model.run_model, args=(self.tf_dir,),
+                                           kwargs={"callback": [self.set_run_status, self.monitor.notify]},
+                                           daemon=True)
+        self.run_thread.start()
+        self.b_run.config(text="STOP runs", command=lambda: self.stop_runs())
+        self.b_make_files['state'] = 'disabled'
+        self.after(self.poll_ms, self.poll_runs)
+
+    def set_run_status(self, job):
+        # called from the run threads: only stores the status (tkinter widgets are updated by poll_runs)
+        self.run_status[job.name] = job.status
+
+    def stop_runs(self):
+        if self.model.run_orchestrator and askyesno("Stop runs", "Terminate all running Tuflow processes?"):
+            self.model.run_orchestrator.cancel()
+
+    def update_progress(self):
+        """Shows the progress events of the LogMonitor (one row per run, called by poll_runs)"""
+        def fmt(val, pattern):
+            return pattern.format(val) if val is not None else "-"
+
+        for event in self.monitor.get_events():
+            values = (event["status"], fmt(event["percent"], "{0:.0f}"), fmt(event["time"], "{0:.3f}"),
+                      fmt(event["dt"], "{0:.3g}"), fmt(event["mass_error"], "{0:.3f}"), event["message"])
+            if self.tv_progress.exists(event["name"]):
+                self.tv_progress.item(event["name"], values=values)
+            else:
+                self.tv_progress.insert("", tk.END, iid=event["name"], text=event["name"], values=values)
 
     def validate_selection(self):
         if "wizard" in str(self.c_interp.get()).lower():